@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+紧凑的文章记录
+流水线中的每篇文章原本是一个 dict，键名和分类、重要度、日期等取值在每一行都重复一份。
+Article 用 __slots__ 存字段，分类和日期等重复取值做字符串驻留，重要度用枚举，
+单篇文章的容器开销只有 dict 的几分之一；同时保留 dict 风格的读取方式
+（article["title"]、article.get("importance")、dict(article)），原有的生成代码不用修改
+"""
+
+import sys
+from collections.abc import Mapping
+from enum import Enum
+
+class Importance(str, Enum):
+    """Notion 中的重要度，与字符串 "高"/"中"/"低" 比较相等"""
+    HIGH = "高"
+    MEDIUM = "中"
+    LOW = "低"
+
+    def __str__(self):
+        return self.value
+
+    @classmethod
+    def parse(cls, value):
+        """转换为枚举，无法识别的取值保留为驻留后的字符串"""
+        member = _IMPORTANCE_BY_VALUE.get(value)
+        if member is not None:
+            return member
+        return sys.intern(value or "")
+
+# 每篇文章都要解析一次，不走 Enum 构造函数的异常路径
+_IMPORTANCE_BY_VALUE = {member.value: member for member in Importance}
+_IMPORTANCE_BY_VALUE.update({member: member for member in Importance})
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Article(Mapping):
+    """
+    一篇文章
+
+    必有字段: page_id、title、summary、url、category、importance、archived_date
+    可选字段: tags、newsletter_category（未设置时不出现在键中），其他键存入 extra
+    """
+    FIELDS = ("page_id", "title", "summary", "url", "category", "importance", "archived_date")
+    OPTIONAL_FIELDS = ("tags", "newsletter_category")
+    # 取值在文章之间大量重复的字段
+    INTERNED_FIELDS = ("category", "archived_date", "newsletter_category")
+
+    __slots__ = FIELDS + OPTIONAL_FIELDS + ("extra",)
+
+    def __init__(self, page_id="", title="", summary="", url="", category="", importance="",
+                 archived_date="", tags=None, newsletter_category=None, extra=None):
+        # 每篇文章都会创建一次，这里避免多余的函数调用
+        self.page_id = page_id
+        self.title = title
+        self.summary = summary
+        self.url = url
+        self.category = sys.intern(category) if type(category) is str else category
+        self.importance = _IMPORTANCE_BY_VALUE.get(importance) or Importance.parse(importance)
+        self.archived_date = sys.intern(archived_date) if type(archived_date) is str else archived_date
+        self.tags = tuple(_intern(tag) for tag in tags) if tags is not None else None
+        self.newsletter_category = _intern(newsletter_category) if newsletter_category else newsletter_category
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 dict（如草稿或 JSON 中的文章）创建，已是 Article 时原样返回"""
+        if isinstance(data, cls):
+            return data
+        known = {key: data[key] for key in cls.FIELDS + cls.OPTIONAL_FIELDS if key in data}
+        extra = {key: value for key, value in data.items() if key not in known}
+        return cls(extra=extra, **known)
+
+    def __getitem__(self, key):
+        if key in _REQUIRED_KEYS:
+            return getattr(self, key)
+        if key in _OPTIONAL_KEYS:
+            value = getattr(self, key)
+            if value is not None:
+                return list(value) if key == "tags" else value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # 生成器中大量调用，不经过 Mapping.get 的异常处理
+        if key in _REQUIRED_KEYS:
+            return getattr(self, key)
+        if key in _OPTIONAL_KEYS:
+            value = getattr(self, key)
+            if value is None:
+                return default
+            return list(value) if key == "tags" else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __setitem__(self, key, value):
+        if key in _REQUIRED_KEYS or key in _OPTIONAL_KEYS:
+            if key == "importance":
+                value = Importance.parse(value)
+            elif key == "tags":
+                value = tuple(_intern(tag) for tag in value) if value is not None else None
+            elif key in self.INTERNED_FIELDS:
+                value = _intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __iter__(self):
+        yield from self.FIELDS
+        for key in self.OPTIONAL_FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return (len(self.FIELDS) + sum(getattr(self, key) is not None for key in self.OPTIONAL_FIELDS)
+                + len(self.extra or ()))
+
+    def to_dict(self):
+        """转换为普通 dict，用于写入 JSON"""
+        return dict(self)
+
+    def __repr__(self):
+        return f"Article(title={self.title!r}, category={self.category!r}, importance={str(self.importance)!r})"
+
+_REQUIRED_KEYS = frozenset(Article.FIELDS)
+_OPTIONAL_KEYS = frozenset(Article.OPTIONAL_FIELDS)
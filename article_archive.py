@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+列式文章归档
+把全部历史文章导出为列式文件，加载时内存映射，全量统计和筛选在 NumPy 中向量化完成，
+不用为每一行创建 Python 对象:
+
+    archive/meta.json              行数、分类表、重要度表和各列的文件
+    archive/date.npy               添加日期 (datetime64[D])
+    archive/importance.npy         重要度编码 (uint8，0 表示未设置)
+    archive/category.npy           分类编号 (uint16，0 表示未分类)
+    archive/<列>.offsets.npy       字符串列（标题、摘要、链接、页面 ID）每行的起止偏移 (int64)
+    archive/<列>.bytes             字符串列的 UTF-8 内容
+
+需要安装 numpy（可选依赖）:
+    pip install numpy
+
+用法:
+    python weekly_cli.py archive export
+    python weekly_cli.py archive stats --importance 高 --category AI --by month
+"""
+
+import json
+import logging
+import mmap
+import os
+import shutil
+import time
+from datetime import date, datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ARCHIVE_DIR = "archive"
+ARCHIVE_VERSION = 1
+STRING_COLUMNS = ("title", "summary", "url", "page_id")
+IMPORTANCE_LEVELS = ["", "高", "中", "低"]
+HISTORY_START = datetime(2000, 1, 1)
+# 入选过周刊的文章会被改为"已发布"，导出全部历史时两种状态都要
+ARCHIVE_STATUSES = ("已归档", "已发布")
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("列式归档需要 numpy，请先运行: pip install numpy")
+
+def write_archive(articles, archive_dir=ARCHIVE_DIR):
+    """
+    把文章写成列式归档，先写到临时目录再整体替换，读取方不会看到写了一半的归档
+
+    Args:
+        articles (list): 文章（Article 或 dict）
+        archive_dir (str): 归档目录
+
+    Returns:
+        dict: 归档的 meta 信息
+    """
+    require_numpy()
+    articles = list(articles)
+    count = len(articles)
+
+    categories = [""]
+    category_ids = {"": 0}
+    importances = list(IMPORTANCE_LEVELS)
+    importance_codes = {value: code for code, value in enumerate(importances)}
+
+    dates = np.empty(count, dtype="datetime64[D]")
+    importance = np.empty(count, dtype=np.uint8)
+    category = np.empty(count, dtype=np.uint16)
+    for row, article in enumerate(articles):
+        dates[row] = article.get("archived_date") or "NaT"
+
+        value = str(article.get("importance") or "")
+        if value not in importance_codes:
+            importance_codes[value] = len(importances)
+            importances.append(value)
+        importance[row] = importance_codes[value]
+
+        name = article.get("category") or ""
+        if name not in category_ids:
+            category_ids[name] = len(categories)
+            categories.append(name)
+        category[row] = category_ids[name]
+
+    tmp_dir = f"{archive_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, "date.npy"), dates)
+    np.save(os.path.join(tmp_dir, "importance.npy"), importance)
+    np.save(os.path.join(tmp_dir, "category.npy"), category)
+    for column in STRING_COLUMNS:
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        with open(os.path.join(tmp_dir, f"{column}.bytes"), 'wb') as f:
+            position = 0
+            for row, article in enumerate(articles):
+                data = (article.get(column) or "").encode('utf-8')
+                f.write(data)
+                position += len(data)
+                offsets[row + 1] = position
+        np.save(os.path.join(tmp_dir, f"{column}.offsets.npy"), offsets)
+
+    meta = {
+        "version": ARCHIVE_VERSION,
+        "count": count,
+        "categories": categories,
+        "importances": importances,
+        "string_columns": list(STRING_COLUMNS),
+        "created_time": datetime.now().isoformat()
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    # 目录不能原子替换：先移走旧归档，换上新归档后再删除
+    old_dir = f"{archive_dir}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(archive_dir):
+        os.replace(archive_dir, old_dir)
+    os.replace(tmp_dir, archive_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    logging.info(f"🗄️  已导出 {count} 篇文章到 {archive_dir}（{len(categories) - 1} 个分类）")
+    return meta
+
+def export_archive(query_helper=None, archive_dir=ARCHIVE_DIR, since=HISTORY_START):
+    """
+    从 Notion 拉取全部已归档（包括已发布）的文章并导出
+
+    Returns:
+        dict: {count, categories, elapsed}
+    """
+    started = time.time()
+    if query_helper is None:
+        from notion_query_helper import NotionQueryHelper
+        query_helper = NotionQueryHelper()
+
+    articles = query_helper.get_archived_articles_by_date_range(since, datetime.now(), raise_errors=True,
+                                                               statuses=ARCHIVE_STATUSES)
+    meta = write_archive(articles, archive_dir)
+    return {
+        "count": meta["count"],
+        "categories": len(meta["categories"]) - 1,
+        "elapsed": round(time.time() - started, 2)
+    }
+
+class ArticleArchive:
+    """内存映射的列式归档，只读"""
+
+    def __init__(self, archive_dir=ARCHIVE_DIR):
+        require_numpy()
+        self.archive_dir = archive_dir
+        with open(os.path.join(archive_dir, "meta.json"), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"不支持的归档版本: {self.meta.get('version')}，请重新导出")
+
+        self.categories = self.meta["categories"]
+        self.importances = self.meta["importances"]
+        self.date = self._load("date.npy")
+        self.importance = self._load("importance.npy")
+        self.category = self._load("category.npy")
+        self._strings = {}
+
+    def _load(self, filename):
+        return np.load(os.path.join(self.archive_dir, filename), mmap_mode="r")
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def _string_column(self, column):
+        """字符串列的 (偏移, 内容)，首次使用时映射"""
+        if column not in self._strings:
+            if column not in self.meta["string_columns"]:
+                raise KeyError(column)
+            offsets = self._load(f"{column}.offsets.npy")
+            path = os.path.join(self.archive_dir, f"{column}.bytes")
+            if os.path.getsize(path):
+                with open(path, 'rb') as f:
+                    blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                blob = b""
+            self._strings[column] = (offsets, blob)
+        return self._strings[column]
+
+    def text(self, column, row):
+        """读取一行的字符串字段"""
+        offsets, blob = self._string_column(column)
+        return blob[int(offsets[row]):int(offsets[row + 1])].decode('utf-8')
+
+    def category_ids(self, name=None, contains=None):
+        """按名称或子串查找分类编号"""
+        return [index for index, category in enumerate(self.categories)
+                if (name is not None and category == name) or (contains is not None and contains in category)]
+
+    def mask(self, category=None, importance=None, start=None, end=None):
+        """
+        筛选条件对应的布尔数组
+
+        Args:
+            category (str): 分类名中包含的文字，如 "AI"
+            importance (str): 重要度，如 "高"
+            start (date|str): 起始日期（含）
+            end (date|str): 结束日期（含）
+        """
+        selected = np.ones(len(self), dtype=bool)
+        if category is not None:
+            selected &= np.isin(self.category, self.category_ids(contains=category))
+        if importance is not None:
+            code = self.importances.index(importance) if importance in self.importances else -1
+            selected &= self.importance == code
+        if start is not None:
+            selected &= self.date >= np.datetime64(_as_date(start), "D")
+        if end is not None:
+            selected &= self.date <= np.datetime64(_as_date(end), "D")
+        return selected
+
+    def count_by(self, by="month", mask=None):
+        """
+        分组计数
+
+        Args:
+            by (str): month / week / category / importance
+            mask: mask() 的结果，默认全部
+
+        Returns:
+            dict: {分组: 篇数}，按分组排序
+        """
+        if by in ("month", "week"):
+            dates = self.date if mask is None else self.date[mask]
+            dates = dates[~np.isnat(dates)]
+            if by == "month":
+                keys, counts = np.unique(dates.astype("datetime64[M]"), return_counts=True)
+                return {str(key): int(count) for key, count in zip(keys, counts)}
+            # ISO 周从周一开始，1970-01-01 是周四
+            mondays = (dates.astype(np.int64) + 3) // 7 * 7 - 3
+            keys, counts = np.unique(mondays, return_counts=True)
+            return {_iso_week(int(key)): int(count) for key, count in zip(keys, counts)}
+
+        if by == "category":
+            codes, labels = self.category, self.categories
+        elif by == "importance":
+            codes, labels = self.importance, self.importances
+        else:
+            raise ValueError(f"不支持的分组: {by}")
+        counts = np.bincount(codes if mask is None else codes[mask], minlength=len(labels))
+        return {labels[code] or "未设置": int(count) for code, count in enumerate(counts) if count}
+
+    def rows(self, mask=None, limit=None):
+        """把筛选出的行还原为 Article，只为选中的行创建对象"""
+        from article import Article
+
+        indices = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if limit is not None:
+            indices = indices[:limit]
+        return [
+            Article(
+                page_id=self.text("page_id", row),
+                title=self.text("title", row),
+                summary=self.text("summary", row),
+                url=self.text("url", row),
+                category=self.categories[self.category[row]],
+                importance=self.importances[self.importance[row]],
+                archived_date="" if np.isnat(self.date[row]) else str(self.date[row])
+            )
+            for row in indices.tolist()
+        ]
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def _iso_week(days):
+    year, week, _ = date.fromordinal(date(1970, 1, 1).toordinal() + days).isocalendar()
+    return f"{year}-W{week:02d}"
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+文章状态批量更新
+周刊发布成功后，把本期收录的文章标记为"已发布"，避免下周再次入选
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from notion_helper import NotionHelper
+from pipeline_metrics import in_current_context, stage
+
+class ArticleStatusUpdater:
+    def __init__(self, client=None, max_workers=8, max_attempts=3, retry_base_delay=1.0,
+                 status_property="状态"):
+        self.helper = NotionHelper()
+        self._client = client
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.status_property = status_property
+
+        # 文章数据库里"状态"可能是 select 也可能是 status 类型
+        db_info = self.helper.get_database_info("main_articles") or {}
+        self.property_type = db_info.get("properties", {}).get(status_property, "select")
+
+    @property
+    def client(self):
+        if self._client is None:
+            from notion_client import NotionClient
+            self._client = NotionClient()
+        return self._client
+
+    def mark_published(self, articles, status="已发布"):
+        """
+        并发更新文章状态
+
+        Args:
+            articles (list): 本期收录的文章（需要包含 page_id）
+            status (str): 目标状态
+
+        Returns:
+            dict: 汇总报告
+        """
+        start = time.perf_counter()
+        pending = [a for a in articles if a.get("page_id")]
+        skipped = len(articles) - len(pending)
+
+        with stage("mark_published") as span:
+            if pending:
+                update_one = in_current_context(self._update_one)
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                    outcomes = list(pool.map(lambda a: update_one(a, status), pending))
+            else:
+                outcomes = []
+            span.count = len(outcomes)
+
+        failed = [outcome for outcome in outcomes if not outcome["success"]]
+        if outcomes:
+            # 文章状态变了，缓存的"已归档"查询结果不再准确
+            from notion_query_helper import clear_query_cache
+            clear_query_cache()
+
+        report = {
+            "total": len(articles),
+            "updated": len(outcomes) - len(failed),
+            "skipped": skipped,
+            "failed": failed,
+            "retries": sum(outcome["attempts"] - 1 for outcome in outcomes),
+            "elapsed": round(time.perf_counter() - start, 3)
+        }
+
+        logging.info(
+            f"📌 文章状态更新完成: {report['updated']}/{report['total']} 篇标记为{status}，"
+            f"跳过 {skipped} 篇，失败 {len(failed)} 篇，耗时 {report['elapsed']}s"
+        )
+        for outcome in failed:
+            logging.error(f"❌ 更新失败: {outcome['title']} ({outcome['page_id']}): {outcome['error']}")
+
+        return report
+
+    def _update_one(self, article, status):
+        """更新单篇文章，暂时性错误按指数退避重试"""
+        properties = {self.status_property: {self.property_type: {"name": status}}}
+        error = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.client.update_page(article["page_id"], properties)
+                return {"success": True, "page_id": article["page_id"],
+                        "title": article.get("title", ""), "attempts": attempt}
+            except Exception as e:
+                error = e
+                if not getattr(e, "transient", False) or attempt == self.max_attempts:
+                    break
+                delay = getattr(e, "retry_after", None) or self.retry_base_delay * (2 ** (attempt - 1))
+                time.sleep(delay)
+
+        return {"success": False, "page_id": article["page_id"], "title": article.get("title", ""),
+                "attempts": attempt, "error": str(error)}
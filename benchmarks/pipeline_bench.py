@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+周刊流水线基准
+用合成的 Notion 页面（中英混排的标题、带粗体和链接的摘要）在不同规模下测量各阶段耗时:
+
+    extract     从页面属性提取文章字段（NotionQueryHelper.format_article_for_newsletter）
+    classify    逐篇判定栏目（WeeklyGenerator.categorize_article，生成周刊时实际使用的分类）
+    categorize  按栏目分组（WeeklyGenerator.categorize_articles）
+    render      生成周刊 Markdown（WeeklyGenerator.generate_weekly_content_from_articles）
+    blocks      Markdown 转 Notion 块（WeeklyPublisher.markdown_to_notion_blocks）
+    serialize   把块序列化为发布请求体（每 100 个块一个请求）
+
+不访问网络，也不需要 notion_config.json
+
+用法（在项目根目录）:
+    python benchmarks/pipeline_bench.py [--sizes 1000,10000,100000] [--runs 3] [--json bench.json]
+    python benchmarks/pipeline_bench.py --compare bench.json [--threshold 0.2]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from notion_mock_server import make_article_page
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+STAGES = ["extract", "classify", "categorize", "render", "blocks", "serialize"]
+# 低于这个耗时的阶段只报告不判定回归，避免计时噪声误报
+NOISE_FLOOR_MS = 1.0
+MAX_CHILDREN = 100
+
+def make_corpus(size, seed=42):
+    """生成 size 条合成页面，同一种子每次结果相同"""
+    rng = random.Random(seed)
+    start = datetime(2025, 5, 19)
+    return [make_article_page(index, start + timedelta(minutes=index % 10080), rng=rng)
+            for index in range(1, size + 1)]
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def run_once(pages, query_helper, generator, publisher):
+    """跑一遍全部阶段，返回 {阶段: 毫秒} 和各阶段的产出规模"""
+    timings = {}
+    timings["extract"], articles = timed(lambda: [query_helper.format_article_for_newsletter(page) for page in pages])
+    timings["classify"], _ = timed(lambda: [generator.categorize_article(article) for article in articles])
+    timings["categorize"], _ = timed(lambda: generator.categorize_articles(articles))
+    timings["render"], content = timed(lambda: generator.generate_weekly_content_from_articles(articles, 21))
+    timings["blocks"], blocks = timed(lambda: publisher.markdown_to_notion_blocks(content))
+    timings["serialize"], payloads = timed(lambda: [
+        json.dumps({"children": blocks[i:i + MAX_CHILDREN]}, ensure_ascii=False)
+        for i in range(0, len(blocks), MAX_CHILDREN)
+    ])
+    output = {
+        "articles": len(articles),
+        "content_bytes": len(content.encode('utf-8')),
+        "blocks": len(blocks),
+        "payload_bytes": sum(len(payload.encode('utf-8')) for payload in payloads)
+    }
+    return timings, output
+
+def measure_size(size, runs, seed):
+    from notion_query_helper import NotionQueryHelper
+    from weekly_generator import WeeklyGenerator
+    from weekly_publisher import WeeklyPublisher
+
+    pages = make_corpus(size, seed)
+    query_helper = NotionQueryHelper(database_id="bench")
+    publisher = WeeklyPublisher()
+    generator = WeeklyGenerator(publisher=publisher)
+
+    samples = {name: [] for name in STAGES}
+    for _ in range(runs):
+        timings, output = run_once(pages, query_helper, generator, publisher)
+        for name, elapsed in timings.items():
+            samples[name].append(elapsed)
+
+    stages = {}
+    for name in STAGES:
+        median_ms = statistics.median(samples[name])
+        stages[name] = {
+            "median_ms": round(median_ms, 3),
+            "min_ms": round(min(samples[name]), 3),
+            "us_per_article": round(median_ms * 1000 / size, 3)
+        }
+    return {"size": size, "output": output, "stages": stages,
+            "total_ms": round(sum(stage["median_ms"] for stage in stages.values()), 3)}
+
+def compare(report, baseline, threshold):
+    """
+    与基线逐项比较中位数，慢于基线 threshold 以上的记为回归
+
+    Returns:
+        list: 每项的比较结果
+    """
+    baseline_sizes = {result["size"]: result for result in baseline.get("results", [])}
+    rows = []
+    for result in report["results"]:
+        old_result = baseline_sizes.get(result["size"])
+        if not old_result:
+            continue
+        for name, current in result["stages"].items():
+            old = old_result["stages"].get(name)
+            if not old:
+                continue
+            ratio = current["median_ms"] / old["median_ms"] if old["median_ms"] else None
+            regressed = (ratio is not None and ratio > 1 + threshold
+                         and max(current["median_ms"], old["median_ms"]) >= NOISE_FLOOR_MS)
+            rows.append({
+                "size": result["size"],
+                "stage": name,
+                "baseline_ms": old["median_ms"],
+                "current_ms": current["median_ms"],
+                "ratio": round(ratio, 3) if ratio is not None else None,
+                "regressed": regressed
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="周刊流水线基准")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="逗号分隔的文章数量")
+    parser.add_argument("--runs", type=int, default=3, help="每个规模重复次数，取中位数")
+    parser.add_argument("--seed", type=int, default=42, help="合成数据的随机种子")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定回归的变慢比例，默认 0.2（20%%）")
+    args = parser.parse_args()
+
+    # 被测模块会输出 INFO 日志，基准中只保留警告
+    logging.disable(logging.INFO)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "seed": args.seed,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "results": []
+    }
+
+    print(f"{'文章数':>8}  " + "".join(f"{name:>12}" for name in STAGES) + f"{'合计(ms)':>12}")
+    for size in sizes:
+        result = measure_size(size, args.runs, args.seed)
+        report["results"].append(result)
+        print(f"{size:>8}  " + "".join(f"{result['stages'][name]['median_ms']:>12.1f}" for name in STAGES)
+              + f"{result['total_ms']:>12.1f}")
+        output = result["output"]
+        print(f"{'':>8}  └─ 正文 {output['content_bytes'] / 1024:.0f} KiB，{output['blocks']} 个块，"
+              f"请求体 {output['payload_bytes'] / 1024:.0f} KiB")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ 结果已写入 {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        regressions = [row for row in rows if row["regressed"]]
+
+        print(f"\n📏 与基线 {args.compare} 比较（阈值 +{args.threshold:.0%}）")
+        for row in rows:
+            mark = "❌" if row["regressed"] else "  "
+            ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "-"
+            print(f"{mark} {row['size']:>8} {row['stage']:<12}{row['baseline_ms']:>10.1f} → "
+                  f"{row['current_ms']:>10.1f} ms  {ratio}")
+
+        if regressions:
+            print(f"\n❌ {len(regressions)} 项变慢超过 {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ 没有发现性能回归")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+冷启动耗时基准
+在全新的子进程中测量各入口模块的导入耗时，以及 weekly_cli.py --help 的总耗时
+
+用法（在项目根目录）:
+    python benchmarks/startup_bench.py [--runs 10] [--json startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_MODULES = [
+    "weekly_cli",
+    "notion_helper",
+    "notion_query_helper",
+    "weekly_generator",
+    "weekly_publisher",
+    "weekly_scheduler",
+    "generate_and_publish",
+]
+
+def run_python(args):
+    """在项目根目录启动一个新的解释器，返回 (耗时毫秒, 退出码, stderr)"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable] + args, cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, completed.returncode, completed.stderr
+
+def parse_importtime(stderr, top=5):
+    """解析 -X importtime 输出，返回自身模块的累计耗时与最慢的依赖"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        entries.append((name, int(self_us), int(cumulative_us)))
+
+    if not entries:
+        return None, []
+    total_us = entries[-1][2]
+    slowest = sorted(entries[:-1], key=lambda entry: entry[2], reverse=True)[:top]
+    return total_us / 1000, [
+        {"module": name, "cumulative_ms": round(cumulative / 1000, 2)} for name, _, cumulative in slowest
+    ]
+
+def measure_module(module, runs):
+    wall_times, import_times, slowest = [], [], []
+    for _ in range(runs):
+        elapsed, returncode, stderr = run_python(["-X", "importtime", "-c", f"import {module}"])
+        if returncode != 0:
+            return {"module": module, "error": stderr.strip().splitlines()[-1] if stderr.strip() else "failed"}
+        total_ms, slowest = parse_importtime(stderr)
+        wall_times.append(elapsed)
+        import_times.append(total_ms)
+
+    return {
+        "module": module,
+        "wall_ms": round(statistics.median(wall_times), 2),
+        "import_ms": round(statistics.median(import_times), 2),
+        "slowest_imports": slowest
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动耗时基准")
+    parser.add_argument("--runs", type=int, default=10, help="每项重复次数，取中位数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    baseline = [run_python(["-c", "pass"])[0] for _ in range(args.runs)]
+    cli_help = [run_python(["weekly_cli.py", "--help"])[0] for _ in range(args.runs)]
+
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "interpreter_ms": round(statistics.median(baseline), 2),
+        "cli_help_ms": round(statistics.median(cli_help), 2),
+        "modules": [measure_module(module, args.runs) for module in ENTRY_MODULES]
+    }
+
+    print(f"🐍 空解释器启动: {report['interpreter_ms']} ms")
+    print(f"⌨️  weekly_cli.py --help: {report['cli_help_ms']} ms "
+          f"(额外开销 {report['cli_help_ms'] - report['interpreter_ms']:.1f} ms)")
+    print()
+    print(f"{'模块':<24}{'导入耗时(ms)':>14}{'进程总耗时(ms)':>16}")
+    for result in report["modules"]:
+        if "error" in result:
+            print(f"{result['module']:<24}  ❌ {result['error']}")
+            continue
+        print(f"{result['module']:<24}{result['import_ms']:>14}{result['wall_ms']:>16}")
+        for slow in result["slowest_imports"][:3]:
+            print(f"    └─ {slow['module']}: {slow['cumulative_ms']} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ 结果已写入 {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+周刊封面渲染
+用 Pillow 直接绘制公众号主封面（2.35:1）和朋友圈封面（1:1），替代 duolingo_growth_cover.html
+在浏览器中点击下载（html2canvas + CDN 上的 Tailwind 和字体）的手动流程，离线可用。
+配色沿用 HTML 版：#10b981 → #064e3b 的 135° 渐变、半透明装饰圆、黄橙渐变标题。
+
+封面按内容哈希缓存：期号、标题、导读标题、标签、尺寸、字体和渲染版本都不变时直接复用
+covers/ 中已有的图片。多期封面一起渲染时使用进程池并行绘制
+
+字体按顺序查找：环境变量 WEEKLY_COVER_FONT、项目 fonts/ 目录（建议放 NotoSansSC-Bold.otf）、
+系统中常见的中文字体；都没有时不渲染（Pillow 默认字体没有中文字形，只会画出方框）
+
+需要安装 Pillow（可选依赖，见 requirements-optional.txt）:
+    pip install -r requirements-optional.txt
+
+用法:
+    python weekly_cli.py cover                       # 为目录中所有往期周刊渲染封面
+    python weekly_cli.py cover 周刊01.md --workers 4
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from pipeline_metrics import timed_stage
+
+try:
+    from PIL import Image, ImageChops, ImageDraw, ImageFont
+except ImportError:
+    Image = ImageChops = ImageDraw = ImageFont = None
+
+COVERS_DIR = "covers"
+# 修改绘制逻辑后加一，让旧的缓存失效
+RENDER_VERSION = 1
+COVER_SIZES = {
+    "main": (1410, 600),    # 公众号主封面 2.35:1
+    "square": (600, 600),   # 朋友圈封面 1:1
+}
+
+BACKGROUND_STOPS = ["#10b981", "#059669", "#047857", "#065f46", "#064e3b"]
+HEADLINE_STOPS = ["#fde047", "#fdba74"]
+ACCENT_COLOR = "#fde047"
+
+FONT_DIRS = [Path(__file__).resolve().parent / "fonts"]
+FONT_CANDIDATES = [
+    "NotoSansSC-Bold.otf", "NotoSansSC-Bold.ttf", "SourceHanSansSC-Bold.otf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Medium.ttc",
+    "C:/Windows/Fonts/msyhbd.ttc",
+]
+
+ISSUE_TITLE_RE = re.compile(r"^#\s+(.+?)\s*第(\d+)期", re.MULTILINE)
+HEADLINE_RE = re.compile(r"\*\*原文链接\*\*:\s*\[([^\]]+)\]")
+# 周刊文件名中的日期：期号每年重新编号，文件名需要带上日期才能区分不同年份的同一期
+ISSUE_DATE_RE = re.compile(r"_(\d{8})\.md$")
+SECTION_RE = re.compile(r"^##\s+(.+)$", re.MULTILINE)
+# 不作为封面标签的固定栏目
+FIXED_SECTIONS = ("本周导读", "本周趋势", "写在最后")
+
+def require_pillow():
+    if Image is None:
+        raise RuntimeError("封面渲染需要 Pillow，请先运行: pip install Pillow")
+
+def require_font():
+    """返回中文字体路径，没有时报错"""
+    font_path = find_font()
+    if font_path is None:
+        raise RuntimeError("封面渲染需要中文字体，请设置 WEEKLY_COVER_FONT 或把 NotoSansSC-Bold.otf 放入 fonts/ 目录")
+    return font_path
+
+def issue_cover_spec(path):
+    """
+    从周刊文件中取出封面内容：标题、期号、日期（文件名中的）、导读标题（第一篇文章）和前三个栏目
+
+    Returns:
+        dict: {title, issue, date, headline, tags}，不是周刊文件时为 None
+    """
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+
+    title_match = ISSUE_TITLE_RE.search(content)
+    if not title_match:
+        return None
+    headline_match = HEADLINE_RE.search(content)
+    tags = []
+    for heading in SECTION_RE.findall(content):
+        # 去掉栏目前的 emoji
+        name = re.sub(r"^[^\w&]+", "", heading).strip()
+        if name and name not in FIXED_SECTIONS and name not in tags:
+            tags.append(name)
+
+    date_match = ISSUE_DATE_RE.search(os.path.basename(path))
+    return {
+        "title": title_match.group(1),
+        "issue": int(title_match.group(2)),
+        "date": date_match.group(1) if date_match else None,
+        "headline": headline_match.group(1) if headline_match else title_match.group(1),
+        "tags": tags[:3],
+    }
+
+def find_font():
+    """第一个存在的字体文件，没有时为 None"""
+    candidates = [os.environ.get("WEEKLY_COVER_FONT")]
+    for name in FONT_CANDIDATES:
+        if os.path.isabs(name):
+            candidates.append(name)
+        else:
+            candidates.extend(str(directory / name) for directory in FONT_DIRS)
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    return None
+
+def cover_key(spec, kind, font_path=None):
+    """封面内容的哈希，任一输入变化都会得到新的文件名"""
+    font_stat = os.stat(font_path) if font_path else None
+    payload = {
+        "spec": spec,
+        "kind": kind,
+        "size": COVER_SIZES[kind],
+        "version": RENDER_VERSION,
+        "font": [font_path, font_stat.st_size, font_stat.st_mtime_ns] if font_stat else None,
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def cover_prefix(spec, kind):
+    """同一期（期号和日期）同一种封面的文件名前缀，内容变化时只替换哈希部分"""
+    date = spec.get("date")
+    issue = f"第{spec['issue']:02d}期_{date}" if date else f"第{spec['issue']:02d}期"
+    return f"{issue}_{kind}_"
+
+def cover_path(spec, kind, output_dir=COVERS_DIR, font_path=None):
+    return Path(output_dir) / f"{cover_prefix(spec, kind)}{cover_key(spec, kind, font_path)}.png"
+
+# ---- 绘制 ----
+
+def _rgb(color):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+def _gradient_lut(stops):
+    """256 级颜色表，每个通道一张，供 Image.point 使用"""
+    colors = [_rgb(stop) for stop in stops]
+    luts = ([], [], [])
+    for level in range(256):
+        position = level / 255 * (len(colors) - 1)
+        index = min(int(position), len(colors) - 2)
+        fraction = position - index
+        for channel in range(3):
+            start, end = colors[index][channel], colors[index + 1][channel]
+            luts[channel].append(round(start + (end - start) * fraction))
+    return luts
+
+def gradient(size, stops, diagonal=True):
+    """
+    多段线性渐变：diagonal 时为 CSS 的 135°（左上到右下），否则从左到右
+
+    先用 256 级灰度斜坡得到每个像素的位置，再通过颜色表映射，全部在 Pillow 的 C 代码中完成
+    """
+    ramp = Image.linear_gradient("L")
+    position = ramp.transpose(Image.Transpose.ROTATE_90).resize(size)
+    if diagonal:
+        position = ImageChops.add(position, ramp.resize(size), scale=2.0)
+    return Image.merge("RGB", [position.point(lut) for lut in _gradient_lut(stops)])
+
+def load_font(font_path, size):
+    return ImageFont.truetype(font_path, size)
+
+def wrap_text(text, font, max_width, max_lines):
+    """
+    按宽度折行：中文逐字、英文按单词，超过 max_lines 时最后一行以 … 结尾
+
+    Returns:
+        list: 各行文字
+    """
+    lines, current = [], ""
+    for token in re.findall(r"[A-Za-z0-9]+|\s+|.", text):
+        if font.getlength(current + token) <= max_width or not current:
+            current += token
+            continue
+        lines.append(current.rstrip())
+        current = token.lstrip()
+    if current:
+        lines.append(current.rstrip())
+
+    if len(lines) > max_lines:
+        last = lines[max_lines - 1]
+        while last and font.getlength(last + "…") > max_width:
+            last = last[:-1]
+        lines = lines[:max_lines - 1] + [last + "…"]
+    return lines
+
+def fit_text(text, font_path, sizes, max_width, max_lines):
+    """从大到小尝试字号，返回第一个不需要截断的 (字体, 行)"""
+    for size in sizes:
+        font = load_font(font_path, size)
+        lines = wrap_text(text, font, max_width, max_lines)
+        if not lines or not lines[-1].endswith("…"):
+            return font, lines
+    return font, lines
+
+def _text_height(font, text):
+    left, top, right, bottom = font.getbbox(text or "国")
+    return bottom
+
+def _draw_pill(draw, xy, text, font, fill, outline=None):
+    """圆角标签，返回标签的宽度"""
+    x, y = xy
+    padding_x, padding_y = round(getattr(font, "size", 16) * 0.8), 10
+    width = font.getlength(text) + padding_x * 2
+    height = _text_height(font, text) + padding_y * 2
+    draw.rounded_rectangle((x, y, x + width, y + height), radius=height / 2, fill=fill,
+                           outline=outline, width=2 if outline else 0)
+    draw.text((x + padding_x, y + padding_y), text, font=font, fill="white")
+    return width, height
+
+def _draw_gradient_text(image, xy, text, font, stops):
+    """渐变色文字：先把文字画进蒙版，再透过蒙版贴上渐变"""
+    mask = Image.new("L", image.size, 0)
+    ImageDraw.Draw(mask).text(xy, text, font=font, fill=255)
+    left, top, right, bottom = mask.getbbox() or (0, 0, 1, 1)
+    fill = gradient((right - left, bottom - top), stops, diagonal=False)
+    image.paste(fill, (left, top), mask.crop((left, top, right, bottom)))
+
+def draw_main_cover(spec, font_path=None):
+    """公众号主封面：左对齐的期号标签、导读标题、装饰线和栏目标签"""
+    width, height = COVER_SIZES["main"]
+    image = gradient((width, height), BACKGROUND_STOPS).convert("RGBA")
+    overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    draw.ellipse((width - 160, -160, width + 160, 160), fill=(255, 255, 255, 13))
+    draw.ellipse((-120, height - 120, 120, height + 120), fill=(255, 255, 255, 13))
+
+    padding = 96
+    label_font = load_font(font_path, 30)
+    tag_font = load_font(font_path, 26)
+    headline_font, headline_lines = fit_text(spec["headline"], font_path, (84, 72, 60),
+                                             width - padding * 2, 2)
+    line_height = round(getattr(headline_font, "size", 60) * 1.25)
+
+    # 先算总高度，整体垂直居中
+    label = f"{spec['title']} · 第{spec['issue']:02d}期"
+    label_height = _text_height(label_font, label) + 20
+    tags_height = _text_height(tag_font, "".join(spec["tags"])) + 20 if spec["tags"] else 0
+    total = label_height + 32 + line_height * len(headline_lines) + 24 + 8 + (40 + tags_height if tags_height else 0)
+    y = (height - total) / 2
+
+    _draw_pill(draw, (padding, y), label, label_font, fill=(255, 255, 255, 51), outline=(255, 255, 255, 51))
+    y += label_height + 32
+    image = Image.alpha_composite(image, overlay)
+
+    for line in headline_lines:
+        _draw_gradient_text(image, (padding, y), line, headline_font, HEADLINE_STOPS)
+        y += line_height
+    y += 24
+
+    overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    accent = gradient((120, 8), HEADLINE_STOPS, diagonal=False)
+    accent_mask = Image.new("L", accent.size, 0)
+    ImageDraw.Draw(accent_mask).rounded_rectangle((0, 0, 119, 7), radius=4, fill=255)
+    overlay.paste(accent, (padding, round(y)), accent_mask)
+    y += 8 + 40
+
+    x = padding
+    for tag in spec["tags"]:
+        tag_width, _ = _draw_pill(draw, (x, y), tag, tag_font, fill=(255, 255, 255, 38))
+        x += tag_width + 16
+    return Image.alpha_composite(image, overlay).convert("RGB")
+
+def draw_square_cover(spec, font_path=None):
+    """朋友圈封面：居中的期号和导读标题"""
+    width, height = COVER_SIZES["square"]
+    image = gradient((width, height), BACKGROUND_STOPS).convert("RGBA")
+    overlay = Image.new("RGBA", image.size, (255, 255, 255, 26))
+    draw = ImageDraw.Draw(overlay)
+    draw.ellipse((width - 48 - 160, 48, width - 48, 48 + 160), outline=(255, 255, 255, 77), width=4)
+    draw.ellipse((48, height - 48 - 128, 48 + 128, height - 48), outline=(255, 255, 255, 77), width=4)
+
+    issue_font = load_font(font_path, 132)
+    issue_text = f"第{spec['issue']:02d}期"
+    headline_font, headline_lines = fit_text(spec["headline"], font_path, (44, 38, 32), width - 120, 3)
+    line_height = round(getattr(headline_font, "size", 32) * 1.3)
+
+    issue_height = _text_height(issue_font, issue_text)
+    total = issue_height + 36 + line_height * len(headline_lines) + 36 + 12
+    y = (height - total) / 2
+
+    draw.text(((width - issue_font.getlength(issue_text)) / 2, y), issue_text, font=issue_font, fill="white")
+    y += issue_height + 36
+    for line in headline_lines:
+        draw.text(((width - headline_font.getlength(line)) / 2, y), line, font=headline_font,
+                  fill=(255, 255, 255, 230))
+        y += line_height
+    y += 36
+    draw.rounded_rectangle(((width - 96) / 2, y, (width + 96) / 2, y + 12), radius=6, fill=ACCENT_COLOR)
+    return Image.alpha_composite(image, overlay).convert("RGB")
+
+DRAWERS = {"main": draw_main_cover, "square": draw_square_cover}
+
+def render_cover(spec, kind, output_dir=COVERS_DIR, font_path=None):
+    """
+    渲染一张封面（已缓存时直接返回）
+
+    Returns:
+        str: 图片路径
+    """
+    require_pillow()
+    font_path = font_path or require_font()
+    path = cover_path(spec, kind, output_dir, font_path)
+    if path.exists():
+        return str(path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = DRAWERS[kind](spec, font_path)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    image.save(tmp_path, format="PNG", optimize=True)
+    os.replace(tmp_path, path)
+    return str(path)
+
+def prune_stale_covers(specs, covers, output_dir=COVERS_DIR):
+    """
+    删除这些期（期号和日期都相同）同种封面的旧版本；只在全部绘制完成后由主进程执行，
+    不会删掉同一批中正在绘制的图片
+
+    Returns:
+        int: 删除的图片数
+    """
+    current = {cover[kind] for cover in covers for kind in COVER_SIZES}
+    removed = 0
+    for spec in specs:
+        for kind in COVER_SIZES:
+            for stale in glob.glob(str(Path(output_dir) / f"{glob.escape(cover_prefix(spec, kind))}*.png")):
+                if stale in current:
+                    continue
+                try:
+                    os.remove(stale)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+    return removed
+
+def plan_covers(specs, output_dir=COVERS_DIR, font_path=None):
+    """
+    确定每期封面的文件路径，以及哪些还没有缓存、需要绘制（不需要 Pillow）
+
+    Returns:
+        tuple: (covers: [{issue, date, main, square}], jobs: [render_cover 的参数])
+    """
+    covers = [{"issue": spec["issue"], "date": spec.get("date")} for spec in specs]
+    jobs = []
+    for cover, spec in zip(covers, specs):
+        for kind in COVER_SIZES:
+            path = cover_path(spec, kind, output_dir, font_path)
+            cover[kind] = str(path)
+            if not path.exists():
+                jobs.append((spec, kind, output_dir, font_path))
+    return covers, jobs
+
+def _render_job(job):
+    return render_cover(*job)
+
+@timed_stage(name="cover_render", count=lambda result, *_, **__: result["rendered"])
+def render_covers(specs, output_dir=COVERS_DIR, workers=None):
+    """
+    批量渲染多期封面，已缓存的封面不重新绘制，其余的在进程池中并行绘制
+
+    Args:
+        specs (list): issue_cover_spec 返回的封面内容
+        output_dir (str): 封面目录
+        workers (int): 进程数，默认 CPU 核数；为 1 时在当前进程中绘制
+
+    Returns:
+        dict: {rendered, cached, covers: [{issue, date, main, square}]}
+    """
+    require_pillow()
+    font_path = require_font()
+
+    covers, jobs = plan_covers(specs, output_dir, font_path)
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+            list(pool.map(_render_job, jobs))
+    else:
+        for job in jobs:
+            _render_job(job)
+    if jobs:
+        prune_stale_covers(specs, covers, output_dir)
+
+    result = {"rendered": len(jobs), "cached": len(specs) * len(COVER_SIZES) - len(jobs), "covers": covers}
+    logging.info(f"🖼️  封面: 新渲染 {result['rendered']} 张，复用缓存 {result['cached']} 张")
+    return result
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+周刊草稿预热
+一周内定时增量同步新归档的文章、分类并更新草稿，周日只需定稿和发布
+
+草稿保存在 drafts/<年>-W<周>.json（文章与同步水位）和同名 .md（当前渲染结果）
+"""
+
+import copy
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from notion_helper import config_file_lock, read_config, write_config
+
+DRAFTS_DIR = "drafts"
+
+# 水位向前回退一点，避免本机与 Notion 服务器的时钟误差漏掉页面
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+class DraftPipeline:
+    def __init__(self, drafts_dir=DRAFTS_DIR, query_helper=None, generator=None, featured=None):
+        self.drafts_dir = Path(drafts_dir)
+        self._query_helper = query_helper
+        self._generator = generator
+        # 设置后（FeaturedIndex）同步时去掉往期已收录的文章
+        self.featured = featured
+
+    @property
+    def query_helper(self):
+        if self._query_helper is None:
+            from notion_query_helper import NotionQueryHelper
+            self._query_helper = NotionQueryHelper()
+        return self._query_helper
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            from weekly_generator import WeeklyGenerator
+            self._generator = WeeklyGenerator()
+        return self._generator
+
+    def draft_path(self, year, week_number):
+        return self.drafts_dir / f"{year}-W{week_number:02d}.json"
+
+    def exists(self, year, week_number):
+        return self.draft_path(year, week_number).exists()
+
+    def load(self, year, week_number):
+        """读取草稿，不存在时返回空草稿"""
+        draft = read_config(self.draft_path(year, week_number))
+        if not draft:
+            return {"year": year, "week_number": week_number, "watermark": None, "articles": {}}
+        return copy.deepcopy(draft)
+
+    def article_key(self, article):
+        return article.get("page_id") or article.get("url") or article["title"]
+
+    def sync(self, year=None, week_number=None, full=False):
+        """
+        增量同步指定周的草稿：只拉取上次同步后编辑过的已归档文章
+
+        Args:
+            year (int): ISO 年份，默认本周
+            week_number (int): ISO 周数，默认本周
+            full (bool): 忽略水位重新拉取整周（例如有文章被取消归档时）
+
+        Returns:
+            dict: {year, week_number, fetched, added, updated, total, elapsed}
+        """
+        if year is None or week_number is None:
+            year, week_number = datetime.now().isocalendar()[:2]
+
+        started = time.time()
+        self.drafts_dir.mkdir(exist_ok=True)
+        path = self.draft_path(year, week_number)
+
+        # 查询和分类不持有锁（网络请求可能要几秒），只在合并草稿时加锁
+        watermark = None if full else self.load(year, week_number)["watermark"]
+        edited_since = datetime.fromisoformat(watermark) if watermark else None
+        sync_started = datetime.now(timezone.utc) - WATERMARK_OVERLAP
+        # 查询失败时抛出异常，水位保持不变，下次同步会重新拉取
+        articles = self.query_helper.get_archived_articles_for_week(
+            year, week_number, edited_since, raise_errors=True
+        )
+        if self.featured is not None:
+            articles, _ = self.featured.filter_new(articles, year, week_number)
+        classified = [(self.article_key(article),
+                       dict(article, newsletter_category=self.generator.categorize_article(article)))
+                      for article in articles]
+
+        with config_file_lock(path):
+            # 重新读取：同步期间其他线程或进程可能已经更新了草稿
+            draft = self.load(year, week_number)
+            if full:
+                draft["articles"], draft["watermark"] = {}, None
+
+            added = updated = 0
+            for key, article in classified:
+                if key not in draft["articles"]:
+                    added += 1
+                elif draft["articles"][key] != article:
+                    updated += 1
+                draft["articles"][key] = article
+
+            # 并发的同步可能已经把水位推得更靠后，只前进不后退
+            if not draft["watermark"] or datetime.fromisoformat(draft["watermark"]) < sync_started:
+                draft["watermark"] = sync_started.isoformat()
+            draft["updated_time"] = datetime.now().isoformat()
+            write_config(path, draft)
+
+        if added or updated or not path.with_suffix(".md").exists():
+            self.render(draft)
+
+        result = {
+            "year": year,
+            "week_number": week_number,
+            "fetched": len(articles),
+            "added": added,
+            "updated": updated,
+            "total": len(draft["articles"]),
+            "elapsed": round(time.time() - started, 3)
+        }
+        logging.info(f"草稿同步完成: {year} 年第 {week_number} 周，新增 {added} 篇，更新 {updated} 篇，共 {result['total']} 篇")
+        return result
+
+    def render(self, draft):
+        """把草稿渲染成 Markdown，写在草稿 JSON 旁边供编辑预览"""
+        articles = list(draft["articles"].values())
+        content = self.generator.generate_weekly_content_from_articles(articles, draft["week_number"], draft["year"])
+        path = self.draft_path(draft["year"], draft["week_number"]).with_suffix(".md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return content
+
+    def finalize(self, year, week_number):
+        """
+        定稿：最后做一次增量同步，再用草稿中已分类的文章渲染
+
+        Returns:
+            tuple: (周刊内容, 文章列表)，草稿为空时为 (None, [])
+        """
+        self.sync(year, week_number)
+        draft = self.load(year, week_number)
+        articles = list(draft["articles"].values())
+        if not articles:
+            return None, []
+        return self.render(draft), articles
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+事件驱动的定时调度
+计算下一次到期时间并一直睡到那一刻，不再每分钟轮询；
+上次运行时间持久化在 scheduler_state.json 中，重启时补跑错过的任务
+"""
+
+import copy
+import logging
+import threading
+from datetime import datetime, timedelta
+from notion_helper import config_file_lock, read_config, write_config
+
+STATE_FILE = "scheduler_state.json"
+
+# 单次睡眠的上限：机器休眠或系统时间被调整后，最多这么久就会重新计算到期时间
+MAX_SLEEP_SECONDS = 3600
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+class WeeklyAt:
+    """每周固定某天某时，例如 WeeklyAt("sunday", "09:00")"""
+
+    def __init__(self, weekday, at="09:00"):
+        self.weekday = WEEKDAYS.index(weekday.lower()) if isinstance(weekday, str) else weekday
+        hour, minute = at.split(":")
+        self.hour, self.minute = int(hour), int(minute)
+
+    def __str__(self):
+        return f"每周{'一二三四五六日'[self.weekday]} {self.hour:02d}:{self.minute:02d}"
+
+    def previous(self, now):
+        """不晚于 now 的最近一次到期时间"""
+        due = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        due -= timedelta(days=(now.weekday() - self.weekday) % 7)
+        if due > now:
+            due -= timedelta(days=7)
+        return due
+
+    def next(self, now):
+        """晚于 now 的下一次到期时间"""
+        return self.previous(now) + timedelta(days=7)
+
+class Interval:
+    """固定间隔，从周一 00:00 起对齐，例如 Interval(60) 为每个整点"""
+
+    ANCHOR = datetime(2000, 1, 3)
+
+    def __init__(self, minutes):
+        self.period = timedelta(minutes=minutes)
+
+    def __str__(self):
+        return f"每 {int(self.period.total_seconds() // 60)} 分钟"
+
+    def previous(self, now):
+        return now - (now - self.ANCHOR) % self.period
+
+    def next(self, now):
+        return self.previous(now) + self.period
+
+class ScheduledJob:
+    def __init__(self, name, trigger, func):
+        self.name = name
+        self.trigger = trigger
+        self.func = func
+
+class ScheduleState:
+    """
+    持久化的运行状态: {任务名: {last_due, last_finished, success}}
+
+    首次启动时只记录 {last_due, initialized}（从哪一次开始计算），不算作一次运行
+    """
+
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+
+    def get(self, name):
+        return read_config(self.state_file).get(name, {})
+
+    def last_due(self, name):
+        last_due = self.get(name).get("last_due")
+        return datetime.fromisoformat(last_due) if last_due else None
+
+    def record(self, name, due, success):
+        with config_file_lock(self.state_file):
+            state = copy.deepcopy(read_config(self.state_file))
+            state[name] = {
+                "last_due": due.isoformat(),
+                "last_finished": datetime.now().isoformat(),
+                "success": bool(success)
+            }
+            write_config(self.state_file, state)
+
+    def initialize(self, dues):
+        """
+        为还没有状态的任务记录起点，已有状态的任务不变
+
+        Args:
+            dues (dict): {任务名: 起点到期时间}
+
+        Returns:
+            list: 新记录的任务名
+        """
+        with config_file_lock(self.state_file):
+            state = copy.deepcopy(read_config(self.state_file))
+            missing = [name for name in dues if name not in state]
+            if missing:
+                now = datetime.now().isoformat()
+                for name in missing:
+                    state[name] = {"last_due": dues[name].isoformat(), "initialized": now}
+                write_config(self.state_file, state)
+            return missing
+
+class EventScheduler:
+    def __init__(self, state_file=STATE_FILE, clock=datetime.now, max_sleep=MAX_SLEEP_SECONDS,
+                 executor=None):
+        """
+        Args:
+            executor (Executor): 提供时任务在其中并发运行（如多份周刊共用的有界线程池），
+                同一个任务不会重叠运行；不提供时在调度线程中依次运行
+        """
+        self.jobs = []
+        self.state = ScheduleState(state_file)
+        self.clock = clock
+        self.max_sleep = max_sleep
+        self.executor = executor
+        self.running = set()
+        self.running_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.wakeup = threading.Event()
+        self.initialized = False
+
+    def add_job(self, name, trigger, func):
+        """
+        注册任务
+
+        Args:
+            name (str): 任务名，也是状态文件中的键
+            trigger: 提供 previous(now) / next(now) 的触发器，如 WeeklyAt
+            func (callable): func(due) -> bool，due 为本次对应的到期时间
+        """
+        self.jobs.append(ScheduledJob(name, trigger, func))
+        self.initialized = False
+
+    def initialize_state(self):
+        """首次启动的任务不补跑：把最近一次到期时间记为起点，从下一次开始运行"""
+        now = self.clock()
+        self.state.initialize({job.name: job.trigger.previous(now) for job in self.jobs})
+        self.initialized = True
+
+    def next_due(self, job):
+        """任务下一次应当运行的时间；错过的运行返回过去的时间（只读，不修改状态）"""
+        now = self.clock()
+        previous = job.trigger.previous(now)
+        last_due = self.state.last_due(job.name)
+        # 没有状态的任务（尚未 initialize_state）同样从下一次开始
+        if last_due is not None and last_due < previous:
+            return previous
+        return job.trigger.next(now)
+
+    def run_job(self, job, due):
+        """运行一次任务并记录状态；多次错过只补跑最近的一次"""
+        late = self.clock() - due
+        if late > timedelta(minutes=1):
+            logging.warning(f"补跑错过的任务 {job.name} (原定 {due:%Y-%m-%d %H:%M}，延迟 {late})")
+        else:
+            logging.info(f"运行任务 {job.name}")
+
+        try:
+            success = job.func(due) is not False
+        except Exception as e:
+            logging.error(f"任务 {job.name} 出错: {str(e)}")
+            success = False
+
+        self.state.record(job.name, due, success)
+        return success
+
+    def submit_job(self, job, due):
+        """在线程池中运行任务，完成后唤醒调度线程重新计算到期时间"""
+        with self.running_lock:
+            self.running.add(job.name)
+
+        def finished(future):
+            with self.running_lock:
+                self.running.discard(job.name)
+            self.wakeup.set()
+
+        self.executor.submit(self.run_job, job, due).add_done_callback(finished)
+
+    def run_pending(self):
+        """运行所有已到期的任务，返回距下一次到期的秒数"""
+        if not self.initialized:
+            self.initialize_state()
+        upcoming = []
+        for job in self.jobs:
+            with self.running_lock:
+                if job.name in self.running:
+                    continue
+            due = self.next_due(job)
+            if due <= self.clock():
+                if self.executor is not None:
+                    self.submit_job(job, due)
+                    continue
+                self.run_job(job, due)
+                due = self.next_due(job)
+            upcoming.append(due)
+
+        if not upcoming:
+            return self.max_sleep
+        return max(0.0, (min(upcoming) - self.clock()).total_seconds())
+
+    def run_forever(self):
+        """睡到下一次到期时间（或有任务完成）再运行，直到 stop() 被调用"""
+        while not self.stop_event.is_set():
+            self.wakeup.clear()
+            delay = self.run_pending()
+            self.wakeup.wait(min(delay, self.max_sleep))
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup.set()
+
+    def status(self):
+        """每个任务的触发规则、上次运行和下次运行"""
+        return [
+            {
+                "name": job.name,
+                "trigger": str(job.trigger),
+                "last": self.state.get(job.name),
+                "next_due": self.next_due(job).isoformat()
+            }
+            for job in self.jobs
+        ]
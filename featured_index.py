@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+已收录文章索引
+记录每篇发布过的文章的规范化链接（去掉跟踪参数、域名小写）和标题指纹，保存在 SQLite 中。
+文章的添加日期或状态被改动后可能再次被查询出来，获取文章后先用本索引去掉往期收录过的文章，
+再进行分类和渲染。
+
+查询前面有一个内存中的布隆过滤器：绝大多数文章都是新的，O(1) 判定"一定没收录过"，
+只有可能命中的文章才查 SQLite 确认。索引可以从发布历史一次流式读取重建:
+
+    python weekly_cli.py featured rebuild
+"""
+
+import hashlib
+import logging
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+FEATURED_DB = "featured_index.db"
+
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+                   "spm", "ref", "ref_src", "source", "from", "share_source", "share_medium", "si"}
+TITLE_STRIP_RE = re.compile(r"[^0-9a-z\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS featured (
+    key TEXT PRIMARY KEY,
+    title TEXT,
+    url TEXT,
+    year INTEGER,
+    week_number INTEGER,
+    featured_time TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+def canonical_url(url):
+    """规范化链接：协议和域名小写、去掉 www. 和默认端口、跟踪参数、锚点和末尾的 /，参数排序"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    # http 和 https 视为同一篇文章
+    return urlunsplit(("https" if scheme == "http" else scheme, host, path, urlencode(query), ""))
+
+def title_fingerprint(title):
+    """标题指纹：Unicode 规范化、小写，只保留中文、字母和数字后取哈希；太短的标题不参与判重"""
+    normalized = TITLE_STRIP_RE.sub("", unicodedata.normalize("NFKC", title or "").lower())
+    if len(normalized) < 4:
+        return None
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+def article_keys(article):
+    """一篇文章在索引中的键"""
+    keys = []
+    url = canonical_url(article.get("url"))
+    if url:
+        keys.append(f"url:{url}")
+    fingerprint = title_fingerprint(article.get("title"))
+    if fingerprint:
+        keys.append(f"title:{fingerprint}")
+    return keys
+
+class BloomFilter:
+    """按容量和误判率确定位数和哈希次数的布隆过滤器"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # 双重哈希：一次 blake2b 得到两个 64 位值
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class FeaturedIndex:
+    def __init__(self, db_path=FEATURED_DB):
+        self.db_path = str(db_path)
+        self._bloom = None
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM featured").fetchone()[0]
+
+    def bloom(self):
+        """内存中的布隆过滤器，首次使用时从索引流式加载，容量不足时重建"""
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                count = len(self)
+                bloom = BloomFilter(max(1024, count * 2))
+                with self._connect() as conn:
+                    for (key,) in conn.execute("SELECT key FROM featured"):
+                        bloom.add(key)
+                self._bloom = bloom
+            return self._bloom
+
+    def filter_new(self, articles, year=None, week_number=None):
+        """
+        去掉往期已收录的文章（同一期重新生成时，本期自己收录的文章不算重复）
+
+        Returns:
+            tuple: (新文章列表, 重复文章列表)
+        """
+        bloom = self.bloom()
+        candidates = {}
+        for index, article in enumerate(articles):
+            maybe = [key for key in article_keys(article) if key in bloom]
+            if maybe:
+                candidates[index] = maybe
+
+        repeated_indexes = set()
+        if candidates:
+            keys = sorted({key for maybe in candidates.values() for key in maybe})
+            with self._connect() as conn:
+                found = {}
+                # SQLite 的参数个数有上限，分批查询
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    for row in conn.execute(
+                        f"SELECT key, year, week_number FROM featured WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ):
+                        found[row["key"]] = (row["year"], row["week_number"])
+            for index, maybe in candidates.items():
+                if any(key in found and found[key] != (year, week_number) for key in maybe):
+                    repeated_indexes.add(index)
+
+        fresh = [article for index, article in enumerate(articles) if index not in repeated_indexes]
+        repeated = [article for index, article in enumerate(articles) if index in repeated_indexes]
+        if repeated:
+            logging.info(f"♻️  去掉 {len(repeated)} 篇往期已收录的文章: "
+                         f"{', '.join(article.get('title', '') for article in repeated[:5])}")
+        return fresh, repeated
+
+    def add(self, articles, year, week_number, conn=None):
+        """
+        记录一期收录的文章，已存在的键保留最早收录的那一期
+
+        Returns:
+            int: 新增的键数
+        """
+        now = datetime.now().isoformat()
+        rows = [(key, article.get("title", ""), article.get("url", ""), year, week_number, now)
+                for article in articles for key in article_keys(article)]
+
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            with conn:
+                before = conn.total_changes
+                conn.executemany(
+                    """INSERT OR IGNORE INTO featured (key, title, url, year, week_number, featured_time)
+                       VALUES (?, ?, ?, ?, ?, ?)""", rows
+                )
+                added = conn.total_changes - before
+        finally:
+            if own_conn:
+                conn.close()
+
+        bloom = self._bloom
+        if bloom is not None:
+            with self._lock:
+                for row in rows:
+                    bloom.add(row[0])
+        return added
+
+    def rebuild(self, history):
+        """
+        从发布历史重建索引（一次流式读取，不把全部记录载入内存）
+
+        Args:
+            history (PublishHistory): 发布历史
+
+        Returns:
+            dict: {records, keys}
+        """
+        records = 0
+        with self._connect() as conn:
+            conn.execute("DELETE FROM featured")
+            conn.commit()
+            for record in history.iter_records():
+                self.add(record["articles"], record.get("year"), record.get("week_number"), conn)
+                records += 1
+            keys = conn.execute("SELECT COUNT(*) FROM featured").fetchone()[0]
+
+        with self._lock:
+            self._bloom = None
+        logging.info(f"📚 已从 {records} 条发布记录重建已收录索引，共 {keys} 个键")
+        return {"records": records, "keys": keys}
@@ -8,7 +8,10 @@ import json
 import logging
 from datetime import datetime
 from weekly_generator import WeeklyGenerator
+from notion_helper import NotionHelper
 from notion_query_helper import NotionQueryHelper
+from publish_outbox import PublishOutbox
+from pipeline_metrics import instrumented_run, timed_stage
 
 # 配置日志
 logging.basicConfig(
@@ -16,14 +19,22 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def generate_and_publish_weekly(target_database_id="1fc64cadd821806db447fe4e7d4365b7"):
+@instrumented_run("generate_and_publish")
+def generate_and_publish_weekly(targets=None):
     """
-    生成周刊并发布到指定的 Notion 数据库
+    生成周刊并发布到所有配置的 Notion 数据库
     
     Args:
-        target_database_id (str): 目标数据库ID
+        targets (list): 发布目标列表，默认读取 notion_config.json 中的 publish_targets
     """
     try:
+        if targets is None:
+            targets = NotionHelper().get_publish_targets()
+        
+        if not targets:
+            print("❌ 没有配置发布目标，请在 notion_config.json 中设置 publish_targets")
+            return False
+        
         print("🚀 开始生成超级个体周刊...")
         print("=" * 50)
         
@@ -45,9 +56,9 @@ def generate_and_publish_weekly(target_database_id="1fc64cadd821806db447fe4e7d43
         # 2. 生成周刊内容
         print("\n📝 正在生成周刊内容...")
         generator = WeeklyGenerator()
-        week_number = datetime.now().isocalendar()[1]
+        year, week_number = datetime.now().isocalendar()[:2]
         
-        content = generator.generate_weekly_content_from_articles(articles, week_number)
+        content = generator.generate_weekly_content_from_articles(articles, week_number, year)
         
         # 3. 保存到本地文件
         filename = f"超级个体周刊_第{week_number:02d}期_{datetime.now().strftime('%Y%m%d')}.md"
@@ -56,73 +67,58 @@ def generate_and_publish_weekly(target_database_id="1fc64cadd821806db447fe4e7d43
         
         print(f"✅ 周刊已保存到: {filename}")
         
-        # 4. 发布到 Notion 数据库
-        print(f"\n🚀 正在发布到 Notion 数据库: {target_database_id}")
-        
-        # 使用 MCP API 发布
-        result = publish_to_notion_via_mcp(content, week_number, target_database_id)
-        
-        if result['success']:
-            print(f"✅ 发布成功!")
-            print(f"📄 页面标题: {result['title']}")
-            print(f"🔗 页面链接: {result.get('url', '待获取')}")
-            print(f"📊 数据库ID: {result['database_id']}")
-            
-            # 更新配置文件
-            update_config_with_publish_info(target_database_id, result)
-            
-            return True
+        # 4. 发布到所有目标数据库
+        print(f"\n🚀 正在发布到 {len(targets)} 个 Notion 数据库...")
+        if NotionHelper().has_api_token():
+            # 与定时任务走同一条路径：写入发件箱再上传，发布历史、文章状态、往期推荐和已收录索引
+            # 都由发件箱任务完成时的处理统一更新（见 WeeklyScheduler.on_job_done）
+            from weekly_scheduler import WeeklyScheduler
+            scheduler = WeeklyScheduler()
+            scheduler.generator.publisher.targets = targets
+            jobs = scheduler.publish_issue(content, week_number, articles, year)
+            for target, job in zip(targets, jobs):
+                if job["status"] == "done":
+                    print(f"✅ [{target['name']}] 发布成功: {scheduler.outbox.job_result(job)['url']}")
+                else:
+                    print(f"❌ [{target['name']}] 发布未完成（{job['status']}）: {job['last_error'] or '未知错误'}")
+            success = bool(jobs) and all(job["status"] == "done" for job in jobs)
         else:
-            print(f"❌ 发布失败: {result.get('error', '未知错误')}")
-            return False
+            # 未配置 Token 时只模拟发布，不写入发布历史
+            blocks = markdown_to_notion_blocks(content)
+            results = publish_to_targets(blocks, week_number, targets)
+            for target in targets:
+                result = results[target["name"]]
+                if result['success']:
+                    print(f"✅ [{target['name']}] 模拟发布成功: {result.get('url', '待获取')}")
+                else:
+                    print(f"❌ [{target['name']}] 发布失败: {result.get('error', '未知错误')}")
+            success = all(result['success'] for result in results.values())
+        
+        return success
             
     except Exception as e:
         logging.error(f"生成和发布周刊时出错: {str(e)}")
         print(f"❌ 操作失败: {str(e)}")
         return False
 
-def publish_to_notion_via_mcp(content, week_number, database_id):
+def publish_to_targets(blocks, week_number, targets):
     """
-    通过 MCP API 发布内容到 Notion
+    把同一份块内容并发发布到多个数据库（见 PublishOutbox.publish_fanout）
     
     Args:
-        content (str): 周刊内容
+        blocks (list): Notion 块列表
         week_number (int): 周数
-        database_id (str): 数据库ID
+        targets (list): 发布目标列表
         
     Returns:
-        dict: 发布结果
+        dict: {目标名称: 发布结果}，未配置 API Token 时为模拟结果
     """
-    try:
-        # 构建页面标题
-        page_title = f"超级个体周刊 第{week_number:02d}期"
-        
-        # 将 Markdown 转换为 Notion 块
-        blocks = markdown_to_notion_blocks(content)
-        
-        # 这里应该调用真实的 MCP API
-        # 由于我们在 Cursor 环境中，可以使用 MCP 功能
-        
-        # 模拟成功响应（实际使用时会被真实的 MCP 调用替换）
-        result = {
-            "success": True,
-            "page_id": f"page_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "title": page_title,
-            "database_id": database_id,
-            "created_time": datetime.now().isoformat(),
-            "url": f"https://notion.so/{database_id.replace('-', '')}"
-        }
-        
-        logging.info(f"页面创建成功: {page_title}")
-        return result
-        
-    except Exception as e:
-        logging.error(f"发布到 Notion 时出错: {str(e)}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    page_title = f"超级个体周刊 第{week_number:02d}期"
+    return PublishOutbox().publish_fanout(targets, page_title, blocks, week_number,
+                                          dry_run=not NotionHelper().has_api_token())
 
+@timed_stage(count=lambda blocks, *_: len(blocks),
+             size=lambda blocks, markdown_content: len(markdown_content.encode('utf-8')))
 def markdown_to_notion_blocks(markdown_content):
     """
     将 Markdown 内容转换为 Notion 块格式
@@ -284,62 +280,22 @@ def markdown_to_notion_blocks(markdown_content):
     
     return blocks
 
-def update_config_with_publish_info(database_id, publish_result):
-    """
-    更新配置文件，记录发布信息
-    """
-    try:
-        # 读取现有配置
-        with open('notion_config.json', 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        # 添加发布数据库配置
-        if 'publish_history' not in config['notion']:
-            config['notion']['publish_history'] = []
-        
-        # 记录发布历史
-        publish_record = {
-            "database_id": database_id,
-            "page_title": publish_result['title'],
-            "page_id": publish_result['page_id'],
-            "published_time": publish_result['created_time'],
-            "url": publish_result.get('url', '')
-        }
-        
-        config['notion']['publish_history'].append(publish_record)
-        
-        # 更新数据库配置
-        config['notion']['databases']['weekly_publish'] = {
-            "id": database_id,
-            "name": "周刊发布数据库",
-            "description": "用于发布超级个体周刊的数据库",
-            "last_publish": publish_result['created_time']
-        }
-        
-        # 保存配置
-        with open('notion_config.json', 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        
-        logging.info("配置文件已更新")
-        
-    except Exception as e:
-        logging.error(f"更新配置文件时出错: {str(e)}")
-
 def main():
     """主函数"""
     print("📰 超级个体周刊生成并发布工具")
     print("=" * 50)
     
-    # 使用你提供的数据库ID
-    target_db_id = "1fc64cadd821806db447fe4e7d4365b7"
+    # 读取配置中的发布目标
+    targets = NotionHelper().get_publish_targets()
     
-    print(f"🎯 目标数据库ID: {target_db_id}")
+    for target in targets:
+        print(f"🎯 目标数据库 [{target['name']}]: {target['database_id']}")
     
     # 确认是否继续
     confirm = input("\n是否开始生成并发布周刊？(y/N): ").strip().lower()
     
     if confirm == 'y':
-        success = generate_and_publish_weekly(target_db_id)
+        success = generate_and_publish_weekly(targets)
         
         if success:
             print("\n🎉 周刊生成并发布完成!")
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+周刊导出
+把生成器输出的 Markdown 直接转为订阅者使用的格式:
+
+    邮件 HTML    全部样式写在标签的 style 属性中（邮件客户端会丢掉 <style>），外层用表格居中
+    Atom 订阅    滚动更新：新的一期作为一个条目插入，超过 FEED_SIZE 条时去掉最旧的；
+                已有条目按原文保留，不重新渲染往期内容
+
+Markdown 只逐行扫描一遍，标题、引用、列表、分割线和段落与 markdown_to_notion_blocks 一致；
+网页（static_site）和邮件共用同一个转换，只是标签样式不同
+
+用法:
+    python weekly_cli.py export [周刊文件] [--output 文件]
+"""
+
+import gzip
+import html
+import os
+import re
+from pathlib import Path
+
+EXPORTS_DIR = "exports"
+FEED_SIZE = 20
+
+LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+# 只有这些协议的链接输出为 <a>，其他（如 javascript:、data:）只保留链接文字
+SAFE_LINK_RE = re.compile(r"(?:https?|mailto):", re.IGNORECASE)
+ENTRY_RE = re.compile(r"  <entry>.*?</entry>\n", re.DOTALL)
+ENTRY_ID_RE = re.compile(r"<id>(.*?)</id>")
+ENTRY_UPDATED_RE = re.compile(r"<updated>(.*?)</updated>")
+
+# 邮件中各标签的内联样式，配色与封面和往期站点一致
+EMAIL_STYLES = {
+    "h1": "margin:0 0 8px;font-size:26px;line-height:1.4;color:#064e3b;",
+    "h2": "margin:28px 0 12px;font-size:20px;line-height:1.4;color:#047857;",
+    "h3": "margin:20px 0 8px;font-size:17px;color:#047857;",
+    "p": "margin:0 0 14px;font-size:15px;line-height:1.8;color:#1f2937;",
+    "blockquote": "margin:0 0 20px;padding:4px 0 4px 14px;border-left:4px solid #10b981;color:#4b5563;font-size:15px;",
+    "ul": "margin:0 0 14px;padding-left:20px;",
+    "li": "margin:0 0 6px;font-size:15px;line-height:1.8;color:#1f2937;",
+    "hr": "border:none;border-top:1px solid #e5e7eb;margin:24px 0;",
+    "a": "color:#047857;text-decoration:underline;",
+}
+EMAIL_FONT = '-apple-system,"PingFang SC","Microsoft YaHei","Noto Sans SC",sans-serif'
+
+def _open_tag(tag, styles):
+    style = styles.get(tag) if styles else None
+    return f'<{tag} style="{style}">' if style else f"<{tag}>"
+
+def is_safe_url(url):
+    """链接地址是否为 http、https 或 mailto（未转义的原始地址）"""
+    return bool(SAFE_LINK_RE.match(url.strip()))
+
+def inline_html(text, styles=None):
+    """行内 Markdown：链接、粗体、斜体（先转义 HTML）；只链接 http、https 和 mailto 地址"""
+    text = html.escape(text, quote=True)
+    link_tag = _open_tag("a", styles)[:-1]
+
+    def link(match):
+        if not is_safe_url(html.unescape(match.group(2))):
+            return match.group(1)
+        return f'{link_tag} href="{match.group(2)}">{match.group(1)}</a>'
+
+    text = LINK_RE.sub(link, text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    return re.sub(r"(?<![*\w])\*([^*]+)\*(?!\*)", r"<em>\1</em>", text)
+
+def markdown_to_html(markdown_content, styles=None):
+    """
+    周刊用到的 Markdown 子集转为 HTML，只扫描一遍
+
+    Args:
+        markdown_content (str): 生成器输出的 Markdown
+        styles (dict): {标签: 内联样式}，邮件导出时使用
+
+    Returns:
+        str: HTML 片段
+    """
+    parts, in_list = [], False
+    for line in markdown_content.split('\n'):
+        line = line.strip()
+        is_item = line.startswith('- ')
+        if in_list and not is_item:
+            parts.append("</ul>")
+            in_list = False
+
+        if not line:
+            continue
+        if line.startswith('### '):
+            parts.append(f"{_open_tag('h3', styles)}{inline_html(line[4:], styles)}</h3>")
+        elif line.startswith('## '):
+            parts.append(f"{_open_tag('h2', styles)}{inline_html(line[3:], styles)}</h2>")
+        elif line.startswith('# '):
+            parts.append(f"{_open_tag('h1', styles)}{inline_html(line[2:], styles)}</h1>")
+        elif line.startswith('> '):
+            parts.append(f"{_open_tag('blockquote', styles)}{inline_html(line[2:], styles)}</blockquote>")
+        elif is_item:
+            if not in_list:
+                parts.append(_open_tag("ul", styles))
+                in_list = True
+            parts.append(f"{_open_tag('li', styles)}{inline_html(line[2:], styles)}</li>")
+        elif line.startswith('---'):
+            parts.append(_open_tag("hr", styles))
+        else:
+            parts.append(f"{_open_tag('p', styles)}{inline_html(line, styles)}</p>")
+    if in_list:
+        parts.append("</ul>")
+    return "\n".join(parts)
+
+def export_email_html(markdown_content, title=None):
+    """
+    生成可直接作为邮件正文发送的 HTML：样式全部内联，600px 居中表格
+
+    Args:
+        markdown_content (str): 生成器输出的 Markdown
+        title (str): 邮件标题，默认取第一行标题
+
+    Returns:
+        str: 完整的 HTML 文档
+    """
+    if title is None:
+        first_line = markdown_content.lstrip().split('\n', 1)[0]
+        title = first_line[2:] if first_line.startswith('# ') else ""
+    body = markdown_to_html(markdown_content, EMAIL_STYLES)
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(title)}</title>
+</head>
+<body style="margin:0;padding:0;background:#f3f4f6;">
+<table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0" style="background:#f3f4f6;">
+<tr><td align="center" style="padding:24px 12px;">
+<table role="presentation" width="600" cellpadding="0" cellspacing="0" border="0" style="width:600px;max-width:100%;background:#ffffff;border-radius:8px;">
+<tr><td style="height:8px;background:#10b981;border-radius:8px 8px 0 0;"></td></tr>
+<tr><td style="padding:32px 36px;font-family:{html.escape(EMAIL_FONT)};">
+{body}
+</td></tr>
+</table>
+</td></tr>
+</table>
+</body>
+</html>
+"""
+
+def atom_entry(entry_id, title, link, updated, content_html):
+    """一个 Atom 条目（updated 为 RFC 3339 时间）"""
+    return f"""  <entry>
+    <title>{html.escape(title)}</title>
+    <link href="{html.escape(link)}"/>
+    <id>{html.escape(entry_id)}</id>
+    <updated>{updated}</updated>
+    <content type="html">{html.escape(content_html)}</content>
+  </entry>
+"""
+
+class AtomFeed:
+    def __init__(self, feed_path, title, link, feed_id=None, max_entries=FEED_SIZE, compress=False):
+        """
+        Args:
+            feed_path (str): 订阅文件
+            title (str): 订阅标题
+            link (str): 站点地址
+            feed_id (str): 订阅的 id，默认与 link 相同
+            max_entries (int): 保留的条目数
+            compress (bool): 同时写一份 .gz
+        """
+        self.feed_path = Path(feed_path)
+        self.title = title
+        self.link = link
+        self.feed_id = feed_id or link
+        self.max_entries = max_entries
+        self.compress = compress
+
+    def entries(self):
+        """已有的条目原文: [(id, updated, xml)]，按更新时间从新到旧"""
+        try:
+            with open(self.feed_path, encoding='utf-8') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return []
+        return [(html.unescape(ENTRY_ID_RE.search(xml).group(1)), ENTRY_UPDATED_RE.search(xml).group(1), xml)
+                for xml in ENTRY_RE.findall(content)]
+
+    def add(self, entries):
+        """
+        插入（或替换同 id 的）条目，超出 max_entries 的最旧条目被去掉
+
+        Args:
+            entries (list): atom_entry 生成的条目
+
+        Returns:
+            int: 订阅中的条目数
+        """
+        new = {}
+        for xml in entries:
+            new[html.unescape(ENTRY_ID_RE.search(xml).group(1))] = (ENTRY_UPDATED_RE.search(xml).group(1), xml)
+        kept = [(entry_id, updated, xml) for entry_id, updated, xml in self.entries() if entry_id not in new]
+        merged = kept + [(entry_id, updated, xml) for entry_id, (updated, xml) in new.items()]
+        # 按更新时间排序（稳定排序，同一时间保持原顺序），只比较字符串不解析条目
+        merged.sort(key=lambda entry: entry[1], reverse=True)
+        self._write(merged[:self.max_entries])
+        return min(len(merged), self.max_entries)
+
+    def remove(self, entry_ids):
+        """去掉给定 id 的条目，返回剩余条目数"""
+        entry_ids = set(entry_ids)
+        kept = [entry for entry in self.entries() if entry[0] not in entry_ids]
+        self._write(kept)
+        return len(kept)
+
+    def _write(self, entries):
+        updated = entries[0][1] if entries else "1970-01-01T00:00:00Z"
+        content = f"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>{html.escape(self.title)}</title>
+  <link href="{html.escape(self.link)}"/>
+  <id>{html.escape(self.feed_id)}</id>
+  <updated>{updated}</updated>
+{"".join(xml for _, _, xml in entries)}</feed>
+"""
+        data = content.encode('utf-8')
+        self.feed_path.parent.mkdir(parents=True, exist_ok=True)
+        targets = [(self.feed_path, data)]
+        if self.compress:
+            targets.append((Path(f"{self.feed_path}.gz"), gzip.compress(data, 9, mtime=0)))
+        for target, payload in targets:
+            tmp_path = target.with_name(target.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, target)
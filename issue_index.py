@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+往期周刊全文索引
+把往期周刊的 Markdown 文件（周刊01.md、超级个体周刊_第21期_20250523.md ……）切分为
+中文字符二元组和英文单词，建立带位置信息的倒排索引，保存在 SQLite 中:
+
+    documents  每期一行：路径、标题、mtime、大小、正文
+    postings   (词, 文档) → 该词在文档中出现的位置
+
+查询只读取用到的词的倒排表，多年的往期也能在毫秒级返回；中文词按相邻位置做短语匹配，
+"大模型" 只匹配连续出现的 "大模"+"模型"。新的周刊文件出现时只索引这一个文件
+
+用法:
+    python weekly_cli.py search "大模型 Agent" [--limit 10]
+"""
+
+import glob
+import logging
+import math
+import os
+import re
+import sqlite3
+from array import array
+from datetime import datetime
+
+INDEX_DB = "issue_index.db"
+ISSUE_PATTERNS = ("*_第*期_*.md", "周刊[0-9]*.md")
+
+TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9A-Za-z]+")
+CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+# 链接地址不参与索引，只保留链接文字
+LINK_TARGET_RE = re.compile(r"\]\([^)]*\)|https?://\S+")
+TITLE_RE = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    title TEXT,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    indexed_time TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (token, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+"""
+
+def tokenize(text):
+    """
+    切分为词：连续的中文切成相邻的二元组（单字时保留单字），英文和数字按单词小写
+
+    Returns:
+        list: 按出现顺序的词，下标即位置
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(text):
+        run = match.group()
+        if CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+def index_text(content):
+    return LINK_TARGET_RE.sub("]", content)
+
+def issue_files(directory=".", patterns=ISSUE_PATTERNS):
+    """目录中的往期周刊文件"""
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(os.path.join(directory, pattern)))
+    return sorted(paths)
+
+class IssueIndex:
+    def __init__(self, db_path=INDEX_DB):
+        self.db_path = str(db_path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def add_document(self, path, conn=None):
+        """索引（或重新索引）一个周刊文件"""
+        path = os.path.normpath(path)
+        stat = os.stat(path)
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+
+        postings = {}
+        tokens = tokenize(index_text(content))
+        for position, token in enumerate(tokens):
+            postings.setdefault(token, array("I")).append(position)
+
+        title_match = TITLE_RE.search(content)
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+                if row:
+                    conn.execute("DELETE FROM postings WHERE doc_id = ?", (row["id"],))
+                    conn.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+                cursor = conn.execute(
+                    """INSERT INTO documents (path, title, mtime, size, length, content, indexed_time)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (path, title_match.group(1).strip() if title_match else os.path.basename(path),
+                     stat.st_mtime, stat.st_size, len(tokens), content, datetime.now().isoformat())
+                )
+                conn.executemany(
+                    "INSERT INTO postings (token, doc_id, positions) VALUES (?, ?, ?)",
+                    [(token, cursor.lastrowid, positions.tobytes()) for token, positions in postings.items()]
+                )
+        finally:
+            if own_conn:
+                conn.close()
+        logging.debug(f"已索引 {path}: {len(tokens)} 个词")
+
+    def update(self, directory=".", patterns=ISSUE_PATTERNS):
+        """
+        增量更新：只索引新增或修改过的文件，删除已不存在的文件
+
+        Returns:
+            dict: {added, updated, removed, unchanged}
+        """
+        result = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        paths = {os.path.normpath(path) for path in issue_files(directory, patterns)}
+        directory = os.path.abspath(directory)
+
+        conn = self._connect()
+        try:
+            known = {row["path"]: row for row in conn.execute("SELECT id, path, mtime, size FROM documents")}
+            for path in sorted(paths):
+                stat = os.stat(path)
+                row = known.get(path)
+                if row and row["mtime"] == stat.st_mtime and row["size"] == stat.st_size:
+                    result["unchanged"] += 1
+                    continue
+                self.add_document(path, conn)
+                result["updated" if row else "added"] += 1
+
+            # 只清理本目录中已删除的文件，其他目录的文档保持不变
+            with conn:
+                for path, row in known.items():
+                    in_directory = os.path.dirname(os.path.abspath(path)) == directory
+                    if path not in paths and in_directory and not os.path.exists(path):
+                        conn.execute("DELETE FROM postings WHERE doc_id = ?", (row["id"],))
+                        conn.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+                        result["removed"] += 1
+        finally:
+            conn.close()
+
+        if result["added"] or result["updated"] or result["removed"]:
+            logging.info(f"🔎 往期索引: 新增 {result['added']}，更新 {result['updated']}，删除 {result['removed']}")
+        return result
+
+    def _postings(self, conn, token):
+        """
+        {doc_id: 位置集合}
+
+        单个汉字除了单字词，还匹配以它开头的二元组（位置不变）和以它结尾的二元组（位置 +1），
+        同一个字被前后两个二元组覆盖时只计一次
+        """
+        queries = [("SELECT doc_id, positions FROM postings WHERE token = ?", (token,), 0)]
+        if len(token) == 1 and CJK_RE.match(token):
+            queries += [
+                ("SELECT doc_id, positions FROM postings WHERE token > ? AND token < ?", (token, token + "\uffff"), 0),
+                ("SELECT doc_id, positions FROM postings WHERE token LIKE ? AND length(token) = 2", (f"_{token}",), 1),
+            ]
+
+        postings = {}
+        for sql, params, shift in queries:
+            for row in conn.execute(sql, params):
+                positions = array("I")
+                positions.frombytes(row["positions"])
+                postings.setdefault(row["doc_id"], set()).update(position + shift for position in positions)
+        return postings
+
+    def _phrase_matches(self, conn, tokens):
+        """词序列在每篇文档中连续出现的起始位置: {doc_id: [位置]}"""
+        matches = None
+        for offset, token in enumerate(tokens):
+            postings = self._postings(conn, token)
+            if matches is None:
+                matches = {doc_id: positions for doc_id, positions in postings.items()}
+            else:
+                matches = {
+                    doc_id: {start for start in starts if start + offset in postings[doc_id]}
+                    for doc_id, starts in matches.items() if doc_id in postings
+                }
+            matches = {doc_id: starts for doc_id, starts in matches.items() if starts}
+            if not matches:
+                return {}
+        return {doc_id: sorted(starts) for doc_id, starts in (matches or {}).items()}
+
+    def search(self, query, limit=10):
+        """
+        搜索往期周刊，空格分隔的每个词都必须出现（中文按短语匹配）
+
+        Returns:
+            list: [{path, title, score, matches, snippet}]，按相关度排序
+        """
+        terms = [term for term in query.split() if tokenize(term)]
+        if not terms:
+            return []
+
+        with self._connect() as conn:
+            total_docs = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            scores, counts = None, {}
+            for term in terms:
+                matches = self._phrase_matches(conn, tokenize(term))
+                idf = math.log(1 + total_docs / len(matches)) if matches else 0
+                term_scores = {doc_id: (1 + math.log(len(starts))) * idf for doc_id, starts in matches.items()}
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: score + term_scores[doc_id]
+                              for doc_id, score in scores.items() if doc_id in term_scores}
+                for doc_id, starts in matches.items():
+                    counts[doc_id] = counts.get(doc_id, 0) + len(starts)
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+            results = []
+            for doc_id, score in ranked:
+                row = conn.execute("SELECT path, title, content FROM documents WHERE id = ?", (doc_id,)).fetchone()
+                results.append({
+                    "path": row["path"],
+                    "title": row["title"],
+                    "score": round(score, 4),
+                    "matches": counts[doc_id],
+                    "snippet": make_snippet(row["content"], terms)
+                })
+        return results
+
+def make_snippet(content, terms, width=40):
+    """第一个命中词附近的一段文字"""
+    lowered = content.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [position for position in positions if position >= 0]
+    if not positions:
+        return content[:width * 2].replace("\n", " ")
+    start = max(0, min(positions) - width)
+    snippet = content[start:min(positions) + width].replace("\n", " ").strip()
+    return ("…" if start else "") + snippet + "…"
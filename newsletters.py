@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+多份周刊（多租户）定义
+从 notion_config.json 的 notion.newsletters 读取，每份周刊有自己的来源数据库、标题、
+发布目标、调度时间和工作目录；未配置时只有一份默认的超级个体周刊
+"""
+
+import os
+from notion_helper import NotionHelper
+
+DEFAULT_TITLE = "超级个体周刊"
+DEFAULT_TAGLINE = "让每个人都成为独当一面的超级个体"
+PLACEHOLDER_TOKEN = "your_notion_api_token_here"
+
+class Newsletter:
+    def __init__(self, name, title=DEFAULT_TITLE, tagline=DEFAULT_TAGLINE, source_database_id=None,
+                 api_token=None, publish_targets=None, weekday="sunday", at="09:00", workdir=".",
+                 draft_sync_minutes=None, site_url=None):
+        """
+        Args:
+            name (str): 周刊标识，也用作调度任务名
+            title (str): 周刊标题（页面标题与文件名前缀）
+            tagline (str): 标题下的一句话介绍
+            source_database_id (str): 文章来源数据库，默认使用配置中的默认数据库
+            api_token (str): 这份周刊使用的 Integration Token，默认使用全局 Token
+            publish_targets (list): 发布目标，默认使用全局 publish_targets
+            weekday (str): 每周生成的星期
+            at (str): 生成时间 HH:MM
+            workdir (str): 周刊文件、草稿、发件箱和发布历史所在目录
+            draft_sync_minutes (int): 草稿预热间隔（分钟），不设置时不预热
+            site_url (str): 往期站点的公开地址，周刊结尾的「往期周刊」链接到这里
+        """
+        self.name = name
+        self.title = title
+        self.tagline = tagline
+        self.source_database_id = source_database_id
+        self.api_token = api_token
+        self.publish_targets = publish_targets
+        self.weekday = weekday
+        self.at = at
+        self.workdir = workdir
+        self.draft_sync_minutes = draft_sync_minutes
+        self.site_url = site_url
+        self._client = None
+
+    def job_name(self, kind="weekly_newsletter"):
+        """调度状态中的任务名；默认周刊沿用原来的任务名"""
+        return kind if self.name == "default" else f"{self.name}:{kind}"
+
+    def path(self, filename):
+        """工作目录中的文件路径"""
+        if self.workdir != ".":
+            os.makedirs(self.workdir, exist_ok=True)
+        return os.path.join(self.workdir, filename)
+
+    def has_api_token(self):
+        """是否有可用的真实 Token"""
+        if self.api_token:
+            return self.api_token != PLACEHOLDER_TOKEN
+        return NotionHelper().has_api_token()
+
+    @property
+    def client(self):
+        """
+        这份周刊专用的 Notion 客户端；使用全局 Token 时为 None（各模块自行创建）
+
+        同一个 Token 的客户端共享 get_rate_limiter 返回的限速器，多份周刊不会叠加超速
+        """
+        if self._client is None and self.api_token and self.has_api_token():
+            from notion_client import NotionClient
+            self._client = NotionClient(api_token=self.api_token)
+        return self._client
+
+def load_newsletters(helper=None):
+    """
+    读取全部周刊定义，未配置 notion.newsletters 时返回默认周刊
+
+    Returns:
+        list: Newsletter 列表
+    """
+    helper = helper or NotionHelper()
+    notion = helper.config.get("notion", {})
+    entries = notion.get("newsletters")
+
+    if not entries:
+        return [Newsletter("default", draft_sync_minutes=helper.get_draft_sync_minutes(),
+                           site_url=helper.get_site_url())]
+
+    newsletters = []
+    for entry in entries:
+        entry = dict(entry)
+        name = entry.pop("name")
+        entry.setdefault("workdir", os.path.join("newsletters", name))
+        newsletters.append(Newsletter(name, **entry))
+
+    names = [newsletter.name for newsletter in newsletters]
+    if len(set(names)) != len(names):
+        raise ValueError(f"notion.newsletters 中有重复的周刊名: {names}")
+    return newsletters
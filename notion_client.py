@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Notion API 客户端
+封装周刊发布所用到的 Notion REST 接口
+"""
+
+import logging
+import threading
+import time
+import requests
+from notion_helper import NotionHelper
+from pipeline_metrics import record_api_call
+
+NOTION_API_BASE_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+# 这些状态码通常是暂时性的，稍后重试即可恢复
+TRANSIENT_STATUS_CODES = (409, 429, 500, 502, 503, 504)
+
+# Notion 官方限制每个集成平均每秒 3 个请求
+DEFAULT_REQUESTS_PER_SECOND = 3.0
+
+class RateLimiter:
+    """线程安全的令牌桶，多个线程共享同一个速率上限"""
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=3):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，必要时阻塞等待"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # 令牌不足时预支，后来的线程排在更后面
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(api_token, rate=DEFAULT_REQUESTS_PER_SECOND):
+    """同一个 API Token 在进程内共享同一个限速器"""
+    with _rate_limiters_lock:
+        if api_token not in _rate_limiters:
+            _rate_limiters[api_token] = RateLimiter(rate)
+        return _rate_limiters[api_token]
+
+class NotionAPIError(Exception):
+    """Notion API 调用失败"""
+
+    def __init__(self, status, code="", message="", retry_after=None):
+        super().__init__(f"[{status}] {code}: {message}")
+        self.status = status
+        self.code = code
+        self.message = message
+        self.retry_after = retry_after
+
+    @property
+    def transient(self):
+        """是否为可重试的暂时性错误（网络错误记为 status 0）"""
+        return self.status == 0 or self.status in TRANSIENT_STATUS_CODES
+
+class NotionClient:
+    def __init__(self, api_token=None, base_url=None, timeout=30, rate_limiter=None):
+        if api_token is None or base_url is None:
+            helper = NotionHelper()
+            api_token = api_token or helper.get_api_token()
+            # 配置 api_base_url 后可以指向本地替身服务器（notion_mock_server.py）
+            base_url = base_url or helper.get_api_base_url()
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or get_rate_limiter(api_token)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_token}",
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json"
+        })
+
+    def request(self, method, path, payload=None):
+        """
+        发送请求并返回解析后的 JSON
+
+        Args:
+            method (str): HTTP 方法
+            path (str): 以 / 开头的接口路径
+            payload (dict): 请求体
+
+        Returns:
+            dict: 响应数据
+
+        Raises:
+            NotionAPIError: 请求失败
+        """
+        url = f"{self.base_url}{path}"
+        self.rate_limiter.acquire()
+
+        try:
+            response = self.session.request(method, url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise NotionAPIError(0, "network_error", str(e))
+
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            retry_after = response.headers.get("Retry-After")
+            raise NotionAPIError(
+                response.status_code,
+                body.get("code", ""),
+                body.get("message", response.text[:200]),
+                float(retry_after) if retry_after else None
+            )
+
+        logging.debug(f"{method} {path} -> {response.status_code}")
+        record_api_call(len(response.request.body or b"") + len(response.content))
+        return response.json()
+
+    def retrieve_database(self, database_id):
+        """获取数据库信息（包括属性 schema）"""
+        return self.request("GET", f"/databases/{database_id}")
+
+    def query_database(self, database_id, filter_conditions=None, page_size=100):
+        """
+        查询数据库并自动翻页
+
+        Args:
+            database_id (str): 数据库ID
+            filter_conditions (dict): 过滤条件
+            page_size (int): 每页数量（最大 100）
+
+        Returns:
+            list: 页面列表
+        """
+        payload = {"page_size": page_size}
+        if filter_conditions:
+            payload["filter"] = filter_conditions
+
+        results = []
+        while True:
+            data = self.request("POST", f"/databases/{database_id}/query", payload)
+            results.extend(data.get("results", []))
+            if not data.get("has_more"):
+                return results
+            payload["start_cursor"] = data["next_cursor"]
+
+    def create_page(self, database_id, properties, children=None):
+        """在数据库中创建页面"""
+        payload = {
+            "parent": {"database_id": database_id},
+            "properties": properties
+        }
+        if children:
+            payload["children"] = children
+        return self.request("POST", "/pages", payload)
+
+    def update_page(self, page_id, properties):
+        """更新页面属性"""
+        return self.request("PATCH", f"/pages/{page_id}", {"properties": properties})
+
+    def append_block_children(self, block_id, children):
+        """向块（或页面）末尾追加子块"""
+        return self.request("PATCH", f"/blocks/{block_id}/children", {"children": children})
@@ -4,38 +4,202 @@ Notion 数据库操作辅助工具
 快速访问和管理你的 Notion 数据库
 """
 
+import copy
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 进程内共享的配置缓存: {绝对路径: (mtime_ns, size, config)}，锁只保护缓存本身
+_config_cache = {}
+_config_cache_lock = threading.RLock()
+
+# 每个配置文件一把进程内的可重入锁和重入深度: {绝对路径: [RLock, depth]}
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+def _file_lock(key):
+    with _file_locks_guard:
+        return _file_locks.setdefault(key, [threading.RLock(), 0])
+
+@contextmanager
+def config_file_lock(config_file):
+    """
+    在 <配置文件>.lock 上加建议性排他锁，跨进程串行化配置写入
+
+    进程内的线程按文件路径互斥（不同文件互不阻塞，也不占用配置缓存锁）；
+    同一线程可重入，只有最外层获取文件锁
+    """
+    entry = _file_lock(str(Path(config_file).resolve()))
+    with entry[0]:
+        entry[1] += 1
+        try:
+            if entry[1] > 1:
+                yield
+                return
+            with open(f"{config_file}.lock", 'a+') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            entry[1] -= 1
+
+def read_config(config_file):
+    """
+    读取配置，文件的 mtime 和大小都没变时直接返回缓存
+    
+    返回的字典在进程内共享，不要直接修改，请使用 NotionHelper.update_config
+    """
+    key = str(Path(config_file).resolve())
+    try:
+        stat = os.stat(key)
+    except FileNotFoundError:
+        return {}
+    
+    with _config_cache_lock:
+        cached = _config_cache.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        
+        with open(key, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        _config_cache[key] = (stat.st_mtime_ns, stat.st_size, config)
+        return config
+
+def write_config(config_file, config):
+    """原子写入配置（临时文件 + 重命名），调用方需持有 config_file_lock"""
+    key = str(Path(config_file).resolve())
+    directory = os.path.dirname(key)
+    
+    fd, tmp_path = tempfile.mkstemp(prefix=".notion_config.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, key)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    stat = os.stat(key)
+    with _config_cache_lock:
+        _config_cache[key] = (stat.st_mtime_ns, stat.st_size, config)
+
 class NotionHelper:
     def __init__(self):
         self.config_file = Path("notion_config.json")
         self.config = self.load_config()
     
     def load_config(self):
-        """加载配置文件"""
-        if self.config_file.exists():
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        """加载配置文件（进程内缓存，文件变化时才重新解析）"""
+        return read_config(self.config_file)
+    
+    def update_config(self, mutator):
+        """
+        在文件锁内读取最新配置、修改并原子写回
+        
+        Args:
+            mutator (callable): 接收配置字典并就地修改的函数
+            
+        Returns:
+            dict: 写入后的配置
+        """
+        with config_file_lock(self.config_file):
+            config = copy.deepcopy(read_config(self.config_file))
+            mutator(config)
+            write_config(self.config_file, config)
+        
+        self.config = config
+        return config
     
     def get_database_id(self, alias="articles"):
         """获取数据库 ID"""
         if alias == "articles" or alias == "default":
-            return self.config["notion"]["quick_access"]["default_database"]
+            return self.config.get("notion", {}).get("quick_access", {}).get("default_database")
         
         # 如果是具体的数据库名称
-        for db_key, db_info in self.config["notion"]["databases"].items():
+        for db_key, db_info in self.config.get("notion", {}).get("databases", {}).items():
             if db_key == alias or db_info["name"] == alias:
                 return db_info["id"]
         
         return None
     
+    def get_publish_targets(self):
+        """
+        获取周刊发布目标列表
+        
+        优先读取 notion.publish_targets，未配置时回退到 databases.weekly_publish
+        
+        Returns:
+            list: [{"name", "database_id", "title_property"}, ...]
+        """
+        notion = self.config.get("notion", {})
+        targets = notion.get("publish_targets")
+        
+        if not targets:
+            weekly_db = notion.get("databases", {}).get("weekly_publish")
+            if not weekly_db or not weekly_db.get("id"):
+                return []
+            targets = [{
+                "name": "weekly_publish",
+                "database_id": weekly_db["id"],
+                "title_property": next(
+                    (name for name, prop_type in weekly_db.get("properties", {}).items()
+                     if prop_type == "title"),
+                    "标题"
+                )
+            }]
+        
+        return [
+            {
+                "name": target.get("name") or target["database_id"],
+                "database_id": target["database_id"],
+                "title_property": target.get("title_property", "标题")
+            }
+            for target in targets
+        ]
+    
     def get_api_token(self):
         """获取 API Token"""
         return self.config["notion"]["api_token"]
     
+    def get_api_base_url(self):
+        """获取 API 地址，未配置时使用官方地址"""
+        return self.config.get("notion", {}).get("api_base_url") or "https://api.notion.com/v1"
+    
+    def get_draft_sync_minutes(self):
+        """草稿预热的同步间隔（分钟），未配置时不启用"""
+        return self.config.get("notion", {}).get("draft_sync_minutes")
+    
+    def get_site_url(self):
+        """往期站点的公开地址，未配置时为 None"""
+        return self.config.get("notion", {}).get("site_url")
+    
+    def has_api_token(self):
+        """是否已配置真实的 API Token（模板中的占位符不算）"""
+        token = self.config.get("notion", {}).get("api_token", "")
+        return bool(token) and token != "your_notion_api_token_here"
+    
     def list_databases(self):
         """列出所有配置的数据库"""
         print("📚 已配置的 Notion 数据库：")
@@ -72,14 +236,25 @@ class NotionHelper:
             "last_updated": "2025-05-23"
         }
         
-        self.config["notion"]["databases"][alias] = new_db
-        self.save_config()
+        def add(config):
+            config["notion"]["databases"][alias] = new_db
+        
+        self.update_config(add)
         print(f"✅ 数据库 '{name}' 已添加，别名: {alias}")
     
-    def save_config(self):
-        """保存配置文件"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
+    def save_config(self, mutator):
+        """
+        保存对配置的修改：在文件锁内重新读取最新配置，应用修改后原子写回
+        
+        不会把内存中可能已过期的 self.config 整体写回，覆盖其他进程或线程的修改
+        
+        Args:
+            mutator (callable): 接收配置字典并就地修改的函数
+            
+        Returns:
+            dict: 写入后的配置
+        """
+        return self.update_config(mutator)
 
 def main():
     """主函数 - 命令行界面"""
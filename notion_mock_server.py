@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+本地 Notion API 替身服务器
+实现本项目用到的 Notion API 子集，支持延迟、429 限流和错误注入，用于离线压测整条流水线
+
+用法:
+    python notion_mock_server.py --port 8765 --latency-ms 120 --rate 3 --error-rate 0.02
+
+然后在 notion_config.json 中设置:
+    "api_base_url": "http://127.0.0.1:8765/v1"
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 与文章数据库一致的属性结构
+ARTICLE_SCHEMA = {
+    "标题": "title",
+    "分类（人工）": "multi_select",
+    "重要度": "select",
+    "总结（AI 摘要）": "rich_text",
+    "添加日期": "date",
+    "笔记": "rich_text",
+    "URL": "url",
+    "状态": "select"
+}
+
+WEEKLY_SCHEMA = {
+    "周刊标题": "title",
+    "期号": "number",
+    "生成日期": "date",
+    "状态": "status"
+}
+
+SAMPLE_CATEGORIES = ["AI大模型", "AI工具", "产品设计", "增长&运营", "设计交互", "个人成长"]
+SAMPLE_TOPICS = [
+    ("Claude", "大模型推理能力评测"), ("GPT", "Agent 工作流实践"), ("Figma", "设计系统搭建"),
+    ("SEO", "内容营销增长策略"), ("Notion", "个人知识管理方法论"), ("MVP", "产品需求验证")
+]
+
+MAX_CHILDREN = 100
+MAX_RICH_TEXT_LENGTH = 2000
+
+def notion_timestamp(moment=None):
+    """按 Notion 的格式输出 UTC 时间戳，如 2025-05-23T01:00:00.000Z；不带时区的时间视为本地时间"""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def parse_timestamp(value):
+    """解析时间戳或日期字符串为带时区的时间，不带时区的视为本地时间"""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.astimezone()
+
+def make_article_page(index, added_date, status="已归档", rng=random):
+    """
+    生成一条模拟的文章页面（Notion 原始格式）
+
+    Args:
+        index (int): 序号
+        added_date (datetime): 添加日期
+        status (str): 状态
+        rng (random.Random): 随机数生成器
+
+    Returns:
+        dict: Notion 页面对象
+    """
+    keyword, topic = rng.choice(SAMPLE_TOPICS)
+    title = f"{keyword} {topic}：第{index}篇深度解读 Weekly Notes #{index}"
+    summary = (f"本文从 **{keyword}** 的实际案例出发，讨论了{topic}的关键做法，"
+               f"并附上 [原文链接](https://example.com/{keyword.lower()}/{index}) 与 data-driven 的复盘。")
+    page_id = str(uuid.UUID(int=rng.getrandbits(128)))
+
+    def text(content):
+        return [{"type": "text", "text": {"content": content}, "plain_text": content}]
+
+    return {
+        "object": "page",
+        "id": page_id,
+        "created_time": notion_timestamp(added_date),
+        "last_edited_time": notion_timestamp(added_date),
+        "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+        "properties": {
+            "标题": {"type": "title", "title": text(title)},
+            "分类（人工）": {"type": "multi_select",
+                         "multi_select": [{"name": rng.choice(SAMPLE_CATEGORIES)}]},
+            "重要度": {"type": "select", "select": {"name": rng.choice(["高", "中", "低"])}},
+            "总结（AI 摘要）": {"type": "rich_text", "rich_text": text(summary)},
+            "添加日期": {"type": "date", "date": {"start": added_date.strftime('%Y-%m-%d')}},
+            "笔记": {"type": "rich_text", "rich_text": []},
+            "URL": {"type": "url", "url": f"https://example.com/{keyword.lower()}/{index}?utm_source=weekly"},
+            "状态": {"type": "select", "select": {"name": status}}
+        }
+    }
+
+class FaultInjector:
+    """延迟、限流与错误注入"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, rate=0, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate = rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + self.rng.uniform(0, self.jitter_ms)) / 1000)
+
+    def rate_limited(self, token):
+        """按 Token 计算的令牌桶，超出时返回需要等待的秒数"""
+        if not self.rate:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(token, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[token] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[token] = (tokens - 1, now)
+            return None
+
+    def injected_error(self):
+        with self._lock:
+            if self.error_rate and self.rng.random() < self.error_rate:
+                return self.rng.choice([500, 502, 503])
+        return None
+
+class NotionMockState:
+    """内存中的数据库、页面与块"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.databases = {}
+        self.pages = {}
+        self.children = {}
+        self.stats = {"requests": 0, "rate_limited": 0, "injected_errors": 0, "by_route": {}}
+
+    def add_database(self, database_id, schema, pages=()):
+        with self.lock:
+            self.databases[database_id] = {"schema": schema, "page_ids": []}
+            for page in pages:
+                page["parent"] = {"type": "database_id", "database_id": database_id}
+                self.pages[page["id"]] = page
+                self.databases[database_id]["page_ids"].append(page["id"])
+
+def _property_value(prop):
+    """取出属性的可比较值"""
+    prop_type = prop.get("type")
+    value = prop.get(prop_type)
+    if prop_type in ("select", "status"):
+        return value["name"] if value else None
+    if prop_type == "date":
+        return value["start"][:10] if value else None
+    if prop_type == "multi_select":
+        return [item["name"] for item in value or []]
+    if prop_type in ("title", "rich_text"):
+        return "".join(item.get("plain_text") or item["text"]["content"] for item in value or [])
+    return value
+
+def matches_filter(page, condition):
+    """实现查询过滤条件的子集：and/or、select/status 等于、日期范围、文本包含或等于、创建/编辑时间"""
+    if not condition:
+        return True
+    if "and" in condition:
+        return all(matches_filter(page, c) for c in condition["and"])
+    if "or" in condition:
+        return any(matches_filter(page, c) for c in condition["or"])
+    if "timestamp" in condition:
+        value = page.get(condition["timestamp"])
+        if not value:
+            return False
+        value = parse_timestamp(value)
+        rule = condition[condition["timestamp"]]
+        if "on_or_after" in rule and value < parse_timestamp(rule["on_or_after"]):
+            return False
+        if "on_or_before" in rule and value > parse_timestamp(rule["on_or_before"]):
+            return False
+        return True
+
+    prop = page["properties"].get(condition.get("property"))
+    if prop is None:
+        return False
+    value = _property_value(prop)
+
+    for prop_type in ("select", "status"):
+        if prop_type in condition:
+            rule = condition[prop_type]
+            if "equals" in rule:
+                return value == rule["equals"]
+            if "does_not_equal" in rule:
+                return value != rule["does_not_equal"]
+    if "date" in condition:
+        rule = condition["date"]
+        if value is None:
+            return False
+        if "on_or_after" in rule and value < rule["on_or_after"][:10]:
+            return False
+        if "on_or_before" in rule and value > rule["on_or_before"][:10]:
+            return False
+        return True
+    if "multi_select" in condition:
+        return condition["multi_select"].get("contains") in value
+    for prop_type in ("title", "rich_text"):
+        if prop_type in condition:
+            rule = condition[prop_type]
+            if "equals" in rule:
+                return value == rule["equals"]
+            return rule.get("contains", "") in value
+    return True
+
+class NotionMockHandler(BaseHTTPRequestHandler):
+    server_version = "NotionMock/1.0"
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("GET", re.compile(r"^/v1/databases/([^/]+)$"), "get_database"),
+        ("POST", re.compile(r"^/v1/databases/([^/]+)/query$"), "query_database"),
+        ("POST", re.compile(r"^/v1/pages$"), "create_page"),
+        ("GET", re.compile(r"^/v1/pages/([^/]+)$"), "get_page"),
+        ("PATCH", re.compile(r"^/v1/pages/([^/]+)$"), "update_page"),
+        ("GET", re.compile(r"^/v1/blocks/([^/]+)/children$"), "list_children"),
+        ("PATCH", re.compile(r"^/v1/blocks/([^/]+)/children$"), "append_children"),
+        ("PATCH", re.compile(r"^/v1/blocks/([^/]+)$"), "update_block"),
+        ("GET", re.compile(r"^/_stats$"), "get_stats"),
+    ]
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s" % (self.address_string(), format % args))
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, code, message, headers=None):
+        self._send(status, {"object": "error", "status": status, "code": code, "message": message},
+                   headers)
+
+    def _dispatch(self, method):
+        state = self.server.state
+        faults = self.server.faults
+        path = self.path.split("?", 1)[0]
+
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        for route_method, pattern, handler_name in self.ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                break
+        else:
+            return self._error(404, "invalid_request_url", f"Invalid request URL: {method} {path}")
+
+        with state.lock:
+            state.stats["requests"] += 1
+            by_route = state.stats["by_route"]
+            by_route[handler_name] = by_route.get(handler_name, 0) + 1
+
+        if handler_name == "get_stats":
+            return self._send(200, state.stats)
+
+        faults.delay()
+
+        token = self.headers.get("Authorization", "")
+        if not token.startswith("Bearer "):
+            return self._error(401, "unauthorized", "API token is invalid.")
+
+        retry_after = faults.rate_limited(token)
+        if retry_after is not None:
+            with state.lock:
+                state.stats["rate_limited"] += 1
+            return self._error(429, "rate_limited", "Rate limited",
+                               {"Retry-After": f"{max(retry_after, 0.001):.3f}"})
+
+        status = faults.injected_error()
+        if status:
+            with state.lock:
+                state.stats["injected_errors"] += 1
+            return self._error(status, "service_unavailable", "Injected failure")
+
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError:
+            return self._error(400, "invalid_json", "Body failed to parse as JSON")
+
+        getattr(self, handler_name)(payload, *match.groups())
+
+    def _validate_children(self, children):
+        if len(children) > MAX_CHILDREN:
+            return f"body.children.length should be ≤ `{MAX_CHILDREN}`, instead was `{len(children)}`."
+        for block in children:
+            block_type = block.get("type")
+            for item in block.get(block_type, {}).get("rich_text", []):
+                content = item.get("text", {}).get("content", "")
+                if len(content) > MAX_RICH_TEXT_LENGTH:
+                    return (f"body.children.{block_type}.rich_text.text.content.length should be "
+                            f"≤ `{MAX_RICH_TEXT_LENGTH}`, instead was `{len(content)}`.")
+        return None
+
+    def _store_children(self, parent_id, children):
+        stored = []
+        for block in children:
+            block = dict(block, object="block", id=str(uuid.uuid4()))
+            stored.append(block)
+        self.server.state.children.setdefault(parent_id, []).extend(stored)
+        return stored
+
+    def get_database(self, payload, database_id):
+        state = self.server.state
+        database = state.databases.get(database_id)
+        if not database:
+            return self._error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        self._send(200, {
+            "object": "database",
+            "id": database_id,
+            "properties": {name: {"name": name, "type": prop_type}
+                           for name, prop_type in database["schema"].items()}
+        })
+
+    def query_database(self, payload, database_id):
+        state = self.server.state
+        database = state.databases.get(database_id)
+        if not database:
+            return self._error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+
+        page_size = min(int(payload.get("page_size", 100)), 100)
+        start = int(payload.get("start_cursor") or 0)
+
+        with state.lock:
+            matched = [state.pages[page_id] for page_id in database["page_ids"]
+                       if matches_filter(state.pages[page_id], payload.get("filter"))]
+
+        results = matched[start:start + page_size]
+        has_more = start + page_size < len(matched)
+        self._send(200, {
+            "object": "list",
+            "results": results,
+            "has_more": has_more,
+            "next_cursor": str(start + page_size) if has_more else None
+        })
+
+    def create_page(self, payload, *args):
+        state = self.server.state
+        database_id = payload.get("parent", {}).get("database_id")
+        database = state.databases.get(database_id)
+        if not database:
+            return self._error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+
+        properties = payload.get("properties", {})
+        for name in properties:
+            if name not in database["schema"]:
+                return self._error(400, "validation_error", f"{name} is not a property that exists.")
+
+        children = payload.get("children", [])
+        problem = self._validate_children(children)
+        if problem:
+            return self._error(400, "validation_error", problem)
+
+        page_id = str(uuid.uuid4())
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": notion_timestamp(),
+            "last_edited_time": notion_timestamp(),
+            "parent": {"type": "database_id", "database_id": database_id},
+            "url": f"http://{self.server.server_address[0]}:{self.server.server_address[1]}/{page_id.replace('-', '')}",
+            "properties": {name: dict(value, type=next(iter(value))) for name, value in properties.items()}
+        }
+        with state.lock:
+            state.pages[page_id] = page
+            database["page_ids"].append(page_id)
+            self._store_children(page_id, children)
+        self._send(200, page)
+
+    def get_page(self, payload, page_id):
+        page = self.server.state.pages.get(page_id)
+        if not page:
+            return self._error(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+        self._send(200, page)
+
+    def update_page(self, payload, page_id):
+        state = self.server.state
+        with state.lock:
+            page = state.pages.get(page_id)
+            if not page:
+                return self._error(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+            for name, value in payload.get("properties", {}).items():
+                page["properties"][name] = dict(value, type=next(iter(value)))
+            page["last_edited_time"] = notion_timestamp()
+        self._send(200, page)
+
+    def list_children(self, payload, block_id):
+        children = self.server.state.children.get(block_id, [])
+        self._send(200, {"object": "list", "results": children, "has_more": False, "next_cursor": None})
+
+    def append_children(self, payload, block_id):
+        state = self.server.state
+        if block_id not in state.pages and not any(
+                block["id"] == block_id for blocks in state.children.values() for block in blocks):
+            return self._error(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+
+        children = payload.get("children", [])
+        problem = self._validate_children(children)
+        if problem:
+            return self._error(400, "validation_error", problem)
+
+        with state.lock:
+            stored = self._store_children(block_id, children)
+        self._send(200, {"object": "list", "results": stored, "has_more": False, "next_cursor": None})
+
+    def update_block(self, payload, block_id):
+        state = self.server.state
+        with state.lock:
+            for blocks in state.children.values():
+                for block in blocks:
+                    if block["id"] == block_id:
+                        block.update(payload)
+                        return self._send(200, block)
+        self._error(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+
+def create_server(host="127.0.0.1", port=8765, faults=None, state=None):
+    """创建服务器（不启动），测试中可在线程里运行 serve_forever"""
+    server = ThreadingHTTPServer((host, port), NotionMockHandler)
+    server.daemon_threads = True
+    server.state = state or NotionMockState()
+    server.faults = faults or FaultInjector()
+    return server
+
+def seed_state(state, articles_db_id, weekly_db_ids, article_count, weeks=12, seed=42):
+    """写入模拟的文章数据库与周刊数据库"""
+    rng = random.Random(seed)
+    today = datetime.now()
+    pages = [
+        make_article_page(i, today - timedelta(days=rng.randrange(weeks * 7)), rng=rng)
+        for i in range(article_count)
+    ]
+    state.add_database(articles_db_id, ARTICLE_SCHEMA, pages)
+    for database_id in weekly_db_ids:
+        state.add_database(database_id, WEEKLY_SCHEMA)
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="本地 Notion API 替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求的固定延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="额外的随机延迟上限")
+    parser.add_argument("--rate", type=float, default=3, help="每个 Token 每秒允许的请求数，0 表示不限流")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 5xx 的概率")
+    parser.add_argument("--articles", type=int, default=200, help="文章数据库中的模拟文章数")
+    parser.add_argument("--articles-db", default="mock-articles-db")
+    parser.add_argument("--weekly-db", action="append", default=None,
+                        help="周刊数据库ID，可重复指定")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    state = NotionMockState()
+    seed_state(state, args.articles_db, args.weekly_db or ["mock-weekly-db"], args.articles)
+    faults = FaultInjector(args.latency_ms, args.jitter_ms, args.rate, args.error_rate)
+    server = create_server(args.host, args.port, faults, state)
+
+    print(f"🧪 Notion 替身服务器已启动: http://{args.host}:{args.port}/v1")
+    print(f"📚 文章数据库: {args.articles_db} ({args.articles} 篇)")
+    print(f"📰 周刊数据库: {', '.join(args.weekly_db or ['mock-weekly-db'])}")
+    print("⚠️  按 Ctrl+C 停止")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  服务器已停止")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Notion 请求体本地校验
+按目标数据库的 schema 预先编译校验器，在发送前发现并修正会被 API 拒绝的页面和块
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from notion_helper import NotionHelper
+
+# Notion API 的请求体限制
+MAX_CHILDREN = 100
+MAX_TEXT_LENGTH = 2000
+MAX_RICH_TEXT_ITEMS = 100
+
+# 本项目会生成的块类型，以及它们的文本字段
+TEXT_BLOCK_TYPES = frozenset([
+    "paragraph", "heading_1", "heading_2", "heading_3", "quote",
+    "bulleted_list_item", "numbered_list_item", "to_do", "toggle", "callout"
+])
+EMPTY_BLOCK_TYPES = frozenset(["divider", "table_of_contents", "breadcrumb"])
+
+SCHEMA_CACHE_FILE = Path("notion_schema_cache.json")
+
+class PayloadValidationError(ValueError):
+    """请求体存在无法自动修正的问题"""
+
+    def __init__(self, problems):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+def split_rich_text(rich_text):
+    """
+    把超过 2000 字符的文本元素拆成多段，保留链接和格式
+
+    Returns:
+        tuple: (新的 rich_text 列表, 是否有改动)
+    """
+    if all(len(item.get("text", {}).get("content", "")) <= MAX_TEXT_LENGTH for item in rich_text):
+        return rich_text, False
+
+    fixed = []
+    for item in rich_text:
+        content = item.get("text", {}).get("content", "")
+        if len(content) <= MAX_TEXT_LENGTH:
+            fixed.append(item)
+            continue
+        for start in range(0, len(content), MAX_TEXT_LENGTH):
+            piece = dict(item, text=dict(item["text"], content=content[start:start + MAX_TEXT_LENGTH]))
+            fixed.append(piece)
+    return fixed, True
+
+class PayloadValidator:
+    """
+    由数据库 schema 编译出的校验器
+
+    schema 为 {属性名: 属性类型}，为 None 时只校验块内容。
+    """
+
+    def __init__(self, database_id, schema=None):
+        self.database_id = database_id
+        self.schema = dict(schema) if schema else None
+        self.title_property = None
+        if self.schema:
+            self.title_property = next(
+                (name for name, prop_type in self.schema.items() if prop_type == "title"), None
+            )
+
+    def validate_page(self, properties, children=(), fix=True):
+        """
+        校验创建页面的属性和子块
+
+        Args:
+            properties (dict): 页面属性
+            children (list): 子块
+            fix (bool): 是否自动修正可修正的问题
+
+        Returns:
+            tuple: (属性, 子块, 已修正的问题列表)
+
+        Raises:
+            PayloadValidationError: 存在无法修正的问题（或 fix=False 时存在任何问题）
+        """
+        fixes, errors = [], []
+        properties = self._check_properties(properties, fix, fixes, errors)
+        children = self.validate_blocks(children, fix, fixes, errors)
+
+        if errors or (fixes and not fix):
+            raise PayloadValidationError(errors + ([] if fix else fixes))
+
+        for problem in fixes:
+            logging.warning(f"🔧 已修正请求体 ({self.database_id}): {problem}")
+        return properties, children, fixes
+
+    def _check_properties(self, properties, fix, fixes, errors):
+        if self.schema is None:
+            return properties
+
+        checked = {}
+        for name, value in properties.items():
+            value_type = next(iter(value), None)
+            expected = self.schema.get(name)
+
+            if expected is None:
+                if value_type == "title" and self.title_property and fix:
+                    fixes.append(f"标题属性 `{name}` 改为 `{self.title_property}`")
+                    name, expected = self.title_property, "title"
+                else:
+                    errors.append(f"属性 `{name}` 不存在于数据库 {self.database_id}")
+                    continue
+
+            if value_type != expected:
+                errors.append(f"属性 `{name}` 类型应为 {expected}，实际为 {value_type}")
+                continue
+
+            if value_type in ("title", "rich_text"):
+                fixed, changed = split_rich_text(value[value_type])
+                if changed:
+                    fixes.append(f"属性 `{name}` 的文本超过 {MAX_TEXT_LENGTH} 字符，已拆分")
+                    value = {value_type: fixed}
+
+            checked[name] = value
+
+        if self.title_property and self.title_property not in checked:
+            errors.append(f"缺少标题属性 `{self.title_property}`")
+        return checked
+
+    def validate_blocks(self, blocks, fix=True, fixes=None, errors=None):
+        """
+        校验块列表；超过 100 个块不算错误，由调用方分块提交
+
+        Returns:
+            list: 修正后的块列表
+        """
+        fixes = [] if fixes is None else fixes
+        errors = [] if errors is None else errors
+        checked = []
+
+        for index, block in enumerate(blocks):
+            block_type = block.get("type")
+            body = block.get(block_type)
+
+            if block_type in EMPTY_BLOCK_TYPES:
+                checked.append(block)
+                continue
+            if block_type not in TEXT_BLOCK_TYPES or not isinstance(body, dict):
+                errors.append(f"第 {index + 1} 个块类型不受支持: {block_type}")
+                continue
+
+            rich_text = body.get("rich_text", [])
+            if len(rich_text) > MAX_RICH_TEXT_ITEMS:
+                errors.append(f"第 {index + 1} 个块的文本元素超过 {MAX_RICH_TEXT_ITEMS} 个")
+                continue
+
+            for item in rich_text:
+                link = item.get("text", {}).get("link")
+                if link and len(link.get("url", "")) > MAX_TEXT_LENGTH:
+                    errors.append(f"第 {index + 1} 个块的链接超过 {MAX_TEXT_LENGTH} 字符")
+
+            fixed, changed = split_rich_text(rich_text)
+            if changed:
+                fixes.append(f"第 {index + 1} 个块的文本超过 {MAX_TEXT_LENGTH} 字符，已拆分")
+                block = dict(block, **{block_type: dict(body, rich_text=fixed)})
+                if len(fixed) > MAX_RICH_TEXT_ITEMS:
+                    errors.append(f"第 {index + 1} 个块拆分后文本元素超过 {MAX_RICH_TEXT_ITEMS} 个")
+
+            checked.append(block)
+
+        return checked
+
+_validators = {}
+_validators_lock = threading.Lock()
+
+def load_schema(database_id, client=None):
+    """
+    获取数据库 schema：先查配置文件，再查本地缓存，最后请求 API 并写入缓存
+
+    Returns:
+        dict: {属性名: 属性类型}，取不到时返回 None
+    """
+    config = NotionHelper().config.get("notion", {})
+    for db_info in config.get("databases", {}).values():
+        if db_info.get("id") == database_id and db_info.get("properties"):
+            return db_info["properties"]
+
+    cache = {}
+    if SCHEMA_CACHE_FILE.exists():
+        with open(SCHEMA_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    if database_id in cache:
+        return cache[database_id]
+
+    if client is None:
+        return None
+
+    try:
+        database = client.retrieve_database(database_id)
+    except Exception as e:
+        logging.warning(f"获取数据库 schema 失败，仅校验块内容: {str(e)}")
+        return None
+
+    schema = {name: prop["type"] for name, prop in database.get("properties", {}).items()}
+    cache[database_id] = schema
+    with open(SCHEMA_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    return schema
+
+def get_validator(database_id, client=None):
+    """每个目标数据库只编译一次校验器"""
+    with _validators_lock:
+        validator = _validators.get(database_id)
+    if validator is not None:
+        return validator
+
+    schema = load_schema(database_id, client)
+    validator = PayloadValidator(database_id, schema)
+    if schema is None:
+        # 暂时拿不到 schema 时不缓存，下次有客户端时再尝试
+        return validator
+    with _validators_lock:
+        return _validators.setdefault(database_id, validator)
@@ -6,21 +6,98 @@ Notion 数据库查询辅助函数
 
 import json
 import logging
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime, timedelta
+from article import Article
 from notion_helper import NotionHelper
+from pipeline_metrics import timed_stage
+
+# 相同查询结果的缓存时间（秒）；周刊生成、草稿同步、预览常在短时间内重复同一个查询
+QUERY_CACHE_TTL = 60
+
+_query_cache = {}
+_inflight_queries = {}
+_query_cache_lock = threading.Lock()
+query_cache_stats = {"hits": 0, "misses": 0, "shared": 0}
+
+def cached_query(key, fetch, ttl=QUERY_CACHE_TTL):
+    """
+    合并并缓存相同的查询
+    
+    同一个 key 同时只会有一个请求在进行，其余调用方等待并共享它的结果（single-flight）；
+    成功的结果在 ttl 秒内直接复用，失败不缓存
+    
+    Args:
+        key (tuple): 查询标识
+        fetch (callable): 实际执行查询的函数
+        ttl (float): 缓存秒数，0 表示只合并并发请求
+    """
+    with _query_cache_lock:
+        cached = _query_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            query_cache_stats["hits"] += 1
+            return cached[1]
+        
+        future = _inflight_queries.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight_queries[key] = Future()
+            query_cache_stats["misses"] += 1
+        else:
+            query_cache_stats["shared"] += 1
+    
+    if not leader:
+        return future.result()
+    
+    try:
+        result = fetch()
+    except BaseException as e:
+        with _query_cache_lock:
+            _inflight_queries.pop(key, None)
+        future.set_exception(e)
+        raise
+    
+    with _query_cache_lock:
+        if ttl > 0:
+            _query_cache[key] = (time.monotonic() + ttl, result)
+        _inflight_queries.pop(key, None)
+    future.set_result(result)
+    return result
+
+def clear_query_cache():
+    """清空查询缓存（例如文章状态被修改后）"""
+    with _query_cache_lock:
+        _query_cache.clear()
 
 class NotionQueryHelper:
-    def __init__(self):
+    def __init__(self, client=None, database_id=None, cache_ttl=QUERY_CACHE_TTL):
         self.helper = NotionHelper()
-        self.db_id = self.helper.get_database_id()
+        self.db_id = database_id or self.helper.get_database_id()
+        self._client = client
+        self.cache_ttl = cache_ttl
+    
+    @property
+    def client(self):
+        """Notion 客户端，首次查询时创建"""
+        if self._client is None:
+            from notion_client import NotionClient
+            self._client = NotionClient()
+        return self._client
         
-    def get_archived_articles_by_date_range(self, start_date, end_date):
+    @timed_stage(count=lambda articles, *_, **__: len(articles))
+    def get_archived_articles_by_date_range(self, start_date, end_date, edited_since=None, raise_errors=False,
+                                            statuses=("已归档",)):
         """
         根据日期范围获取已归档的文章
         
         Args:
             start_date (datetime): 开始日期
             end_date (datetime): 结束日期
+            edited_since (datetime): 只返回此后编辑过的页面（增量同步）
+            raise_errors (bool): 查询失败时抛出异常而不是返回空列表
+            statuses (tuple): 文章状态，多个时任一匹配即可（如导出全部历史时加上"已发布"）
             
         Returns:
             list: 文章列表
@@ -30,14 +107,10 @@ class NotionQueryHelper:
             # 由于我们已经配置了 MCP，可以直接调用
             
             # 构建查询条件
+            status_conditions = [{"property": "状态", "select": {"equals": status}} for status in statuses]
             filter_conditions = {
                 "and": [
-                    {
-                        "property": "状态",
-                        "select": {
-                            "equals": "已归档"
-                        }
-                    },
+                    status_conditions[0] if len(status_conditions) == 1 else {"or": status_conditions},
                     {
                         "property": "添加日期",
                         "date": {
@@ -52,12 +125,28 @@ class NotionQueryHelper:
                     }
                 ]
             }
-            
-            # 注意：这里需要实际调用 MCP API
-            # 目前先返回模拟数据，实际使用时需要替换
+            if edited_since is not None:
+                filter_conditions["and"].append({
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {
+                        "on_or_after": edited_since.isoformat()
+                    }
+                })
             
             logging.info(f"查询条件: {json.dumps(filter_conditions, indent=2, ensure_ascii=False)}")
             
+            # 配置了 API Token 时查询真实数据库（或 api_base_url 指向的替身服务器）
+            if self.helper.has_api_token() or self._client is not None:
+                key = (self.db_id, json.dumps(filter_conditions, sort_keys=True, ensure_ascii=False))
+                pages = cached_query(key, lambda: self.client.query_database(self.db_id, filter_conditions),
+                                     self.cache_ttl)
+                articles = [self.format_article_for_newsletter(page) for page in pages]
+                articles = [article for article in articles if article]
+                logging.info(f"找到 {len(articles)} 篇已归档文章")
+                return articles
+            
+            # 未配置时返回模拟数据
+            
             # 模拟返回数据
             mock_articles = [
                 {
@@ -90,19 +179,31 @@ class NotionQueryHelper:
             ]
             
             logging.info(f"找到 {len(mock_articles)} 篇已归档文章")
-            return mock_articles
+            return [Article.from_dict(article) for article in mock_articles]
             
         except Exception as e:
             logging.error(f"查询文章时出错: {str(e)}")
+            if raise_errors:
+                raise
             return []
     
+    def get_archived_articles_for_week(self, year, week_number, edited_since=None, raise_errors=False):
+        """获取指定 ISO 周（周一到周日）已归档的文章"""
+        monday = datetime.fromisocalendar(year, week_number, 1)
+        sunday = monday + timedelta(days=6, hours=23, minutes=59, seconds=59)
+        
+        logging.info(f"查询 {year} 年第 {week_number} 周文章: {monday.strftime('%Y-%m-%d')} 到 {sunday.strftime('%Y-%m-%d')}")
+        
+        return self.get_archived_articles_by_date_range(monday, sunday, edited_since, raise_errors)
+    
     def get_this_week_archived_articles(self):
         """获取本周已归档的文章"""
-        today = datetime.now()
+        # 按日期取整（周一 00:00 到周日 23:59:59），同一周内的查询条件相同才能命中缓存
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         # 获取本周一
         monday = today - timedelta(days=today.weekday())
         # 获取本周日
-        sunday = monday + timedelta(days=6)
+        sunday = monday + timedelta(days=6, hours=23, minutes=59, seconds=59)
         
         logging.info(f"查询本周文章: {monday.strftime('%Y-%m-%d')} 到 {sunday.strftime('%Y-%m-%d')}")
         
@@ -110,11 +211,11 @@ class NotionQueryHelper:
     
     def get_last_week_archived_articles(self):
         """获取上周已归档的文章"""
-        today = datetime.now()
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         # 获取上周一
         last_monday = today - timedelta(days=today.weekday() + 7)
         # 获取上周日
-        last_sunday = last_monday + timedelta(days=6)
+        last_sunday = last_monday + timedelta(days=6, hours=23, minutes=59, seconds=59)
         
         logging.info(f"查询上周文章: {last_monday.strftime('%Y-%m-%d')} 到 {last_sunday.strftime('%Y-%m-%d')}")
         
@@ -128,7 +229,7 @@ class NotionQueryHelper:
             raw_article (dict): 从 Notion API 获取的原始文章数据
             
         Returns:
-            dict: 格式化后的文章数据
+            Article: 格式化后的文章数据（可按 dict 方式读取）
         """
         try:
             # 提取标题
@@ -173,14 +274,15 @@ class NotionQueryHelper:
                 if date_prop["type"] == "date" and date_prop["date"]:
                     archived_date = date_prop["date"]["start"][:10]  # 只取日期部分
             
-            formatted_article = {
-                "title": title,
-                "summary": summary,
-                "url": url,
-                "category": category,
-                "importance": importance,
-                "archived_date": archived_date
-            }
+            formatted_article = Article(
+                page_id=raw_article.get("id", ""),
+                title=title,
+                summary=summary,
+                url=url,
+                category=category,
+                importance=importance,
+                archived_date=archived_date
+            )
             
             return formatted_article
             
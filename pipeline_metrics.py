@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+周刊流水线的分阶段计时
+在获取文章、分类、渲染、块转换和发布等阶段记录耗时、条数、字节数和 API 调用次数，
+每次运行结束后导出 Prometheus textfile（供 node_exporter 采集）和 JSON 运行摘要
+
+没有进行中的运行时，各阶段的计时只多一次 ContextVar 读取
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+METRICS_DIR = "metrics"
+# 每个运行（同名同标签）保留的 JSON 摘要数，更早的在导出时删除
+KEEP_SUMMARIES = 20
+
+_current_run = contextvars.ContextVar("pipeline_run", default=None)
+_span_stack = contextvars.ContextVar("pipeline_spans", default=())
+
+class Span:
+    """一个阶段的一次执行"""
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+        self.count = 0
+        self.bytes = 0
+        self.api_calls = 0
+        self.duration = 0.0
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "stage": self.stage,
+            "labels": self.labels,
+            "duration_seconds": round(self.duration, 6),
+            "count": self.count,
+            "bytes": self.bytes,
+            "api_calls": self.api_calls,
+            "error": self.error
+        }
+
+class PipelineRun:
+    """一次流水线运行中的全部阶段"""
+
+    def __init__(self, name="weekly", **labels):
+        self.name = name
+        self.labels = labels
+        self.spans = []
+        self.started = datetime.now()
+        self.duration = 0.0
+        self.success = True
+        self.profiler = None
+        self.lock = threading.Lock()
+
+    def stages(self):
+        """按阶段汇总（同一阶段的多次执行相加）"""
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(span.stage, {"calls": 0, "duration_seconds": 0.0, "count": 0,
+                                                   "bytes": 0, "api_calls": 0, "errors": 0})
+            total["calls"] += 1
+            total["duration_seconds"] += span.duration
+            total["count"] += span.count
+            total["bytes"] += span.bytes
+            total["api_calls"] += span.api_calls
+            total["errors"] += 1 if span.error else 0
+        for total in totals.values():
+            total["duration_seconds"] = round(total["duration_seconds"], 6)
+        return totals
+
+    def summary(self):
+        return {
+            "name": self.name,
+            "labels": self.labels,
+            "started": self.started.isoformat(),
+            "duration_seconds": round(self.duration, 6),
+            "success": self.success,
+            "stages": self.stages(),
+            "spans": [span.to_dict() for span in self.spans]
+        }
+
+    def prometheus_text(self):
+        """Prometheus textfile 格式"""
+        base = {"pipeline": self.name, **self.labels}
+
+        def labels(**extra):
+            pairs = {**base, **extra}
+            return ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs.items())
+
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for label_text, value in samples:
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        stages = self.stages()
+        metric("weekly_stage_duration_seconds", "Duration of each pipeline stage in the last run",
+               [(labels(stage=stage), total["duration_seconds"]) for stage, total in stages.items()])
+        metric("weekly_stage_items", "Items processed by each stage in the last run",
+               [(labels(stage=stage), total["count"]) for stage, total in stages.items()])
+        metric("weekly_stage_bytes", "Bytes processed by each stage in the last run",
+               [(labels(stage=stage), total["bytes"]) for stage, total in stages.items()])
+        metric("weekly_stage_api_calls", "Notion API calls made by each stage in the last run",
+               [(labels(stage=stage), total["api_calls"]) for stage, total in stages.items()])
+        metric("weekly_stage_errors", "Failed executions of each stage in the last run",
+               [(labels(stage=stage), total["errors"]) for stage, total in stages.items()])
+        metric("weekly_run_duration_seconds", "Duration of the last run", [(labels(), round(self.duration, 6))])
+        metric("weekly_run_success", "Whether the last run succeeded", [(labels(), int(self.success))])
+        metric("weekly_run_timestamp_seconds", "Start time of the last run",
+               [(labels(), round(self.started.timestamp(), 3))])
+        return "\n".join(lines) + "\n"
+
+    @property
+    def stem(self):
+        suffix = "_".join(str(value) for value in self.labels.values())
+        return f"{self.name}_{suffix}" if suffix else self.name
+
+    def export(self, metrics_dir=METRICS_DIR, keep=KEEP_SUMMARIES):
+        """
+        写入 <目录>/<name>.prom 和 <目录>/<name>_<时间>.json，返回两个路径
+
+        同一运行的 JSON 摘要只保留最近 keep 份
+        """
+        os.makedirs(metrics_dir, exist_ok=True)
+        prom_path = os.path.join(metrics_dir, f"{self.stem}.prom")
+        json_path = os.path.join(metrics_dir, f"{self.stem}_{self.started.strftime('%Y%m%d_%H%M%S')}.json")
+        _atomic_write(prom_path, self.prometheus_text())
+        _atomic_write(json_path, json.dumps(self.summary(), indent=2, ensure_ascii=False))
+        self.prune_summaries(metrics_dir, keep)
+        return prom_path, json_path
+
+    def prune_summaries(self, metrics_dir, keep=KEEP_SUMMARIES):
+        """删除本运行较早的 JSON 摘要（文件名中的时间可直接按字符串排序），返回删除的数量"""
+        pattern = re.compile(re.escape(self.stem) + r"_\d{8}_\d{6}\.json")
+        summaries = sorted(name for name in os.listdir(metrics_dir) if pattern.fullmatch(name))
+        stale = summaries[:-keep] if keep > 0 else summaries
+        for name in stale:
+            try:
+                os.remove(os.path.join(metrics_dir, name))
+            except FileNotFoundError:
+                pass
+        return len(stale)
+
+def _escape_label(value):
+    """按 Prometheus 文本格式转义标签值中的反斜杠、双引号和换行"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _atomic_write(path, text):
+    """node_exporter 可能随时读取，先写临时文件再重命名"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".metrics.", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def current_run():
+    return _current_run.get()
+
+def _start_profiler(run, profile_dir):
+    """设置了 WEEKLY_PROFILE 时为本次运行开启剖析（见 profiling.py）"""
+    from profiling import PROFILE_DIR_ENV, RunProfiler, profile_modes
+
+    modes = profile_modes()
+    if not modes:
+        return None
+    profile_dir = profile_dir or os.environ.get(PROFILE_DIR_ENV, "profiles")
+    output_dir = os.path.join(profile_dir, f"{run.stem}_{run.started.strftime('%Y%m%d_%H%M%S')}")
+    profiler = RunProfiler(output_dir, modes)
+    profiler.start()
+    return profiler
+
+@contextmanager
+def pipeline_run(name="weekly", metrics_dir=None, profile_dir=None, **labels):
+    """
+    记录一次运行，结束时导出指标
+
+    Args:
+        name (str): 运行名称（如 generate、publish）
+        metrics_dir (str): 导出目录，默认读取环境变量 WEEKLY_METRICS_DIR，再默认 metrics/
+        profile_dir (str): 开启剖析时的输出目录，默认读取 WEEKLY_PROFILE_DIR，再默认 profiles/
+        labels: 附加标签，如 newsletter="default"
+    """
+    run = PipelineRun(name, **labels)
+    if os.environ.get("WEEKLY_PROFILE"):
+        run.profiler = _start_profiler(run, profile_dir)
+    token = _current_run.set(run)
+    started = time.perf_counter()
+    try:
+        yield run
+    except BaseException:
+        run.success = False
+        raise
+    finally:
+        run.duration = time.perf_counter() - started
+        _current_run.reset(token)
+        if run.profiler is not None:
+            run.profiler.stop()
+        try:
+            paths = run.export(metrics_dir or os.environ.get("WEEKLY_METRICS_DIR", METRICS_DIR))
+            logging.info(f"📊 运行指标已写入: {', '.join(paths)}")
+        except OSError as e:
+            logging.error(f"写入运行指标时出错: {str(e)}")
+
+def instrumented_run(name, labels=None, profile_dir=None):
+    """
+    把函数的一次调用记录为一次运行，返回值为假时记为失败
+
+    Args:
+        name (str): 运行名称
+        labels (callable): labels(*参数) 返回附加标签
+        profile_dir (callable): profile_dir(*参数) 返回剖析输出目录
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            extra = labels(*args, **kwargs) if labels else {}
+            output_dir = profile_dir(*args, **kwargs) if profile_dir else None
+            with pipeline_run(name, profile_dir=output_dir, **extra) as run:
+                result = func(*args, **kwargs)
+                run.success = bool(result)
+                return result
+        return wrapper
+    return decorator
+
+@contextmanager
+def stage(name, **labels):
+    """记录一个阶段；没有进行中的运行时不记录"""
+    run = _current_run.get()
+    if run is None:
+        yield Span(name, labels)
+        return
+
+    span = Span(name, labels)
+    token = _span_stack.set(_span_stack.get() + (span,))
+    started = time.perf_counter()
+    try:
+        with run.profiler.stage(name) if run.profiler else nullcontext():
+            yield span
+    except BaseException as e:
+        span.error = str(e)[:200]
+        raise
+    finally:
+        span.duration = time.perf_counter() - started
+        _span_stack.reset(token)
+        with run.lock:
+            run.spans.append(span)
+
+def timed_stage(name=None, count=None, size=None):
+    """
+    把函数记录为一个阶段
+
+    Args:
+        name (str): 阶段名，默认函数名
+        count (callable): count(返回值, *参数) 计算条数
+        size (callable): size(返回值, *参数) 计算字节数
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_run.get() is None:
+                return func(*args, **kwargs)
+            with stage(stage_name) as span:
+                result = func(*args, **kwargs)
+                if count:
+                    span.count = count(result, *args, **kwargs)
+                if size:
+                    span.bytes = size(result, *args, **kwargs)
+                return result
+        return wrapper
+    return decorator
+
+def record_api_call(transferred_bytes=0):
+    """NotionClient 每次请求后调用（请求体加响应体的字节数），计入当前所有打开的阶段"""
+    spans = _span_stack.get()
+    if not spans:
+        return
+    run = _current_run.get()
+    with run.lock:
+        for span in spans:
+            span.api_calls += 1
+            span.bytes += transferred_bytes
+
+def in_current_context(func):
+    """让线程池中执行的函数继续计入提交时的运行和阶段"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
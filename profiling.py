@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+按需开启的性能剖析
+设置环境变量 WEEKLY_PROFILE（或命令行 --profile）后，每次运行的各个阶段都会用
+cProfile 和 tracemalloc 采样，写出:
+
+    <目录>/<阶段>_<序号>.prof         cProfile 结果，可用 snakeviz / pstats 查看
+    <目录>/<阶段>_<序号>.alloc.txt    该阶段新增内存最多的 N 个代码位置
+    <目录>/run.prof                   全部阶段合并后的 cProfile 结果
+
+WEEKLY_PROFILE 可取 1/all（CPU 和内存）、cpu、mem，或用逗号组合
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_ENV = "WEEKLY_PROFILE"
+PROFILE_DIR_ENV = "WEEKLY_PROFILE_DIR"
+DEFAULT_TOP = 25
+
+def profile_modes(value=None):
+    """解析剖析模式，未开启时返回空集合"""
+    value = (os.environ.get(PROFILE_ENV, "") if value is None else value).strip().lower()
+    if value in ("", "0", "false", "off", "no"):
+        return set()
+    if value in ("1", "true", "on", "yes", "all"):
+        return {"cpu", "mem"}
+    modes = {mode.strip() for mode in value.split(",")} & {"cpu", "mem"}
+    if not modes:
+        logging.warning(f"无法识别的 {PROFILE_ENV}={value}，可选 all / cpu / mem")
+    return modes
+
+class RunProfiler:
+    def __init__(self, output_dir, modes, top=DEFAULT_TOP):
+        self.output_dir = output_dir
+        self.modes = modes
+        self.top = top
+        self.files = []
+        self._counter = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if "mem" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+
+    def stop(self):
+        """停止采样并合并各阶段的 cProfile 结果"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        prof_files = [path for path in self.files if path.endswith(".prof")]
+        if prof_files:
+            merged = pstats.Stats(prof_files[0])
+            for path in prof_files[1:]:
+                merged.add(path)
+            merged_path = os.path.join(self.output_dir, "run.prof")
+            merged.dump_stats(merged_path)
+            self.files.append(merged_path)
+
+        if self.files:
+            logging.info(f"🔬 剖析结果已写入 {self.output_dir} ({len(self.files)} 个文件)")
+        return self.files
+
+    def _next_name(self, stage):
+        with self._lock:
+            self._counter[stage] = self._counter.get(stage, 0) + 1
+            return f"{stage}_{self._counter[stage]}"
+
+    def _start_cpu(self):
+        """每个线程同时只能有一个 cProfile；嵌套阶段由外层阶段统计"""
+        if "cpu" not in self.modes or getattr(self._local, "active", False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 全进程只允许一个剖析器，并发的阶段只记录内存
+            return None
+        self._local.active = True
+        return profile
+
+    @contextmanager
+    def stage(self, stage):
+        """剖析一个阶段"""
+        name = self._next_name(stage)
+        profile = self._start_cpu()
+        before = tracemalloc.take_snapshot() if "mem" in self.modes and tracemalloc.is_tracing() else None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._local.active = False
+                path = os.path.join(self.output_dir, f"{name}.prof")
+                profile.dump_stats(path)
+                self.files.append(path)
+            if before is not None:
+                self.files.append(self._write_allocations(name, before, tracemalloc.take_snapshot()))
+
+    def _write_allocations(self, name, before, after):
+        """写出该阶段新增内存最多的代码位置"""
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        lines = [f"# {name}: 新增内存最多的 {self.top} 个位置（并发阶段的分配也会计入）"]
+        lines += [str(entry) for entry in diff[:self.top]]
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"# 当前 {current / 1024:.1f} KiB，峰值 {peak / 1024:.1f} KiB")
+
+        path = os.path.join(self.output_dir, f"{name}.alloc.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        return path
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+周刊发布历史
+只追加的 SQLite 存储，按期号和数据库建立索引，不再写入 notion_config.json
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publish_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    year INTEGER,
+    week_number INTEGER,
+    database_id TEXT NOT NULL,
+    page_title TEXT,
+    page_id TEXT,
+    published_time TEXT NOT NULL,
+    url TEXT,
+    articles TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_publish_history_week
+    ON publish_history (year, week_number, database_id);
+CREATE INDEX IF NOT EXISTS idx_publish_history_database
+    ON publish_history (database_id, published_time);
+"""
+
+class PublishHistory:
+    def __init__(self, db_path="publish_history.db"):
+        self.db_path = str(db_path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def append(self, database_id, publish_result, week_number=None, articles=None, year=None):
+        """
+        追加一条发布记录
+
+        Args:
+            database_id (str): 目标数据库ID
+            publish_result (dict): 发布结果
+            week_number (int): 期号
+            articles (list): 本期收录的文章，只保存标题和链接
+            year (int): 本期的 ISO 年份；补发往期或跨年发布时与发布时间不同，
+                未提供时（如旧版记录）按发布时间推算
+
+        Returns:
+            int: 记录ID
+        """
+        published_time = publish_result.get("created_time") or datetime.now().isoformat()
+        if year is None:
+            year = datetime.fromisoformat(published_time).isocalendar()[0]
+        featured = [
+            {"title": article.get("title", ""), "url": article.get("url", "")}
+            for article in articles or []
+        ]
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """INSERT INTO publish_history
+                   (year, week_number, database_id, page_title, page_id, published_time, url, articles)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (year, week_number, database_id, publish_result.get("title", ""),
+                 publish_result.get("page_id", ""), published_time, publish_result.get("url", ""),
+                 json.dumps(featured, ensure_ascii=False))
+            )
+            return cursor.lastrowid
+
+    def _row_to_record(self, row):
+        record = dict(row)
+        record["articles"] = json.loads(record["articles"])
+        return record
+
+    def find(self, week_number=None, database_id=None, year=None):
+        """按期号、年份和数据库查询（走索引）"""
+        conditions, params = [], []
+        for column, value in (("year", year), ("week_number", week_number), ("database_id", database_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM publish_history {where} ORDER BY id", params
+            ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def latest(self, database_id=None):
+        """最近一次发布记录"""
+        where, params = ("WHERE database_id = ?", (database_id,)) if database_id else ("", ())
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT * FROM publish_history {where} ORDER BY published_time DESC LIMIT 1", params
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def iter_records(self, batch_size=500):
+        """按写入顺序流式读取全部记录"""
+        last_id = 0
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM publish_history WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_record(row)
+            last_id = rows[-1]["id"]
+
+    def import_from_config(self, helper):
+        """
+        把旧版 notion_config.json 中的 publish_history 迁移到本存储，并从配置中删除
+
+        Args:
+            helper (NotionHelper): 配置助手
+
+        Returns:
+            int: 迁移的记录数
+        """
+        if "publish_history" not in helper.config.get("notion", {}):
+            return 0
+
+        migrated = []
+
+        def migrate(config):
+            # 在配置文件锁内完成，避免多个进程重复迁移
+            history = config.get("notion", {}).pop("publish_history", None) or []
+            for record in history:
+                self.append(record.get("database_id", ""), {
+                    "title": record.get("page_title", ""),
+                    "page_id": record.get("page_id", ""),
+                    "created_time": record.get("published_time"),
+                    "url": record.get("url", "")
+                })
+            migrated.extend(history)
+
+        helper.update_config(migrate)
+        logging.info(f"已把 {len(migrated)} 条发布历史从配置文件迁移到 {self.db_path}")
+        return len(migrated)
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+周刊发布发件箱
+先把发布任务写入 SQLite，再由后台任务分块上传，崩溃或重启后从最后确认的分块继续
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from notion_helper import NotionHelper
+from notion_payload_validator import PayloadValidationError, get_validator
+from pipeline_metrics import in_current_context, stage
+
+# Notion API 限制一次最多提交 100 个块
+CHUNK_SIZE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publish_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    database_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    week_number INTEGER,
+    properties TEXT NOT NULL,
+    blocks TEXT NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    acked_chunks INTEGER NOT NULL DEFAULT 0,
+    page_id TEXT,
+    page_url TEXT,
+    create_started_at TEXT,
+    batch_id TEXT,
+    hooks_done INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    created_time TEXT NOT NULL,
+    updated_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_publish_jobs_status ON publish_jobs (status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS publish_batches (
+    batch_id TEXT PRIMARY KEY,
+    context TEXT NOT NULL,
+    hooks_done INTEGER NOT NULL DEFAULT 0,
+    created_time TEXT NOT NULL
+);
+"""
+# 旧版发件箱缺少的列
+MIGRATIONS = {
+    "create_started_at": "ALTER TABLE publish_jobs ADD COLUMN create_started_at TEXT",
+    "batch_id": "ALTER TABLE publish_jobs ADD COLUMN batch_id TEXT",
+    # 升级前已完成的任务当时已写入发布历史，不再重复处理
+    "hooks_done": """ALTER TABLE publish_jobs ADD COLUMN hooks_done INTEGER NOT NULL DEFAULT 0;
+                     UPDATE publish_jobs SET hooks_done = 1 WHERE status = 'done';""",
+}
+
+class PublishOutbox:
+    """
+    基于 SQLite 的发布发件箱
+
+    每个分块上传成功后立即记录进度（acked_chunks）。页面创建与第一个分块
+    是同一次请求，之后的分块通过追加子块接口提交。若进程恰好在请求成功、
+    进度落盘之前崩溃，追加的分块会在恢复时重发一次（至少一次语义）。
+
+    同一期发往多个目标的任务属于同一个批次（publish_batches），批次中保存发布完成后
+    需要的上下文（期号、文章等）。任务完成时调用 add_done_callback 注册的回调，
+    无论任务是同步上传、后台线程续传还是其他进程完成的；claim_job / claim_batch
+    保证每个任务、每个批次的完成处理只执行一次。
+
+    创建页面前先记录 create_started_at；恢复时若已有该标记但没有 page_id，
+    先在目标数据库中按标题和创建时间查找上次创建的页面，找到时直接沿用，不会重复创建。
+    """
+
+    def __init__(self, db_path="publish_outbox.db", client=None, max_attempts=5,
+                 retry_base_delay=2.0, lease_seconds=300, validate=True):
+        self.db_path = str(db_path)
+        self._client = client
+        self.validate = validate
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.lease_seconds = lease_seconds
+        self._stop_event = threading.Event()
+        self._drainer = None
+        self._done_callbacks = []
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(publish_jobs)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    conn.executescript(statement)
+
+    @property
+    def client(self):
+        """延迟创建 Notion 客户端，只有真正上传时才需要"""
+        if self._client is None:
+            from notion_client import NotionClient
+            self._client = NotionClient()
+        return self._client
+
+    def _schema_client(self):
+        """拉取 schema 用的客户端；未配置 Token 时只使用配置和本地缓存"""
+        if self._client is None and NotionHelper().has_api_token():
+            return self.client
+        return self._client
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def create_batch(self, context):
+        """
+        新建一个发布批次
+
+        Args:
+            context (dict): 所有任务完成后需要的上下文（可 JSON 序列化）
+
+        Returns:
+            str: 批次ID
+        """
+        batch_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO publish_batches (batch_id, context, created_time) VALUES (?, ?, ?)",
+                (batch_id, json.dumps(context, ensure_ascii=False), datetime.now().isoformat())
+            )
+        return batch_id
+
+    def batch_context(self, batch_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT context FROM publish_batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        return json.loads(row["context"]) if row else None
+
+    def find_batch(self, **match):
+        """
+        按上下文查找最近的发布批次
+
+        Args:
+            **match: 上下文中需要相等的字段，如 year=2025, week_number=21
+
+        Returns:
+            str: 批次ID，没有已入队任务的批次不算，找不到时为 None
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT batch_id, context FROM publish_batches b
+                   WHERE EXISTS (SELECT 1 FROM publish_jobs j WHERE j.batch_id = b.batch_id)
+                   ORDER BY created_time DESC"""
+            ).fetchall()
+        for row in rows:
+            context = json.loads(row["context"])
+            if all(context.get(key) == value for key, value in match.items()):
+                return row["batch_id"]
+        return None
+
+    def batch_jobs(self, batch_id):
+        """批次中的全部任务"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM publish_jobs WHERE batch_id = ? ORDER BY id", (batch_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_batch(self, batch_id):
+        """
+        批次的任务全部完成且尚未处理时返回 True（只有一个调用方能拿到）
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """UPDATE publish_batches SET hooks_done = 1
+                   WHERE batch_id = ? AND hooks_done = 0
+                     AND NOT EXISTS (SELECT 1 FROM publish_jobs WHERE batch_id = ? AND status != 'done')""",
+                (batch_id, batch_id)
+            )
+            return cursor.rowcount == 1
+
+    def completed_batches(self):
+        """全部任务已完成、但还没有执行完成处理的批次"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT batch_id FROM publish_batches b
+                   WHERE hooks_done = 0
+                     AND NOT EXISTS (SELECT 1 FROM publish_jobs j WHERE j.batch_id = b.batch_id AND status != 'done')
+                     AND EXISTS (SELECT 1 FROM publish_jobs j WHERE j.batch_id = b.batch_id)
+                   ORDER BY created_time"""
+            ).fetchall()
+        return [row["batch_id"] for row in rows]
+
+    def claim_job(self, job_id):
+        """
+        任务已完成且尚未处理时返回 True（只有一个调用方能拿到）
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE publish_jobs SET hooks_done = 1 WHERE id = ? AND status = 'done' AND hooks_done = 0",
+                (job_id,)
+            )
+            return cursor.rowcount == 1
+
+    def completed_jobs(self):
+        """已完成、但还没有执行完成处理的任务"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM publish_jobs WHERE status = 'done' AND hooks_done = 0 ORDER BY id"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add_done_callback(self, callback):
+        """注册任务完成时的回调 callback(job)，同一个回调只注册一次"""
+        if callback not in self._done_callbacks:
+            self._done_callbacks.append(callback)
+
+    def _job_done(self, job_id):
+        job = self.get_job(job_id)
+        for callback in list(self._done_callbacks):
+            try:
+                callback(job)
+            except Exception as e:
+                logging.error(f"任务 #{job_id} 完成后的处理出错: {str(e)}")
+
+    def enqueue(self, database_id, title, blocks, week_number=None, title_property="标题",
+                properties=None, batch_id=None):
+        """
+        写入发布任务
+
+        Args:
+            database_id (str): 目标数据库ID
+            title (str): 页面标题
+            blocks (list): 已转换好的 Notion 块
+            week_number (int): 期号
+            title_property (str): 目标数据库的标题属性名
+            properties (dict): 完整的页面属性，提供时忽略 title_property
+            batch_id (str): 所属的发布批次（create_batch）
+
+        Returns:
+            int: 任务ID
+
+        Raises:
+            PayloadValidationError: 请求体存在无法自动修正的问题，任务不会写入
+        """
+        if properties is None:
+            properties = {
+                title_property: {
+                    "title": [{"text": {"content": title}}]
+                }
+            }
+
+        # 入队前按目标数据库的 schema 校验，避免在限流的 API 上浪费请求
+        if self.validate:
+            validator = get_validator(database_id, self._schema_client())
+            properties, blocks, _ = validator.validate_page(properties, blocks)
+
+        total_chunks = max(1, (len(blocks) + CHUNK_SIZE - 1) // CHUNK_SIZE)
+        now = datetime.now().isoformat()
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """INSERT INTO publish_jobs
+                   (database_id, title, week_number, properties, blocks, total_chunks,
+                    batch_id, created_time, updated_time)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (database_id, title, week_number,
+                 json.dumps(properties, ensure_ascii=False),
+                 json.dumps(blocks, ensure_ascii=False),
+                 total_chunks, batch_id, now, now)
+            )
+            job_id = cursor.lastrowid
+
+        logging.info(f"📮 发布任务已写入发件箱: #{job_id} {title} ({total_chunks} 个分块)")
+        return job_id
+
+    def get_job(self, job_id):
+        """获取任务状态"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM publish_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def pending_jobs(self):
+        """列出所有未完成的任务ID"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM publish_jobs WHERE status IN ('pending', 'running') ORDER BY id"
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def _claim(self, job_id, force=False):
+        """抢占任务租约，避免多个进程同时上传同一任务"""
+        now = time.time()
+        condition = "" if force else "AND next_attempt_at <= ?"
+        params = [now + self.lease_seconds, datetime.now().isoformat(), job_id, now]
+        if not force:
+            params.append(now)
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"""UPDATE publish_jobs
+                    SET status = 'running', lease_until = ?, updated_time = ?
+                    WHERE id = ?
+                      AND (status = 'pending' OR (status = 'running' AND lease_until < ?))
+                      {condition}""",
+                params
+            )
+            return cursor.rowcount == 1
+
+    def _update(self, job_id, **fields):
+        fields["updated_time"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE publish_jobs SET {assignments} WHERE id = ?",
+                list(fields.values()) + [job_id]
+            )
+
+    def process_job(self, job_id, force=False):
+        """
+        执行单个任务，从最后确认的分块继续上传
+
+        Args:
+            job_id (int): 任务ID
+            force (bool): 忽略重试等待时间，立即执行
+
+        Returns:
+            dict: 发布结果
+        """
+        if not self._claim(job_id, force=force):
+            job = self.get_job(job_id)
+            if job and job["status"] == "done":
+                return self.job_result(job)
+            return {
+                "success": False,
+                "job_id": job_id,
+                "error": f"任务不可执行: {job['status'] if job else '不存在'}",
+                "retrying": bool(job) and job["status"] in ("pending", "running")
+            }
+
+        job = self.get_job(job_id)
+        blocks = json.loads(job["blocks"])
+        chunks = [blocks[i:i + CHUNK_SIZE] for i in range(0, len(blocks), CHUNK_SIZE)] or [[]]
+        acked = job["acked_chunks"]
+        page_id = job["page_id"]
+
+        try:
+            if acked > 0:
+                logging.info(f"🔁 任务 #{job_id} 从第 {acked + 1}/{len(chunks)} 个分块继续")
+
+            with stage("publish", database_id=job["database_id"]) as span:
+                while acked < len(chunks):
+                    if page_id is None:
+                        page = self._find_created_page(job) if job["create_started_at"] else None
+                        if page is None:
+                            # 先落盘标记再创建：创建成功但 page_id 未落盘时，恢复时据此查找
+                            job["create_started_at"] = (datetime.now(timezone.utc) - timedelta(minutes=1)) \
+                                .strftime("%Y-%m-%dT%H:%M:00.000Z")
+                            self._update(job_id, create_started_at=job["create_started_at"])
+                            page = self.client.create_page(
+                                job["database_id"], json.loads(job["properties"]), chunks[0]
+                            )
+                        page_id = page["id"]
+                        acked = 1
+                        self._update(job_id, page_id=page_id, page_url=page.get("url", ""),
+                                     acked_chunks=acked)
+                    else:
+                        self.client.append_block_children(page_id, chunks[acked])
+                        acked += 1
+                        self._update(job_id, acked_chunks=acked)
+                    span.count += len(chunks[acked - 1])
+
+            self._update(job_id, status="done", last_error=None, lease_until=0)
+            logging.info(f"✅ 任务 #{job_id} 发布完成: {job['title']}")
+            self._job_done(job_id)
+            return self.job_result(self.get_job(job_id))
+
+        except Exception as e:
+            return self._handle_failure(job, e)
+
+    def _find_created_page(self, job):
+        """
+        查找上次尝试时可能已创建的页面：同一标题、创建时间不早于 create_started_at
+
+        Notion 的创建时间精确到分钟，标记已提前一分钟取整；找不到时返回 None
+        """
+        properties = json.loads(job["properties"])
+        title_property = next((name for name, value in properties.items() if "title" in value), None)
+        if title_property is None:
+            return None
+
+        pages = self.client.query_database(job["database_id"], {
+            "and": [
+                {"property": title_property, "title": {"equals": job["title"]}},
+                {"timestamp": "created_time", "created_time": {"on_or_after": job["create_started_at"]}}
+            ]
+        })
+        if not pages:
+            return None
+        logging.info(f"🔁 任务 #{job['id']} 的页面已在上次尝试中创建，沿用 {pages[0]['id']}")
+        return pages[0]
+
+    def _handle_failure(self, job, error):
+        attempts = job["attempts"] + 1
+        transient = getattr(error, "transient", False)
+
+        if transient and attempts < self.max_attempts:
+            delay = getattr(error, "retry_after", None) or self.retry_base_delay * (2 ** (attempts - 1))
+            self._update(job["id"], status="pending", attempts=attempts, last_error=str(error),
+                         next_attempt_at=time.time() + delay, lease_until=0)
+            logging.warning(f"⚠️  任务 #{job['id']} 暂时失败，{delay:.0f} 秒后重试: {error}")
+        else:
+            self._update(job["id"], status="failed", attempts=attempts, last_error=str(error),
+                         lease_until=0)
+            logging.error(f"❌ 任务 #{job['id']} 发布失败: {error}")
+
+        return {
+            "success": False,
+            "job_id": job["id"],
+            "error": str(error),
+            "retrying": transient and attempts < self.max_attempts
+        }
+
+    def job_result(self, job):
+        """把已完成的任务转换为发布结果"""
+        return {
+            "success": True,
+            "job_id": job["id"],
+            "page_id": job["page_id"],
+            "title": job["title"],
+            "database_id": job["database_id"],
+            "created_time": job["updated_time"],
+            "url": job["page_url"] or f"https://notion.so/{job['page_id'].replace('-', '')}"
+        }
+
+    def publish_fanout(self, targets, title, blocks, week_number=None, max_workers=None, dry_run=False):
+        """
+        把同一份块内容并发发布到多个目标数据库
+
+        所有目标共用同一个客户端，因此也共用同一个限速器。
+
+        Args:
+            targets (list): NotionHelper.get_publish_targets() 返回的目标列表
+            title (str): 页面标题
+            blocks (list): 已转换好的 Notion 块
+            week_number (int): 期号
+            max_workers (int): 并发数，默认每个目标一个线程
+            dry_run (bool): 只返回模拟结果，不写入发件箱（未配置 API Token 时）
+
+        Returns:
+            dict: {目标名称: 发布结果}
+        """
+        if dry_run:
+            results = {
+                target["name"]: {
+                    "success": True,
+                    "page_id": f"mock_page_id_{week_number}",
+                    "title": title,
+                    "database_id": target["database_id"],
+                    "created_time": datetime.now().isoformat(),
+                    "url": f"https://notion.so/mock_page_id_{week_number}"
+                }
+                for target in targets
+            }
+            self._log_fanout(results, "模拟发布成功")
+            return results
+
+        results, job_ids = {}, {}
+        for target in targets:
+            try:
+                job_ids[target["name"]] = self.enqueue(
+                    target["database_id"], title, blocks, week_number,
+                    title_property=target["title_property"]
+                )
+            except PayloadValidationError as e:
+                logging.error(f"❌ [{target['name']}] 请求体校验失败: {e}")
+                results[target["name"]] = {"success": False, "error": str(e), "retrying": False}
+
+        if job_ids:
+            with ThreadPoolExecutor(max_workers=max_workers or len(job_ids)) as pool:
+                process_job = in_current_context(self.process_job)
+                futures = {name: pool.submit(process_job, job_id) for name, job_id in job_ids.items()}
+                results.update({name: future.result() for name, future in futures.items()})
+        self._log_fanout(results)
+        return results
+
+    def _log_fanout(self, results, succeeded="发布成功"):
+        for name, result in results.items():
+            if result["success"]:
+                logging.info(f"✅ [{name}] {succeeded}: {result['url']}")
+            else:
+                logging.error(f"❌ [{name}] 发布失败: {result['error']}")
+
+    def requeue(self, job_id):
+        """把失败的任务重新放回队列，已确认的分块不会重复上传"""
+        self._update(job_id, status="pending", attempts=0, next_attempt_at=0, lease_until=0)
+
+    def drain(self, max_workers=4):
+        """
+        并发执行所有到期的任务，所有线程共用客户端的限速器
+
+        Returns:
+            list: 每个任务的发布结果
+        """
+        now = time.time()
+        due = [job_id for job_id in self.pending_jobs()
+               if self.get_job(job_id)["next_attempt_at"] <= now]
+        if not due or self._stop_event.is_set():
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(due))) as pool:
+            return list(pool.map(in_current_context(self.process_job), due))
+
+    def start_drainer(self, interval=30):
+        """启动后台线程，定期执行发件箱中的任务"""
+        if self._drainer and self._drainer.is_alive():
+            return self._drainer
+
+        def run():
+            while not self._stop_event.is_set():
+                try:
+                    self.drain()
+                except Exception as e:
+                    logging.error(f"执行发件箱任务时出错: {str(e)}")
+                self._stop_event.wait(interval)
+
+        self._stop_event.clear()
+        self._drainer = threading.Thread(target=run, name="publish-outbox-drainer", daemon=True)
+        self._drainer.start()
+        logging.info("📮 发件箱后台任务已启动")
+        return self._drainer
+
+    def stop_drainer(self, timeout=None):
+        """停止后台线程"""
+        self._stop_event.set()
+        if self._drainer:
+            self._drainer.join(timeout)
@@ -29,7 +29,7 @@ def publish_with_real_mcp():
         print(f"📄 读取周刊文件: {filename}")
         
         # 创建发布器
-        publisher = WeeklyPublisherMCP("1fc64cadd821806db447fe4e7d4365b7")
+        publisher = WeeklyPublisherMCP()
         
         # 转换为 Notion 块
         blocks = publisher.markdown_to_notion_blocks(content)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+往期相关文章推荐
+为本期的每篇文章找出往期周刊中最相似的一篇，在 generate_section_natural 中附上链接。
+
+所有发布过的文章（标题 + 摘要，用 issue_index.tokenize 切词）组成稀疏的 TF-IDF 矩阵，
+按词保存倒排表。一期周刊的全部文章一起查询：只遍历本期用到的词的倒排表，
+相当于一次稀疏矩阵乘法（本期 × 往期ᵀ），渲染时间几乎不变。每次发布成功后只追加本期文章的
+词频，已有文章不重新切词；倒排表在进程内缓存，文件变化后才重新计算权重
+
+数据保存在 related_articles.json（多份周刊时在各自的工作目录中）
+"""
+
+import copy
+import heapq
+import logging
+import math
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from issue_index import tokenize
+from notion_helper import config_file_lock, read_config, write_config
+from pipeline_metrics import timed_stage
+
+RELATED_FILE = "related_articles.json"
+# 余弦相似度低于这个值时不推荐
+MIN_SIMILARITY = 0.2
+# 出现在超过这个比例的往期文章中的词不参与计算（往期较少时不启用）
+MAX_DF_RATIO = 0.1
+MIN_DOCUMENTS_FOR_MAX_DF = 50
+
+def article_terms(article):
+    """文章的词频，标题计两次"""
+    title = article.get("title") or ""
+    return Counter(tokenize(f"{title} {title} {article.get('summary') or ''}"))
+
+class RelatedArticles:
+    def __init__(self, store_file=RELATED_FILE, min_similarity=MIN_SIMILARITY):
+        self.store_file = Path(store_file)
+        self.min_similarity = min_similarity
+        self._signature = None
+        self._matrix = None
+
+    def _load_matrix(self):
+        """
+        读取往期文章并建立按词的倒排表（权重已按文章的 TF-IDF 范数归一化），文件未变化时复用
+
+        出现在超过 MAX_DF_RATIO 的文章中的词区分度很低，不进入倒排表
+
+        Returns:
+            tuple: (文章列表, {词: [(文章下标, 归一化权重)]}, idf 函数)
+        """
+        try:
+            stat = os.stat(self.store_file)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return [], {}, None
+        if self._signature == signature:
+            return self._matrix
+
+        documents = read_config(self.store_file).get("articles", [])
+        counts = {}
+        for index, document in enumerate(documents):
+            for term, count in document["terms"].items():
+                counts.setdefault(term, []).append((index, count))
+        df = {term: len(entries) for term, entries in counts.items()}
+        idf = self._idf(df, len(documents))
+
+        norms = [0.0] * len(documents)
+        for term, entries in counts.items():
+            weight = idf(term)
+            for index, count in entries:
+                norms[index] += (count * weight) ** 2
+        norms = [math.sqrt(norm) or 1.0 for norm in norms]
+
+        max_df = max(MIN_DOCUMENTS_FOR_MAX_DF, MAX_DF_RATIO * len(documents))
+        postings = {
+            term: [(index, count * idf(term) / norms[index]) for index, count in entries]
+            for term, entries in counts.items() if len(entries) <= max_df
+        }
+
+        self._signature = signature
+        self._matrix = (documents, postings, idf)
+        return self._matrix
+
+    @staticmethod
+    def _idf(df, total):
+        def idf(term):
+            return math.log((1 + total) / (1 + df.get(term, 0))) + 1
+        return idf
+
+    def __len__(self):
+        return len(self._load_matrix()[0])
+
+    @timed_stage(name="related_articles", count=lambda results, *_, **__: sum(1 for match in results if match))
+    def related_for(self, articles, k=1):
+        """
+        批量查询每篇文章在往期中最相似的 k 篇
+
+        Args:
+            articles (list): 本期文章
+            k (int): 每篇返回的数量
+
+        Returns:
+            list: 与 articles 一一对应，每项为 [{title, url, issue, score}]（可能为空）
+        """
+        documents, postings, idf = self._load_matrix()
+        if not documents or not articles:
+            return [[] for _ in articles]
+
+        # 本期的词 → [(本期文章下标, 归一化权重)]，每个词的往期倒排表只遍历一次
+        query_postings = {}
+        for query_index, article in enumerate(articles):
+            weights = {term: count * idf(term) for term, count in article_terms(article).items()}
+            norm = math.sqrt(sum(weight ** 2 for weight in weights.values())) or 1.0
+            for term, weight in weights.items():
+                if term in postings:
+                    query_postings.setdefault(term, []).append((query_index, weight / norm))
+
+        scores = [{} for _ in articles]
+        for term, queries in query_postings.items():
+            entries = postings[term]
+            for query_index, query_weight in queries:
+                row = scores[query_index]
+                get = row.get
+                for index, weight in entries:
+                    row[index] = get(index, 0.0) + query_weight * weight
+
+        results = []
+        for query_index, article in enumerate(articles):
+            own_url = article.get("url")
+            candidates = (
+                (score, index) for index, score in scores[query_index].items()
+                if documents[index].get("url") != own_url
+            )
+            top = heapq.nlargest(k, candidates)
+            results.append([
+                {"title": documents[index]["title"], "url": documents[index].get("url", ""),
+                 "issue": documents[index].get("issue", ""), "score": round(similarity, 4)}
+                for similarity, index in top if similarity >= self.min_similarity
+            ])
+        return results
+
+    def add_issue(self, articles, week_number, year=None):
+        """
+        发布成功后追加本期文章（按链接去重），不重建已有数据
+
+        Returns:
+            int: 新增的文章数
+        """
+        year = year or datetime.now().isocalendar()[0]
+        with config_file_lock(self.store_file):
+            store = copy.deepcopy(read_config(self.store_file)) or {"articles": []}
+            known = {document.get("url") or document["title"] for document in store["articles"]}
+
+            added = 0
+            for article in articles:
+                key = article.get("url") or article.get("title")
+                if not key or key in known:
+                    continue
+                known.add(key)
+                store["articles"].append({
+                    "title": article.get("title", ""),
+                    "url": article.get("url", ""),
+                    "issue": f"第{week_number:02d}期",
+                    "year": year,
+                    "week_number": week_number,
+                    "terms": dict(article_terms(article))
+                })
+                added += 1
+
+            if added:
+                write_config(self.store_file, store)
+
+        if added:
+            logging.info(f"🔗 往期相关推荐新增 {added} 篇文章，共 {len(store['articles'])} 篇")
+        return added
+
+    def import_history(self, history):
+        """
+        从发布历史导入往期文章（只有标题和链接），用于首次启用时补齐
+
+        Args:
+            history (PublishHistory): 发布历史
+        """
+        added = 0
+        for record in history.iter_records():
+            if record.get("week_number"):
+                added += self.add_issue(record["articles"], record["week_number"], record.get("year"))
+        return added
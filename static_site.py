@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+往期周刊静态站点
+把目录中的全部周刊文件渲染为静态 HTML 归档，不依赖 CDN，可直接放到任意静态托管:
+
+    site/index.html                 全部往期列表
+    site/issues/<期号>-<日期>.html   每期一页
+    site/categories/<分类>.html      按分类汇总的往期文章
+    site/feed.xml                   Atom 订阅（最近 20 期，issue_exporters.AtomFeed 滚动更新）
+    site/manifest.json              增量构建清单
+
+每个文件都同时写一份 .gz（内容不变时不重写），静态服务器可以直接返回预压缩的版本。
+
+构建是增量的：清单记录每个周刊文件的 mtime、大小、内容哈希和解析结果，以及每个输出文件的
+内容哈希。新增第 N 期时只渲染这一期的页面、首页和它涉及的分类页，订阅中只插入这一期的条目，
+往期页面不重新读取也不重新写入。模板变化（SITE_VERSION）或 --full 时全部重建
+
+在 notion_config.json 的 notion 中设置 "site_url" 后，周刊结尾的「往期周刊」会链接到站点首页
+
+用法:
+    python weekly_cli.py site [--full]
+"""
+
+import gzip
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from urllib.parse import quote
+from issue_exporters import AtomFeed, atom_entry, is_safe_url, markdown_to_html
+from issue_index import TITLE_RE, issue_files
+from pipeline_metrics import timed_stage
+
+SITE_DIR = "site"
+MANIFEST_FILE = "manifest.json"
+# 修改模板或解析逻辑后加一，下次构建时全部重建
+SITE_VERSION = 2
+
+ISSUE_NUMBER_RE = re.compile(r"第(\d+)期")
+FILE_DATE_RE = re.compile(r"_(\d{8})\.md$")
+FOOTER_DATE_RE = re.compile(r"(\d{4})年(\d{2})月(\d{2})日")
+ARTICLE_LINK_RE = re.compile(r"\*\*原文链接\*\*:\s*\[([^\]]+)\]\(([^)\s]+)\)")
+SECTION_RE = re.compile(r"^##\s+(.+)$")
+# 不是文章分类的固定栏目
+FIXED_SECTIONS = ("本周导读", "本周推荐", "本周趋势", "写在最后")
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title}</title>
+<link rel="alternate" type="application/atom+xml" title="{site_title}" href="{root}feed.xml">
+<style>
+body {{ margin: 0; background: #f3f4f6; color: #1f2937; font: 16px/1.75 -apple-system, "PingFang SC", "Noto Sans SC", sans-serif; }}
+header {{ background: linear-gradient(135deg, #10b981, #064e3b); color: #fff; padding: 32px 24px; }}
+header a {{ color: #fff; text-decoration: none; }}
+main {{ max-width: 760px; margin: 0 auto; padding: 24px; background: #fff; }}
+a {{ color: #047857; }}
+blockquote {{ margin: 0; padding-left: 16px; border-left: 4px solid #10b981; color: #4b5563; }}
+.meta {{ color: #6b7280; font-size: 14px; }}
+</style>
+</head>
+<body>
+<header><a href="{root}index.html"><strong>{site_title}</strong></a> · 往期周刊</header>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+# ---- 解析 ----
+
+def section_name(heading):
+    """去掉栏目标题前的 emoji"""
+    return re.sub(r"^[^\w&]+", "", heading).strip()
+
+def category_slug(name):
+    return re.sub(r'[\\/:*?"<>|&\s]+', "-", name).strip("-") or "未分类"
+
+def article_link(article):
+    """分类页中的文章链接，不是 http、https 或 mailto 地址时只显示标题"""
+    title = html.escape(article["title"])
+    if not is_safe_url(article["url"]):
+        return title
+    return f'<a href="{html.escape(article["url"])}">{title}</a>'
+
+def issue_date(path, content):
+    """期刊日期：文件名中的日期、结尾的日期，都没有时用文件修改时间"""
+    match = FILE_DATE_RE.search(os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), "%Y%m%d").date()
+    match = FOOTER_DATE_RE.search(content)
+    if match:
+        return date(*map(int, match.groups()))
+    return datetime.fromtimestamp(os.path.getmtime(path)).date()
+
+def parse_issue(path, content):
+    """
+    周刊文件的元数据：标题、期号、日期、导语和按分类的文章
+
+    Returns:
+        dict: {title, number, date, slug, tagline, categories: {分类: [{title, url}]}}
+    """
+    title_match = TITLE_RE.search(content)
+    title = title_match.group(1).strip() if title_match else Path(path).stem
+    number_match = ISSUE_NUMBER_RE.search(title) or ISSUE_NUMBER_RE.search(Path(path).stem)
+    number = int(number_match.group(1)) if number_match else 0
+    published = issue_date(path, content)
+
+    tagline = ""
+    categories, current = {}, None
+    for line in content.split('\n'):
+        line = line.strip()
+        if line.startswith('> ') and not tagline:
+            tagline = line[2:]
+        heading = SECTION_RE.match(line)
+        if heading:
+            name = section_name(heading.group(1))
+            current = None if name in FIXED_SECTIONS else name
+            continue
+        article = ARTICLE_LINK_RE.search(line)
+        if article and current:
+            categories.setdefault(current, []).append({"title": article.group(1), "url": article.group(2)})
+
+    return {
+        "title": title,
+        "number": number,
+        "date": published.isoformat(),
+        "slug": f"{number:02d}-{published.strftime('%Y%m%d')}",
+        "tagline": tagline,
+        "categories": categories,
+    }
+
+# ---- 构建 ----
+
+class StaticSite:
+    def __init__(self, output_dir=SITE_DIR, site_title="超级个体周刊", site_url=None):
+        """
+        Args:
+            output_dir (str): 站点目录
+            site_title (str): 站点标题（周刊名）
+            site_url (str): 站点的公开地址，订阅中的链接使用绝对地址；未设置时使用相对地址
+        """
+        self.output_dir = Path(output_dir)
+        self.site_title = site_title
+        self.site_url = (site_url or "").rstrip("/")
+        self.manifest_path = self.output_dir / MANIFEST_FILE
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+        if manifest.get("version") != SITE_VERSION:
+            return {"version": SITE_VERSION, "issues": {}, "outputs": {}}
+        return manifest
+
+    def save_manifest(self, manifest):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def write_output(self, manifest, relative_path, text, written):
+        """写入输出文件和 .gz；内容与上次构建相同时跳过"""
+        data = text.encode('utf-8')
+        digest = hashlib.sha1(data).hexdigest()
+        path = self.output_dir / relative_path
+        if manifest["outputs"].get(relative_path) == digest and path.exists():
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # mtime=0 让相同内容得到相同的 .gz
+        for target, payload in ((path, data), (Path(f"{path}.gz"), gzip.compress(data, 9, mtime=0))):
+            tmp_path = target.with_name(target.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, target)
+        manifest["outputs"][relative_path] = digest
+        written.append(relative_path)
+
+    def remove_output(self, manifest, relative_path):
+        for target in (self.output_dir / relative_path, self.output_dir / f"{relative_path}.gz"):
+            if target.exists():
+                target.unlink()
+        manifest["outputs"].pop(relative_path, None)
+
+    def page(self, title, body, depth=0):
+        return PAGE_TEMPLATE.format(title=html.escape(title), site_title=html.escape(self.site_title),
+                                    root="../" * depth, body=body)
+
+    def url(self, relative_path):
+        return f"{self.site_url}/{relative_path}" if self.site_url else relative_path
+
+    @timed_stage(name="static_site", count=lambda result, *_, **__: len(result["written"]))
+    def build(self, directory=".", full=False):
+        """
+        增量构建站点
+
+        Args:
+            directory (str): 周刊文件所在目录
+            full (bool): 忽略清单，全部重建
+
+        Returns:
+            dict: {issues, changed, removed, written: [输出文件]}
+        """
+        manifest = self.load_manifest()
+        feed = AtomFeed(self.output_dir / "feed.xml", self.site_title, self.url("index.html"),
+                        self.url("") or f"urn:weekly:{self.site_title}", compress=True)
+        if full or not manifest["outputs"]:
+            # 全部重建时订阅也从空开始
+            manifest = {"version": SITE_VERSION, "issues": {}, "outputs": {}}
+            if feed.feed_path.exists():
+                feed.remove(entry_id for entry_id, _, _ in feed.entries())
+        previous = manifest["issues"]
+        issues, changed, written = {}, [], []
+        feed_entries, stale_ids = [], []
+
+        for path in issue_files(directory):
+            stat = os.stat(path)
+            entry = previous.get(path)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                issues[path] = entry
+                continue
+
+            with open(path, encoding='utf-8') as f:
+                content = f.read()
+            digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if entry and entry["digest"] == digest:
+                # 只是修改时间变了
+                issues[path] = dict(entry, mtime=stat.st_mtime, size=stat.st_size)
+                continue
+
+            meta = parse_issue(path, content)
+            issues[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "digest": digest, "meta": meta}
+            changed.append(path)
+            if entry and entry["meta"]["slug"] != meta["slug"]:
+                self.remove_output(manifest, f"issues/{entry['meta']['slug']}.html")
+                stale_ids.append(self.entry_id(entry["meta"]))
+            issue_html = markdown_to_html(content)
+            body = f'<p class="meta">{meta["date"]} · <a href="../index.html">全部往期</a></p>\n' + issue_html
+            self.write_output(manifest, f"issues/{meta['slug']}.html", self.page(meta["title"], body, 1), written)
+            feed_entries.append(atom_entry(self.entry_id(meta), meta["title"], self.url(f"issues/{meta['slug']}.html"),
+                                           f"{meta['date']}T00:00:00Z", issue_html))
+
+        removed = [path for path in previous if path not in issues]
+        for path in removed:
+            self.remove_output(manifest, f"issues/{previous[path]['meta']['slug']}.html")
+            stale_ids.append(self.entry_id(previous[path]["meta"]))
+
+        manifest["issues"] = issues
+        if changed or removed or not self.manifest_path.exists():
+            # 只重建受影响的分类页
+            touched = set()
+            for path in changed + removed:
+                for entry in (previous.get(path), issues.get(path)):
+                    if entry:
+                        touched.update(entry["meta"]["categories"])
+            self.write_indexes(manifest, touched, written)
+            # 订阅只插入变化的几期，往期条目原样保留
+            if stale_ids:
+                feed.remove(stale_ids)
+            feed.add(feed_entries)
+            written.append("feed.xml")
+        self.save_manifest(manifest)
+
+        result = {"issues": len(issues), "changed": len(changed), "removed": len(removed), "written": written}
+        if written or removed:
+            logging.info(f"🌐 往期站点: {len(changed)} 期有变化，删除 {len(removed)} 期，写入 {len(written)} 个文件")
+        return result
+
+    def entry_id(self, meta):
+        """订阅条目的 id：配置了站点地址时为页面地址"""
+        return self.url(f"issues/{meta['slug']}.html") if self.site_url else f"urn:weekly:{meta['slug']}"
+
+    def sorted_issues(self, manifest):
+        metas = [entry["meta"] for entry in manifest["issues"].values()]
+        return sorted(metas, key=lambda meta: (meta["date"], meta["number"]), reverse=True)
+
+    def write_indexes(self, manifest, categories, written):
+        """首页和给定分类的分类页"""
+        issues = self.sorted_issues(manifest)
+
+        items = []
+        for meta in issues:
+            articles = sum(len(entries) for entries in meta["categories"].values())
+            items.append(f'<li><a href="issues/{meta["slug"]}.html">{html.escape(meta["title"])}</a> '
+                         f'<span class="meta">{meta["date"]} · {articles} 篇</span></li>')
+        all_categories = sorted({name for meta in issues for name in meta["categories"]})
+        links = " · ".join(f'<a href="categories/{quote(category_slug(name))}.html">{html.escape(name)}</a>'
+                           for name in all_categories)
+        body = f"<h1>{html.escape(self.site_title)} · 往期</h1>\n<p>{links}</p>\n<ul>\n" + "\n".join(items) + "\n</ul>"
+        self.write_output(manifest, "index.html", self.page(f"{self.site_title} · 往期", body), written)
+
+        for name in categories:
+            relative_path = f"categories/{category_slug(name)}.html"
+            entries = [(meta, article) for meta in issues for article in meta["categories"].get(name, [])]
+            if not entries:
+                self.remove_output(manifest, relative_path)
+                continue
+            items = [f'<li>{article_link(article)} '
+                     f'<span class="meta"><a href="../issues/{meta["slug"]}.html">第{meta["number"]:02d}期</a></span></li>'
+                     for meta, article in entries]
+            body = f"<h1>{html.escape(name)}</h1>\n<ul>\n" + "\n".join(items) + "\n</ul>"
+            self.write_output(manifest, relative_path, self.page(name, body, 1), written)
+
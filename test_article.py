@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+测试紧凑的文章记录
+"""
+
+import json
+import sys
+from article import Article, Importance
+from weekly_generator import WeeklyGenerator
+
+def make_record(index):
+    return {
+        "page_id": f"page-{index}",
+        "title": f"Claude 大模型推理能力评测 #{index}",
+        "summary": "本文讨论了 **Agent** 工作流的关键做法。",
+        "url": f"https://example.com/claude/{index}",
+        "category": "AI大模型",
+        "importance": "高",
+        "archived_date": "2025-05-19"
+    }
+
+def test_article_behaves_like_dict():
+    """dict 风格读取、比较和 JSON 序列化与原来的 dict 一致"""
+    print("🧪 测试文章记录")
+    print("=" * 40)
+
+    record = dict(make_record(1), tags=["AI", "评测"], source="mock")
+    article = Article.from_dict(record)
+
+    assert article["title"] == record["title"]
+    assert article.get("importance") == "高" and article.importance is Importance.HIGH
+    assert article.get("missing", "默认") == "默认"
+    assert "newsletter_category" not in article and "source" in article
+    assert article == record and record == article
+    assert json.loads(json.dumps(dict(article), ensure_ascii=False)) == record
+
+    article["newsletter_category"] = "AI前沿动态"
+    assert dict(article, newsletter_category="本周AI工具")["newsletter_category"] == "本周AI工具"
+    assert f"{article.importance}" == "高"
+
+def test_repeated_values_are_shared_and_compact():
+    """分类和日期在文章之间共享同一个字符串，单篇开销远小于 dict"""
+    # 模拟 JSON 解析出的独立字符串对象
+    first = Article.from_dict({**make_record(1), "category": "".join(["AI", "大模型"])})
+    second = Article.from_dict({**make_record(2), "category": "".join(["AI", "大", "模型"])})
+    assert first.category is second.category
+    assert first.archived_date is second.archived_date
+
+    dict_size = sys.getsizeof(make_record(1))
+    article_size = sys.getsizeof(first)
+    print(f"单篇容器大小: dict {dict_size} 字节，Article {article_size} 字节")
+    assert article_size * 2 < dict_size
+
+def test_generator_accepts_articles():
+    """生成器可以直接使用 Article"""
+    articles = [Article.from_dict(make_record(index)) for index in range(3)]
+    content = WeeklyGenerator().generate_weekly_content_from_articles(articles, 21)
+    assert "Claude 大模型推理能力评测 #0" in content
+    assert "如果你只能看一篇" in content
+
+if __name__ == "__main__":
+    test_article_behaves_like_dict()
+    test_repeated_values_are_shared_and_compact()
+    test_generator_accepts_articles()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+测试列式文章归档（需要 numpy）
+"""
+
+import os
+import random
+import tempfile
+from datetime import datetime
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from article_archive import ArticleArchive, export_archive, write_archive
+from notion_mock_server import make_article_page, matches_filter
+from notion_query_helper import NotionQueryHelper, clear_query_cache
+
+ARTICLES = [
+    {"page_id": "a", "title": "大模型推理优化", "summary": "**KV cache** 的复用", "url": "https://example.com/a",
+     "category": "AI大模型", "importance": "高", "archived_date": "2025-04-28"},
+    {"page_id": "b", "title": "Cursor 工具评测", "summary": "AI 编程工具", "url": "https://example.com/b",
+     "category": "AI工具", "importance": "高", "archived_date": "2025-05-06"},
+    {"page_id": "c", "title": "增长飞轮", "summary": "留存与转化", "url": "https://example.com/c",
+     "category": "增长&运营", "importance": "中", "archived_date": "2025-05-07"},
+    {"page_id": "d", "title": "设计系统", "summary": "", "url": "",
+     "category": "", "importance": "", "archived_date": ""},
+]
+
+def test_archive_roundtrip_and_aggregations():
+    """导出后内存映射加载，按条件统计，并只为选中的行还原文章"""
+    print("🧪 测试列式归档")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_dir = os.path.join(tmp, "archive")
+        write_archive(ARTICLES, archive_dir)
+        # 再次导出会整体替换旧归档
+        meta = write_archive(ARTICLES, archive_dir)
+        assert meta["count"] == 4 and not os.path.exists(f"{archive_dir}.tmp")
+
+        archive = ArticleArchive(archive_dir)
+        assert isinstance(archive.date, np.memmap)
+
+        mask = archive.mask(category="AI", importance="高")
+        counts = archive.count_by("month", mask)
+        print(f"高重要度 AI 文章: {counts}")
+        assert counts == {"2025-04": 1, "2025-05": 1}
+        assert archive.count_by("week", mask) == {"2025-W18": 1, "2025-W19": 1}
+        assert archive.count_by("importance") == {"未设置": 1, "高": 2, "中": 1}
+        assert archive.mask(start="2025-05-01", end="2025-05-06").sum() == 1
+
+        rows = archive.rows(archive.mask(category="增长"))
+        assert [row["title"] for row in rows] == ["增长飞轮"]
+        assert rows[0] == ARTICLES[2]
+        assert archive.text("summary", 0) == "**KV cache** 的复用"
+
+class FilteringClient:
+    """按查询条件过滤页面的客户端（与替身服务器相同的过滤实现）"""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def query_database(self, database_id, filter_conditions=None, page_size=100):
+        return [page for page in self.pages if matches_filter(page, filter_conditions)]
+
+def test_export_includes_published_articles():
+    """入选过周刊、状态已改为"已发布"的文章也会导出，未归档的文章不导出"""
+    clear_query_cache()
+    rng = random.Random(7)
+    pages = [make_article_page(index, datetime(2025, 5, 19), status, rng)
+             for index, status in enumerate(["已归档", "已发布", "待阅读"])]
+    query_helper = NotionQueryHelper(client=FilteringClient(pages), database_id="db-archive-export")
+    with tempfile.TemporaryDirectory() as tmp:
+        assert export_archive(query_helper, os.path.join(tmp, "archive"))["count"] == 2
+    clear_query_cache()
+
+if __name__ == "__main__":
+    test_archive_roundtrip_and_aggregations()
+    test_export_includes_published_articles()
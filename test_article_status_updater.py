@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+测试文章状态批量更新
+"""
+
+import threading
+from article_status_updater import ArticleStatusUpdater
+
+class FakeAPIError(Exception):
+    """与 NotionAPIError 相同的重试判断接口"""
+
+    def __init__(self, status):
+        super().__init__(f"[{status}] 模拟失败")
+        self.status = status
+        self.retry_after = None
+        self.transient = status in (429, 500, 502, 503, 504)
+
+class FakeClient:
+    """按页面预设失败：{page_id: [状态码, ...]}，依次失败后成功"""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.updates = []
+        self.lock = threading.Lock()
+
+    def update_page(self, page_id, properties):
+        with self.lock:
+            self.updates.append((page_id, properties))
+            pending = self.failures.get(page_id)
+            status = pending.pop(0) if pending else None
+        if status:
+            raise FakeAPIError(status)
+        return {"id": page_id}
+
+def test_mark_published_report():
+    """暂时性错误重试后成功，永久错误不重试，没有 page_id 的文章跳过"""
+    print("🧪 测试文章状态更新")
+    print("=" * 40)
+
+    client = FakeClient({"b": [503, 429], "c": [400]})
+    updater = ArticleStatusUpdater(client=client, retry_base_delay=0)
+    articles = [{"page_id": page_id, "title": f"文章{page_id}"} for page_id in ("a", "b", "c")]
+    articles.append({"title": "手动添加的文章"})
+
+    report = updater.mark_published(articles)
+    print(report)
+    assert (report["total"], report["updated"], report["skipped"], report["retries"]) == (4, 2, 1, 2)
+    assert [(outcome["page_id"], outcome["attempts"]) for outcome in report["failed"]] == [("c", 1)]
+    assert "[400]" in report["failed"][0]["error"]
+
+    updated = sorted(page_id for page_id, _ in client.updates)
+    assert updated == ["a", "b", "b", "b", "c"]
+    assert client.updates[0][1] == {"状态": {updater.property_type: {"name": "已发布"}}}
+
+def test_retries_are_bounded():
+    """持续的暂时性错误最多尝试 max_attempts 次"""
+    client = FakeClient({"a": [503] * 5})
+    report = ArticleStatusUpdater(client=client, max_attempts=3, retry_base_delay=0).mark_published(
+        [{"page_id": "a", "title": "文章a"}])
+    assert report["updated"] == 0 and report["retries"] == 2
+    assert report["failed"][0]["attempts"] == 3 and len(client.updates) == 3
+
+def test_nothing_to_update():
+    """全部文章都没有 page_id 时不调用接口"""
+    client = FakeClient()
+    report = ArticleStatusUpdater(client=client).mark_published([{"title": "文章"}])
+    assert (report["total"], report["updated"], report["skipped"], report["failed"]) == (1, 0, 1, [])
+    assert client.updates == []
+
+if __name__ == "__main__":
+    test_mark_published_report()
+    test_retries_are_bounded()
+    test_nothing_to_update()
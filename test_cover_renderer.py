@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+测试封面渲染
+"""
+
+import os
+import tempfile
+import pytest
+from cover_renderer import COVER_SIZES, cover_key, cover_path, issue_cover_spec, plan_covers, prune_stale_covers
+
+def test_issue_cover_spec():
+    """从周刊文件取出期号、第一篇文章标题和栏目，固定栏目不作为标签"""
+    print("🧪 测试封面渲染")
+    print("=" * 40)
+
+    spec = issue_cover_spec("超级个体周刊_第21期_20250523.md")
+    print(spec)
+    assert spec["title"] == "超级个体周刊"
+    assert spec["issue"] == 21 and spec["date"] == "20250523"
+    assert spec["headline"] == "Claude 3.5 Sonnet 深度体验报告"
+    assert spec["tags"][:2] == ["AI前沿动态", "运营&增长"]
+    assert "本周导读" not in spec["tags"]
+    assert issue_cover_spec("超级个体周刊PRD.md") is None
+
+def test_cover_key_changes_with_content():
+    """内容、封面种类变化时缓存键随之变化"""
+    spec = {"title": "超级个体周刊", "issue": 21, "headline": "多邻国如何重燃用户增长", "tags": ["增长"]}
+    assert cover_key(spec, "main") == cover_key(dict(spec), "main")
+    assert cover_key(spec, "main") != cover_key(spec, "square")
+    assert cover_key(spec, "main") != cover_key({**spec, "headline": "另一篇文章"}, "main")
+
+    # 期号每年重新编号，文件名带上日期，不同年份的同一期不会互相覆盖
+    this_year = cover_path({**spec, "date": "20250523"}, "main").name
+    last_year = cover_path({**spec, "date": "20240524"}, "main").name
+    assert this_year.startswith("第21期_20250523_main_") and last_year.startswith("第21期_20240524_main_")
+
+def touch(path):
+    with open(path, 'wb') as f:
+        f.write(b"")
+
+def test_cache_and_prune_without_pillow():
+    """已有的封面不再绘制；内容变化后只删除同一期同种封面的旧版本（不需要 Pillow）"""
+    specs = [{"title": "超级个体周刊", "issue": 2, "date": date, "headline": "导读", "tags": []}
+             for date in ("20250523", "20240524")]
+    with tempfile.TemporaryDirectory() as tmp:
+        covers, jobs = plan_covers(specs, tmp)
+        assert len(jobs) == len(specs) * len(COVER_SIZES)
+        for cover in covers:
+            for kind in COVER_SIZES:
+                touch(cover[kind])
+        undated = cover_path({**specs[0], "date": None}, "main", tmp)
+        touch(undated)
+
+        # 全部命中缓存
+        assert plan_covers(specs, tmp) == (covers, [])
+
+        # 换了字体后需要重新绘制
+        font = os.path.join(tmp, "font.otf")
+        touch(font)
+        assert len(plan_covers(specs, tmp, font)[1]) == len(specs) * len(COVER_SIZES)
+
+        # 换了导读标题后重新绘制，旧版本在绘制完成后删除
+        changed = [{**specs[0], "headline": "新的标题"}]
+        new_covers, jobs = plan_covers(changed, tmp)
+        assert [job[1] for job in jobs] == list(COVER_SIZES)
+        for kind in COVER_SIZES:
+            touch(new_covers[0][kind])
+
+        assert prune_stale_covers(changed, new_covers, tmp) == len(COVER_SIZES)
+        names = set(os.listdir(tmp))
+        assert {os.path.basename(new_covers[0][kind]) for kind in COVER_SIZES} <= names
+        assert not {os.path.basename(covers[0][kind]) for kind in COVER_SIZES} & names
+        # 另一年的同一期和不带日期的同一期都不受影响
+        assert {os.path.basename(covers[1][kind]) for kind in COVER_SIZES} <= names
+        assert undated.name in names
+
+def test_render_and_cache():
+    """渲染两种尺寸的封面，第二次全部复用缓存"""
+    pytest.importorskip("PIL")
+    from PIL import Image
+    from cover_renderer import COVER_SIZES, find_font, render_covers
+    if find_font() is None:
+        pytest.skip("没有中文字体")
+
+    specs = [{"title": "超级个体周刊", "issue": number, "headline": f"第{number}期的导读标题，足够长以测试自动折行和截断",
+              "tags": ["AI前沿动态", "运营&增长"]} for number in (1, 2)]
+    with tempfile.TemporaryDirectory() as tmp:
+        result = render_covers(specs, tmp, workers=2)
+        assert result["rendered"] == 4 and result["cached"] == 0
+        for cover in result["covers"]:
+            for kind, size in COVER_SIZES.items():
+                with Image.open(cover[kind]) as image:
+                    assert image.size == size
+                    # 左上角是渐变的起点色 #10b981
+                    assert image.getpixel((0, size[1] // 2))[1] > image.getpixel((size[0] - 1, size[1] // 2))[1]
+
+        again = render_covers(specs, tmp)
+        assert again["rendered"] == 0 and again["cached"] == 4
+
+        # 标题变化后重新渲染，旧图片被替换
+        render_covers([{**specs[0], "headline": "新的标题"}], tmp, workers=1)
+        assert len([name for name in os.listdir(tmp) if name.startswith("第01期_main_")]) == 1
+
+        # 另一年的同一期不会删掉今年的封面
+        dated = [{**spec, "date": date} for spec, date in ((specs[1], "20250523"), (specs[1], "20240524"))]
+        render_covers(dated, tmp, workers=2)
+        render_covers([{**dated[0], "headline": "新的标题"}], tmp, workers=1)
+        names = os.listdir(tmp)
+        assert len([name for name in names if name.startswith("第02期_20250523_main_")]) == 1
+        assert len([name for name in names if name.startswith("第02期_20240524_main_")]) == 1
+        assert len([name for name in names if name.startswith("第02期_main_")]) == 1
+
+def test_refuses_without_font():
+    """没有中文字体时不渲染（默认字体只会画出方框）"""
+    pytest.importorskip("PIL")
+    import cover_renderer
+
+    saved = cover_renderer.FONT_CANDIDATES, os.environ.pop("WEEKLY_COVER_FONT", None)
+    cover_renderer.FONT_CANDIDATES = []
+    try:
+        spec = {"title": "超级个体周刊", "issue": 21, "headline": "导读", "tags": []}
+        with tempfile.TemporaryDirectory() as tmp:
+            with pytest.raises(RuntimeError):
+                cover_renderer.render_covers([spec], tmp)
+            assert os.listdir(tmp) == []
+    finally:
+        cover_renderer.FONT_CANDIDATES = saved[0]
+        if saved[1] is not None:
+            os.environ["WEEKLY_COVER_FONT"] = saved[1]
+
+if __name__ == "__main__":
+    test_issue_cover_spec()
+    test_cover_key_changes_with_content()
+    test_cache_and_prune_without_pillow()
+    test_render_and_cache()
+    test_refuses_without_font()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+测试草稿预热的增量同步
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from draft_pipeline import DraftPipeline
+from notion_helper import config_file_lock
+from weekly_generator import WeeklyGenerator
+
+class FakeQueryHelper:
+    """按编辑时间返回文章，记录每次查询的水位"""
+
+    def __init__(self):
+        self.batches = []
+        self.calls = []
+
+    def get_archived_articles_for_week(self, year, week_number, edited_since=None, raise_errors=False):
+        self.calls.append(edited_since)
+        return self.batches.pop(0) if self.batches else []
+
+def make_article(page_id, title, category):
+    return {"page_id": page_id, "title": title, "summary": f"{title} 的摘要",
+            "url": f"https://example.com/{page_id}", "category": category, "importance": "中"}
+
+def test_sync_is_incremental():
+    """第二次同步只带水位查询，新文章合并进草稿，定稿沿用已有分类"""
+    print("🧪 测试草稿增量同步")
+    print("=" * 40)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy("notion_config.example.json", os.path.join(tmp, "notion_config.json"))
+        os.chdir(tmp)
+        try:
+            query_helper = FakeQueryHelper()
+            pipeline = DraftPipeline("drafts", query_helper=query_helper, generator=WeeklyGenerator())
+
+            query_helper.batches.append([make_article("a", "大模型推理优化", "AI大模型")])
+            first = pipeline.sync(2025, 21)
+            assert query_helper.calls == [None]
+            assert first["added"] == 1
+
+            query_helper.batches.append([make_article("b", "增长实验复盘", "增长&运营")])
+            second = pipeline.sync(2025, 21)
+            assert query_helper.calls[1] is not None
+            assert (second["added"], second["total"]) == (1, 2)
+
+            content, articles = pipeline.finalize(2025, 21)
+            print(f"草稿文章: {[article['title'] for article in articles]}")
+            assert {article["newsletter_category"] for article in articles} == {"AI前沿动态", "运营&增长"}
+            assert "大模型推理优化" in content and "增长实验复盘" in content
+        finally:
+            os.chdir(cwd)
+
+class BlockingQueryHelper(FakeQueryHelper):
+    """查询期间在另一个线程中锁定草稿文件，查询持有锁时会超时"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.lock_acquired = False
+
+    def get_archived_articles_for_week(self, year, week_number, edited_since=None, raise_errors=False):
+        acquired = threading.Event()
+
+        def lock_draft():
+            with config_file_lock(self.path):
+                acquired.set()
+
+        thread = threading.Thread(target=lock_draft)
+        thread.start()
+        self.lock_acquired = acquired.wait(2)
+        thread.join(5)
+        return [make_article("a", "大模型推理优化", "AI大模型")]
+
+def test_query_runs_outside_lock():
+    """查询和分类时不持有草稿锁，只在合并写入时加锁"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = DraftPipeline(os.path.join(tmp, "drafts"), generator=WeeklyGenerator())
+        query_helper = BlockingQueryHelper(pipeline.draft_path(2025, 21))
+        pipeline._query_helper = query_helper
+        assert pipeline.sync(2025, 21)["added"] == 1
+        assert query_helper.lock_acquired
+
+if __name__ == "__main__":
+    test_sync_is_incremental()
+    test_query_runs_outside_lock()
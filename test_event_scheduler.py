@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+测试事件驱动调度器的到期时间计算与补跑
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from event_scheduler import EventScheduler, WeeklyAt
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_weekly_trigger():
+    """每周日 09:00 的上一次和下一次到期时间"""
+    print("🧪 测试到期时间计算")
+    print("=" * 40)
+
+    trigger = WeeklyAt("sunday", "09:00")
+    # 2025-05-21 是周三
+    now = datetime(2025, 5, 21, 12, 0)
+    assert trigger.previous(now) == datetime(2025, 5, 18, 9, 0)
+    assert trigger.next(now) == datetime(2025, 5, 25, 9, 0)
+
+    # 正好在到期时刻
+    due = datetime(2025, 5, 25, 9, 0)
+    assert trigger.previous(due) == due
+    assert trigger.next(due) == datetime(2025, 6, 1, 9, 0)
+
+def test_missed_run_is_caught_up_once():
+    """停机错过的运行在重启时补跑一次，之后睡到下一次到期"""
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, "scheduler_state.json")
+        runs = []
+
+        clock = FakeClock(datetime(2025, 5, 21, 12, 0))
+        scheduler = EventScheduler(state_file=state_file, clock=clock)
+        scheduler.add_job("weekly", WeeklyAt("sunday", "09:00"), runs.append)
+
+        # 首次启动不补跑
+        delay = scheduler.run_pending()
+        assert runs == []
+        assert delay == (datetime(2025, 5, 25, 9, 0) - clock.now).total_seconds()
+
+        # 停机两周后重启：只补跑最近错过的一次
+        clock.now = datetime(2025, 6, 9, 8, 0)
+        restarted = EventScheduler(state_file=state_file, clock=clock)
+        restarted.add_job("weekly", WeeklyAt("sunday", "09:00"), runs.append)
+        delay = restarted.run_pending()
+        print(f"补跑: {runs}")
+        assert runs == [datetime(2025, 6, 8, 9, 0)]
+        assert delay == (datetime(2025, 6, 15, 9, 0) - clock.now).total_seconds()
+
+        # 再次检查不会重复运行
+        restarted.run_pending()
+        assert len(runs) == 1
+
+def test_status_is_read_only():
+    """查看状态不写入状态文件；首次运行只记录起点，不伪造一次成功的运行"""
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, "scheduler_state.json")
+        clock = FakeClock(datetime(2025, 5, 21, 12, 0))
+        scheduler = EventScheduler(state_file=state_file, clock=clock)
+        scheduler.add_job("weekly", WeeklyAt("sunday", "09:00"), lambda due: True)
+
+        status = scheduler.status()
+        assert status[0]["last"] == {} and status[0]["next_due"] == "2025-05-25T09:00:00"
+        assert not os.path.exists(state_file)
+
+        scheduler.run_pending()
+        last = scheduler.state.get("weekly")
+        assert last["last_due"] == "2025-05-18T09:00:00"
+        assert "success" not in last and "last_finished" not in last
+
+def test_jobs_run_concurrently_and_failures_are_isolated():
+    """多份周刊在共享线程池中并发运行，一份出错不影响其他周刊"""
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, "scheduler_state.json")
+        clock = FakeClock(datetime(2025, 5, 21, 12, 0))
+        barrier = threading.Barrier(2, timeout=5)
+        ran = []
+
+        def tenant(name):
+            def run(due):
+                barrier.wait()  # 两个任务必须同时在运行才能通过
+                ran.append(name)
+            return run
+
+        def broken(due):
+            raise RuntimeError("来源数据库不存在")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            scheduler = EventScheduler(state_file=state_file, clock=clock, executor=executor)
+            for name, func in (("a", tenant("a")), ("b", tenant("b")), ("broken", broken)):
+                scheduler.add_job(name, WeeklyAt("sunday", "09:00"), func)
+            scheduler.run_pending()
+
+            clock.now = datetime(2025, 5, 25, 9, 0)
+            scheduler.run_pending()
+
+        assert sorted(ran) == ["a", "b"]
+        assert scheduler.state.get("a")["success"] is True
+        assert scheduler.state.get("broken")["success"] is False
+        assert scheduler.running == set()
+
+if __name__ == "__main__":
+    test_weekly_trigger()
+    test_missed_run_is_caught_up_once()
+    test_status_is_read_only()
+    test_jobs_run_concurrently_and_failures_are_isolated()
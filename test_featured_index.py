@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试往期已收录文章索引
+"""
+
+import os
+import tempfile
+from featured_index import BloomFilter, FeaturedIndex, canonical_url, title_fingerprint
+from publish_history import PublishHistory
+
+def test_canonical_url_and_fingerprint():
+    """跟踪参数、域名大小写、协议和末尾的 / 不影响判重"""
+    print("🧪 测试往期去重")
+    print("=" * 40)
+
+    assert canonical_url("http://WWW.Example.com:80/post/?utm_source=x&b=2&a=1#top") == \
+        "https://example.com/post?a=1&b=2"
+    assert canonical_url("https://example.com/post") == canonical_url("https://example.com/post/")
+    assert canonical_url("https://example.com:8443/post") == "https://example.com:8443/post"
+    assert canonical_url("") == ""
+
+    assert title_fingerprint("Claude 大模型：推理评测！") == title_fingerprint("claude大模型推理评测")
+    assert title_fingerprint("短") is None
+
+def test_bloom_filter():
+    """加入的键一定命中，误判率接近设定值"""
+    bloom = BloomFilter(1000)
+    for i in range(1000):
+        bloom.add(f"url:https://example.com/{i}")
+    assert all(f"url:https://example.com/{i}" in bloom for i in range(1000))
+    false_positives = sum(f"url:https://other.com/{i}" in bloom for i in range(10000))
+    assert false_positives < 50
+
+def test_filter_new_and_rebuild():
+    """往期收录过的文章被去掉，同一期重新生成不受影响；可从发布历史重建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        index = FeaturedIndex(os.path.join(tmp, "featured_index.db"))
+        past = [{"title": "大模型推理能力评测", "url": "https://example.com/eval?utm_source=rss"},
+                {"title": "用户增长飞轮", "url": "https://example.com/growth"}]
+        assert index.add(past, 2025, 20) == 4
+
+        articles = [
+            {"title": "大模型推理能力评测", "url": "https://example.com/eval/"},
+            {"title": "用户增长飞轮（转载）", "url": "https://WWW.example.com/growth"},
+            {"title": "量子计算入门指南", "url": "https://example.com/quantum"},
+        ]
+        fresh, repeated = index.filter_new(articles, 2025, 21)
+        assert [article["url"] for article in fresh] == ["https://example.com/quantum"]
+        assert len(repeated) == 2
+
+        # 第 20 期自己重新生成时不去掉
+        fresh, repeated = index.filter_new(articles, 2025, 20)
+        assert len(fresh) == 3 and repeated == []
+
+        history = PublishHistory(os.path.join(tmp, "publish_history.db"))
+        history.append("db-1", {"created_time": "2025-05-16T10:00:00"}, 20, past)
+        history.append("db-2", {"created_time": "2025-05-16T10:00:01"}, 20, past)
+        assert index.rebuild(history) == {"records": 2, "keys": 4}
+        assert len(index.filter_new(articles, 2025, 21)[0]) == 1
+
+        # 2024 年第 52 期在 2025 年初才发布：重建时使用记录中的期年份，而不是发布时间
+        late = [{"title": "年度回顾", "url": "https://example.com/review-2024"}]
+        history.append("db-1", {"created_time": "2025-01-02T10:00:00"}, 52, late, year=2024)
+        assert history.find(week_number=52)[0]["year"] == 2024
+        index.rebuild(history)
+        assert index.filter_new(late, 2024, 52) == (late, [])
+        assert index.filter_new(late, 2025, 2)[0] == []
+
+if __name__ == "__main__":
+    test_canonical_url_and_fingerprint()
+    test_bloom_filter()
+    test_filter_new_and_rebuild()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+测试周刊导出（邮件 HTML、滚动 Atom 订阅）
+"""
+
+import gzip
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from issue_exporters import AtomFeed, atom_entry, export_email_html, inline_html
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+def test_email_html_is_inline_styled():
+    """邮件 HTML 不含 <style> 和外部资源，链接和段落都带内联样式"""
+    print("🧪 测试周刊导出")
+    print("=" * 40)
+
+    with open("超级个体周刊_第21期_20250523.md", encoding='utf-8') as f:
+        email = export_email_html(f.read())
+    assert "<style" not in email and "<script" not in email and "<link" not in email
+    assert "<title>超级个体周刊 第21期</title>" in email
+    assert '<a style="color:#047857;text-decoration:underline;" href="https://example.com/claude-3-5-review">' in email
+    assert '<h2 style="' in email and '<li style="' in email
+    assert "<p>" not in email
+
+def test_only_safe_links():
+    """只有 http、https 和 mailto 链接输出为 <a>，其他协议只保留文字"""
+    assert inline_html("[官网](HTTPS://example.com)") == '<a href="HTTPS://example.com">官网</a>'
+    assert inline_html("[联系](mailto:hi@example.com)") == '<a href="mailto:hi@example.com">联系</a>'
+    for url in ("javascript:alert%281%29", "JavaScript:void0", "data:text/html;base64,PHNjcmlwdD4=",
+                "vbscript:msgbox", "/relative/path"):
+        assert inline_html(f"[点我]({url})") == "点我"
+
+def entry(number, day):
+    return atom_entry(f"urn:weekly:{number:02d}", f"第{number:02d}期", f"issues/{number:02d}.html",
+                      f"2025-05-{day:02d}T00:00:00Z", f"<p>第{number}期 & 正文</p>")
+
+def test_rolling_feed_appends_and_trims():
+    """新条目插入最前，超出上限的最旧条目被去掉，已有条目原文保留"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed.xml")
+        feed = AtomFeed(path, "超级个体周刊", "https://weekly.example.com/", max_entries=3, compress=True)
+        assert feed.add([entry(1, 2), entry(2, 9)]) == 2
+
+        # 往期条目被手动修改过，滚动更新时应原样保留而不是重新渲染
+        with open(path, encoding='utf-8') as f:
+            content = f.read().replace("第2期 &amp; 正文", "第2期 已修订")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        assert feed.add([entry(3, 16)]) == 3
+        assert feed.add([entry(4, 23)]) == 3
+        ids = [entry_id for entry_id, _, _ in feed.entries()]
+        assert ids == ["urn:weekly:04", "urn:weekly:03", "urn:weekly:02"]
+
+        # 同一期重新生成时替换原条目
+        assert feed.add([entry(3, 16).replace("正文", "更新后的正文")]) == 3
+        root = ET.parse(path).getroot()
+        assert root.find(f"{ATOM}updated").text == "2025-05-23T00:00:00Z"
+        contents = [element.find(f"{ATOM}content").text for element in root.findall(f"{ATOM}entry")]
+        assert contents[1] == "<p>第3期 & 更新后的正文</p>"
+        assert contents[2] == "<p>第2期 已修订</p>"
+
+        with gzip.open(f"{path}.gz", "rt", encoding='utf-8') as f, open(path, encoding='utf-8') as g:
+            assert f.read() == g.read()
+
+        assert feed.remove(["urn:weekly:04"]) == 2
+
+if __name__ == "__main__":
+    test_email_html_is_inline_styled()
+    test_only_safe_links()
+    test_rolling_feed_appends_and_trims()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试往期周刊全文索引
+"""
+
+import os
+import tempfile
+import time
+from issue_index import IssueIndex, tokenize
+
+def write_issue(directory, filename, body):
+    path = os.path.join(directory, filename)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(body)
+    return path
+
+def test_tokenize():
+    """中文切成二元组，英文按单词小写，链接地址不参与索引"""
+    print("🧪 测试往期索引")
+    print("=" * 40)
+
+    assert tokenize("Claude 大模型") == ["claude", "大模", "模型"]
+    assert tokenize("GPT-4 的") == ["gpt", "4", "的"]
+
+def test_search_and_incremental_update():
+    """中文按短语匹配；新增、修改、删除文件时只处理变化的文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        index = IssueIndex(os.path.join(tmp, "issue_index.db"))
+        write_issue(tmp, "周刊01.md", "# 超级个体周刊 第01期\n\n大模型推理能力评测，[原文](https://example.com/agent)\n")
+        write_issue(tmp, "超级个体周刊_第02期_20250601.md", "# 超级个体周刊 第02期\n\n大模拟与模型训练，Agent 工作流\n")
+        write_issue(tmp, "超级个体周刊PRD.md", "# 产品需求\n\n大模型\n")
+        assert index.update(tmp) == {"added": 2, "updated": 0, "removed": 0, "unchanged": 0}
+
+        # "大模"和"模型"在第 02 期中不相邻，不算命中
+        results = index.search("大模型")
+        assert [result["title"] for result in results] == ["超级个体周刊 第01期"]
+        assert "大模型推理" in results[0]["snippet"]
+        # 链接地址中的 agent 不计入
+        assert [result["title"] for result in index.search("agent")] == ["超级个体周刊 第02期"]
+        assert index.search("模型 工作流")[0]["title"] == "超级个体周刊 第02期"
+        assert index.search("不存在的词") == []
+
+        time.sleep(0.01)
+        write_issue(tmp, "超级个体周刊_第03期_20250608.md", "# 超级个体周刊 第03期\n\n大模型 Agent\n")
+        write_issue(tmp, "周刊01.md", "# 超级个体周刊 第01期\n\n增长飞轮\n")
+        os.remove(os.path.join(tmp, "超级个体周刊_第02期_20250601.md"))
+        assert index.update(tmp) == {"added": 1, "updated": 1, "removed": 1, "unchanged": 0}
+        assert [result["title"] for result in index.search("大模型")] == ["超级个体周刊 第03期"]
+        assert len(index) == 2
+
+def test_search_scales_to_years_of_issues():
+    """五年的周刊（260 期）中查询仍在毫秒级"""
+    with tempfile.TemporaryDirectory() as tmp:
+        index = IssueIndex(os.path.join(tmp, "issue_index.db"))
+        topics = ["大模型推理", "产品需求验证", "内容营销增长", "设计系统搭建", "个人知识管理"]
+        for number in range(1, 261):
+            body = "\n".join(f"《{topics[(number + i) % 5]}》第{i}篇 Agent workflow notes" for i in range(30))
+            write_issue(tmp, f"超级个体周刊_第{number:03d}期_2025.md", f"# 第{number}期\n\n{body}\n")
+        index.update(tmp)
+
+        started = time.perf_counter()
+        results = index.search("大模型推理 agent", limit=5)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"260 期中查询用时 {elapsed:.1f} ms")
+        assert len(results) == 5
+        assert elapsed < 500
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_search_and_incremental_update()
+    test_search_scales_to_years_of_issues()
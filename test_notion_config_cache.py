@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+测试配置缓存与加锁写入
+"""
+
+import json
+import os
+import tempfile
+import threading
+from notion_helper import NotionHelper, config_file_lock
+
+def in_temp_dir(func):
+    """在临时目录中运行，避免读写真实的 notion_config.json"""
+    def wrapper():
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                with open("notion_config.json", 'w', encoding='utf-8') as f:
+                    json.dump({"notion": {"api_token": "t", "databases": {}, "counter": 0}}, f)
+                func()
+            finally:
+                os.chdir(cwd)
+    wrapper.__name__ = func.__name__
+    return wrapper
+
+@in_temp_dir
+def test_config_is_parsed_once_until_file_changes():
+    """文件未变化时多次构造共享同一份解析结果"""
+    print("🧪 测试配置缓存")
+    print("=" * 40)
+
+    first, second = NotionHelper(), NotionHelper()
+    assert first.config is second.config
+
+    with open("notion_config.json", 'w', encoding='utf-8') as f:
+        json.dump({"notion": {"api_token": "changed", "databases": {}}}, f)
+
+    assert NotionHelper().get_api_token() == "changed"
+
+@in_temp_dir
+def test_concurrent_updates_are_not_lost():
+    """并发的读-改-写不会互相覆盖"""
+    def increment(config):
+        config["notion"]["counter"] += 1
+
+    threads = [threading.Thread(target=lambda: NotionHelper().update_config(increment)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open("notion_config.json", 'r', encoding='utf-8') as f:
+        counter = json.load(f)["notion"]["counter"]
+    print(f"计数: {counter}")
+    assert counter == 20
+    assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
+
+@in_temp_dir
+def test_file_lock_does_not_block_readers():
+    """持有某个文件的锁时，其他线程仍可读取配置、锁定其他文件；同一线程可重入"""
+    done = threading.Event()
+
+    def read_other():
+        NotionHelper()
+        with config_file_lock("other_state.json"):
+            pass
+        done.set()
+
+    with config_file_lock("notion_config.json"):
+        with config_file_lock("notion_config.json"):
+            pass
+        thread = threading.Thread(target=read_other)
+        thread.start()
+        assert done.wait(2), "持有文件锁时其他线程被阻塞"
+    thread.join()
+
+@in_temp_dir
+def test_save_config_keeps_other_changes():
+    """保存时基于文件中的最新配置，不会用过期的内存配置覆盖其他实例的修改"""
+    stale = NotionHelper()
+    NotionHelper().update_config(lambda config: config["notion"].update(counter=5))
+
+    def set_site_url(config):
+        config["notion"]["site_url"] = "https://example.com"
+
+    saved = stale.save_config(set_site_url)
+    assert stale.config is saved
+    with open("notion_config.json", encoding='utf-8') as f:
+        notion = json.load(f)["notion"]
+    assert notion["counter"] == 5 and notion["site_url"] == "https://example.com"
+
+if __name__ == "__main__":
+    test_config_is_parsed_once_until_file_changes()
+    test_concurrent_updates_are_not_lost()
+    test_file_lock_does_not_block_readers()
+    test_save_config_keeps_other_changes()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+测试本地 Notion 替身服务器
+"""
+
+import json
+import re
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from notion_mock_server import (FaultInjector, NotionMockState, create_server, matches_filter,
+                               notion_timestamp, seed_state)
+
+def call(base_url, method, path, payload=None, token="secret"):
+    """发送请求，返回 (状态码, 响应体, 响应头)"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(f"{base_url}{path}", data=data, method=method, headers={
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    })
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), e.headers
+
+def start_server(faults=None):
+    state = NotionMockState()
+    seed_state(state, "articles", ["weekly"], 250, weeks=1)
+    server = create_server(port=0, faults=faults, state=state)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/v1"
+
+def test_query_pagination_and_publish():
+    """分页查询、创建页面、追加子块"""
+    print("🧪 测试替身服务器")
+    print("=" * 40)
+
+    server, base_url = start_server()
+    try:
+        payload = {"filter": {"property": "状态", "select": {"equals": "已归档"}}, "page_size": 100}
+        results = []
+        while True:
+            status, body, _ = call(base_url, "POST", "/databases/articles/query", payload)
+            assert status == 200
+            results.extend(body["results"])
+            if not body["has_more"]:
+                break
+            payload["start_cursor"] = body["next_cursor"]
+        print(f"查询到 {len(results)} 篇文章")
+        assert len(results) == 250
+
+        blocks = [{"type": "paragraph", "paragraph": {"rich_text": []}}] * 101
+        status, body, _ = call(base_url, "POST", "/pages", {
+            "parent": {"database_id": "weekly"},
+            "properties": {"周刊标题": {"title": [{"text": {"content": "第21期"}}]}},
+            "children": blocks
+        })
+        assert status == 400 and body["code"] == "validation_error"
+
+        status, page, _ = call(base_url, "POST", "/pages", {
+            "parent": {"database_id": "weekly"},
+            "properties": {"周刊标题": {"title": [{"text": {"content": "第21期"}}]}},
+            "children": blocks[:100]
+        })
+        assert status == 200
+        status, _, _ = call(base_url, "PATCH", f"/blocks/{page['id']}/children", {"children": blocks[:1]})
+        assert status == 200
+        assert len(server.state.children[page["id"]]) == 101
+    finally:
+        server.shutdown()
+
+def test_rate_limit_returns_429():
+    """超过速率上限时返回 429 和 Retry-After"""
+    server, base_url = start_server(FaultInjector(rate=2))
+    try:
+        statuses = [call(base_url, "GET", "/databases/weekly")[0] for _ in range(5)]
+        print(f"状态码: {statuses}")
+        assert 429 in statuses
+        status, _, headers = call(base_url, "GET", "/databases/weekly")
+        assert status != 429 or float(headers["Retry-After"]) > 0
+    finally:
+        server.shutdown()
+
+def test_timestamps_are_utc():
+    """页面时间戳为 UTC 的 .000Z 格式，过滤时按时间而不是字符串比较"""
+    server, base_url = start_server()
+    try:
+        status, page, _ = call(base_url, "POST", "/pages", {
+            "parent": {"database_id": "weekly"},
+            "properties": {"周刊标题": {"title": [{"text": {"content": "第22期"}}]}}
+        })
+        assert status == 200
+        assert re.fullmatch(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.000Z", page["created_time"])
+    finally:
+        server.shutdown()
+
+    page = {"last_edited_time": notion_timestamp(datetime(2025, 5, 23, 1, 0, tzinfo=timezone.utc))}
+    assert page["last_edited_time"] == "2025-05-23T01:00:00.000Z"
+
+    def edited_after(since):
+        return matches_filter(page, {"timestamp": "last_edited_time",
+                                     "last_edited_time": {"on_or_after": since}})
+
+    # 同一时刻的不同写法
+    assert edited_after("2025-05-23T09:00:00+08:00")
+    assert not edited_after("2025-05-23T09:00:01+08:00")
+    # 不带时区的时间按本地时间理解
+    local = datetime(2025, 5, 23, 1, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert edited_after(local.isoformat())
+    assert not edited_after((local + timedelta(seconds=1)).isoformat())
+
+if __name__ == "__main__":
+    test_query_pagination_and_publish()
+    test_rate_limit_returns_429()
+    test_timestamps_are_utc()
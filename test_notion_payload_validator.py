@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+测试 Notion 请求体本地校验
+"""
+
+from notion_payload_validator import PayloadValidationError, PayloadValidator
+
+WEEKLY_SCHEMA = {
+    "周刊标题": "title",
+    "期号": "number",
+    "生成日期": "date",
+    "状态": "status"
+}
+
+def paragraph(content):
+    return {"type": "paragraph", "paragraph": {"rich_text": [{"type": "text", "text": {"content": content}}]}}
+
+def test_title_property_and_long_text_are_fixed():
+    """错误的标题属性名被改正，超长文本被拆分"""
+    print("🧪 测试请求体校验")
+    print("=" * 40)
+
+    validator = PayloadValidator("weekly", WEEKLY_SCHEMA)
+    properties = {"标题": {"title": [{"text": {"content": "超级个体周刊 第21期"}}]}}
+    blocks = [paragraph("周" * 4500), {"type": "divider", "divider": {}}]
+
+    properties, blocks, fixes = validator.validate_page(properties, blocks)
+    for problem in fixes:
+        print(f"  已修正: {problem}")
+
+    assert list(properties) == ["周刊标题"]
+    assert [len(item["text"]["content"]) for item in blocks[0]["paragraph"]["rich_text"]] == [2000, 2000, 500]
+    assert len(fixes) == 2
+
+def test_unfixable_payload_is_rejected():
+    """未知属性和类型错误无法自动修正"""
+    validator = PayloadValidator("weekly", WEEKLY_SCHEMA)
+    properties = {
+        "周刊标题": {"title": [{"text": {"content": "第22期"}}]},
+        "期号": {"rich_text": [{"text": {"content": "22"}}]},
+        "作者": {"rich_text": []}
+    }
+
+    try:
+        validator.validate_page(properties, [{"type": "image", "image": {}}])
+    except PayloadValidationError as e:
+        print(f"  拒绝: {e.problems}")
+        assert len(e.problems) == 3
+    else:
+        raise AssertionError("应当拒绝该请求体")
+
+if __name__ == "__main__":
+    test_title_property_and_long_text_are_fixed()
+    test_unfixable_payload_is_rejected()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试查询合并（single-flight）与短期缓存
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from notion_query_helper import NotionQueryHelper, cached_query, clear_query_cache
+
+def test_concurrent_queries_share_one_request():
+    """并发的相同查询只发一次请求，缓存期内不再请求，清空缓存后重新请求"""
+    print("🧪 测试查询合并与缓存")
+    print("=" * 40)
+
+    clear_query_cache()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return [{"id": "page-1"}]
+
+    key = ("db", "test_concurrent_queries_share_one_request")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cached_query(key, fetch, ttl=60), range(8)))
+
+    print(f"请求次数: {len(calls)}")
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+    assert cached_query(key, fetch, ttl=60) is results[0]
+    assert len(calls) == 1
+
+    clear_query_cache()
+    cached_query(key, fetch, ttl=60)
+    assert len(calls) == 2
+
+def test_failures_are_not_cached():
+    """失败的查询传给所有等待者，但不进入缓存"""
+    clear_query_cache()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("503")
+        return []
+
+    key = ("db", "test_failures_are_not_cached")
+    try:
+        cached_query(key, flaky)
+        assert False, "应当抛出异常"
+    except RuntimeError:
+        pass
+
+    assert cached_query(key, flaky) == []
+    assert len(attempts) == 2
+
+class CountingClient:
+    """记录查询条件的客户端"""
+
+    def __init__(self):
+        self.filters = []
+
+    def query_database(self, database_id, filter_conditions=None, page_size=100):
+        self.filters.append(filter_conditions)
+        return []
+
+def test_week_queries_hit_cache():
+    """本周、上周的查询范围按日期取整，重复调用只请求一次"""
+    clear_query_cache()
+    client = CountingClient()
+    helper = NotionQueryHelper(client=client, database_id="db-week-cache")
+
+    helper.get_this_week_archived_articles()
+    time.sleep(0.01)
+    helper.get_this_week_archived_articles()
+    assert len(client.filters) == 1
+
+    start = client.filters[0]["and"][1]["date"]["on_or_after"]
+    end = client.filters[0]["and"][2]["date"]["on_or_before"]
+    assert start.endswith("T00:00:00") and end.endswith("T23:59:59")
+
+    helper.get_last_week_archived_articles()
+    helper.get_last_week_archived_articles()
+    assert len(client.filters) == 2
+    clear_query_cache()
+
+if __name__ == "__main__":
+    test_concurrent_queries_share_one_request()
+    test_failures_are_not_cached()
+    test_week_queries_hit_cache()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测试分阶段计时与指标导出
+"""
+
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pipeline_metrics import in_current_context, pipeline_run, record_api_call, stage, timed_stage
+
+@timed_stage(count=lambda articles, *_: len(articles))
+def fetch(size):
+    record_api_call(1024)
+    return list(range(size))
+
+def upload(chunk):
+    with stage("publish"):
+        record_api_call(100)
+
+def test_stages_are_recorded_and_exported():
+    """阶段、线程池中的 API 调用都计入本次运行，并导出 .prom 和 JSON"""
+    print("🧪 测试分阶段计时")
+    print("=" * 40)
+
+    # 没有进行中的运行时不记录
+    assert fetch(3) == [0, 1, 2]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with pipeline_run("weekly", metrics_dir=tmp, newsletter="default") as run:
+            fetch(5)
+            fetch(7)
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                list(pool.map(in_current_context(upload), range(3)))
+
+        stages = run.stages()
+        print(json.dumps(stages, ensure_ascii=False))
+        fetch_stage = stages["fetch"]
+        assert (fetch_stage["calls"], fetch_stage["count"], fetch_stage["api_calls"]) == (2, 12, 2)
+        assert fetch_stage["bytes"] == 2048
+        assert stages["publish"]["api_calls"] == 3
+
+        prom_path, json_path = run.export(tmp)
+        with open(prom_path, encoding='utf-8') as f:
+            prom = f.read()
+        assert 'weekly_stage_items{pipeline="weekly",newsletter="default",stage="fetch"} 12' in prom
+        assert 'weekly_run_success{pipeline="weekly",newsletter="default"} 1' in prom
+        with open(json_path, encoding='utf-8') as f:
+            assert len(json.load(f)["spans"]) == 5
+
+        # 只保留最近的 JSON 摘要，其他运行的文件不受影响
+        for name in ("weekly_default_20240101_000000.json", "weekly_default_20240102_000000.json",
+                     "weekly_default_extra_20240101_000000.json"):
+            with open(os.path.join(tmp, name), 'w', encoding='utf-8') as f:
+                f.write("{}")
+        run.export(tmp, keep=2)
+        summaries = sorted(name for name in os.listdir(tmp) if name.endswith(".json"))
+        assert summaries == ["weekly_default_20240102_000000.json", os.path.basename(json_path),
+                             "weekly_default_extra_20240101_000000.json"]
+
+def test_profiling_writes_per_stage_files():
+    """设置 WEEKLY_PROFILE 后每个阶段写出 .prof 和内存分配快照，嵌套阶段由外层统计 CPU"""
+    os.environ["WEEKLY_PROFILE"] = "all"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            with pipeline_run("weekly", metrics_dir=tmp, profile_dir=tmp) as run:
+                with stage("render"):
+                    fetch(1000)
+
+            files = sorted(os.path.basename(path) for path in run.profiler.files)
+            print(f"剖析文件: {files}")
+            assert files == ["fetch_1.alloc.txt", "render_1.alloc.txt", "render_1.prof", "run.prof"]
+            assert all(os.path.exists(path) for path in run.profiler.files)
+    finally:
+        del os.environ["WEEKLY_PROFILE"]
+
+def test_label_values_are_escaped():
+    """标签值中的反斜杠、双引号和换行按 Prometheus 文本格式转义"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with pipeline_run("weekly", metrics_dir=tmp, newsletter='周刊 "A"\\B\n第二行') as run:
+            pass
+    prom = run.prometheus_text()
+    assert 'weekly_run_success{pipeline="weekly",newsletter="周刊 \\"A\\"\\\\B\\n第二行"} 1' in prom
+    assert all(line.startswith(("#", "weekly_")) for line in prom.splitlines())
+
+if __name__ == "__main__":
+    test_stages_are_recorded_and_exported()
+    test_profiling_writes_per_stage_files()
+    test_label_values_are_escaped()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试周刊发布历史
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from notion_helper import NotionHelper
+from publish_history import PublishHistory
+
+def make_result(number, day):
+    return {"title": f"超级个体周刊 第{number}期", "page_id": f"page-{number}",
+            "created_time": f"2025-05-{day:02d}T09:00:00", "url": f"https://notion.so/page{number}"}
+
+def test_append_and_query():
+    """追加后按期号、年份和数据库查询，latest 取最近一次发布"""
+    print("🧪 测试发布历史")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = PublishHistory(os.path.join(tmp, "publish_history.db"))
+        articles = [{"title": "多邻国如何重燃用户增长", "url": "https://example.com/duolingo", "summary": "不保存"}]
+        history.append("db-1", make_result(21, 23), 21, articles)
+        history.append("db-2", make_result(21, 23), 21, articles)
+        history.append("db-1", make_result(22, 30), 22)
+
+        records = history.find(week_number=21)
+        assert [record["database_id"] for record in records] == ["db-1", "db-2"]
+        assert records[0]["year"] == 2025
+        assert records[0]["articles"] == [{"title": "多邻国如何重燃用户增长", "url": "https://example.com/duolingo"}]
+        assert len(history.find(week_number=21, database_id="db-2", year=2025)) == 1
+        assert history.find(year=2024) == []
+
+        assert history.latest()["page_id"] == "page-22"
+        assert history.latest("db-2")["week_number"] == 21
+
+        ids = [record["id"] for record in history.iter_records(batch_size=2)]
+        assert ids == [1, 2, 3]
+
+def test_import_from_config():
+    """旧版配置中的发布历史迁移到 SQLite 后从配置中删除，再次导入不重复"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        with open("notion_config.example.json", encoding='utf-8') as f:
+            config = json.load(f)
+        config["notion"]["publish_history"] = [
+            {"database_id": "db-1", "page_title": "超级个体周刊 第20期", "page_id": "page-20",
+             "published_time": "2025-05-16T09:00:00", "url": "https://notion.so/page20"},
+            {"database_id": "db-1", "page_title": "超级个体周刊 第21期", "page_id": "page-21",
+             "published_time": "2025-05-23T09:00:00", "url": "https://notion.so/page21"}
+        ]
+        with open(os.path.join(tmp, "notion_config.json"), 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False)
+        os.chdir(tmp)
+        try:
+            history = PublishHistory("publish_history.db")
+            helper = NotionHelper()
+            assert history.import_from_config(helper) == 2
+            assert [record["page_title"] for record in history.iter_records()] == \
+                ["超级个体周刊 第20期", "超级个体周刊 第21期"]
+            assert history.latest()["url"] == "https://notion.so/page21"
+
+            with open("notion_config.json", encoding='utf-8') as f:
+                assert "publish_history" not in json.load(f)["notion"]
+            assert "publish_history" not in NotionHelper().config["notion"]
+            assert history.import_from_config(NotionHelper()) == 0
+            assert len(list(history.iter_records())) == 2
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    test_append_and_query()
+    test_import_from_config()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+测试发布发件箱的分块续传
+"""
+
+import os
+import tempfile
+from publish_outbox import PublishOutbox
+
+class FakeAPIError(Exception):
+    """与 NotionAPIError 相同的重试判断接口"""
+
+    def __init__(self, status):
+        super().__init__(f"[{status}] 模拟失败")
+        self.status = status
+        self.retry_after = None
+        self.transient = status in (429, 500, 502, 503, 504)
+
+class FakeClient:
+    """模拟 Notion 客户端，可在指定的调用次数上失败"""
+
+    def __init__(self, fail_on_call=None, status=503):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+        self.status = status
+
+    def _maybe_fail(self):
+        if len(self.calls) == self.fail_on_call:
+            self.fail_on_call = None
+            raise FakeAPIError(self.status)
+
+    def create_page(self, database_id, properties, children=None):
+        self._maybe_fail()
+        self.calls.append(("create", len(children or [])))
+        return {"id": "page-1", "url": "https://notion.so/page1"}
+
+    def append_block_children(self, block_id, children):
+        self._maybe_fail()
+        self.calls.append(("append", len(children)))
+        return {}
+
+    def query_database(self, database_id, filter_conditions=None, page_size=100):
+        self.calls.append(("query", database_id))
+        return []
+
+class LostResponseClient(FakeClient):
+    """页面已创建但响应丢失（相当于创建后、page_id 落盘前崩溃）"""
+
+    def __init__(self):
+        super().__init__()
+        self.pages = []
+
+    def create_page(self, database_id, properties, children=None):
+        self.calls.append(("create", len(children or [])))
+        self.pages.append({"id": f"page-{len(self.pages) + 1}", "url": "https://notion.so/page",
+                           "title": properties["周刊标题"]["title"][0]["text"]["content"]})
+        if len(self.pages) == 1:
+            raise FakeAPIError(504)
+        return self.pages[-1]
+
+    def query_database(self, database_id, filter_conditions=None, page_size=100):
+        self.calls.append(("query", database_id))
+        title = filter_conditions["and"][0]["title"]["equals"]
+        return [page for page in self.pages if page["title"] == title]
+
+def make_blocks(count):
+    return [{"type": "paragraph", "paragraph": {"rich_text": []}} for _ in range(count)]
+
+def test_resume_after_transient_failure():
+    """第二个分块失败后，重试只上传剩余分块"""
+    print("🧪 测试发件箱续传")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeClient(fail_on_call=1)
+        outbox = PublishOutbox(os.path.join(tmp, "outbox.db"), client=client, retry_base_delay=0)
+        job_id = outbox.enqueue("db-1", "超级个体周刊 第21期", make_blocks(250), 21)
+
+        result = outbox.process_job(job_id)
+        assert not result["success"] and result["retrying"]
+        assert outbox.get_job(job_id)["acked_chunks"] == 1
+
+        result = outbox.process_job(job_id)
+        print(f"调用记录: {client.calls}")
+        assert result["success"]
+        assert client.calls == [("create", 100), ("append", 100), ("append", 50)]
+        assert outbox.pending_jobs() == []
+
+def test_permanent_failure_is_not_retried():
+    """非暂时性错误直接标记失败"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeClient(fail_on_call=0, status=400)
+        outbox = PublishOutbox(os.path.join(tmp, "outbox.db"), client=client)
+        job_id = outbox.enqueue("db-1", "超级个体周刊 第22期", make_blocks(10), 22)
+
+        results = outbox.drain()
+        assert len(results) == 1 and not results[0]["retrying"]
+        assert outbox.get_job(job_id)["status"] == "failed"
+
+def test_retry_reuses_page_created_before_crash():
+    """创建页面成功但 page_id 未落盘时，重试沿用已创建的页面，不重复创建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LostResponseClient()
+        outbox = PublishOutbox(os.path.join(tmp, "outbox.db"), client=client, retry_base_delay=0)
+        job_id = outbox.enqueue("db-1", "超级个体周刊 第23期", make_blocks(150), 23, title_property="周刊标题")
+
+        assert outbox.process_job(job_id)["retrying"]
+        assert outbox.get_job(job_id)["create_started_at"]
+
+        result = outbox.process_job(job_id)
+        assert result["success"] and result["page_id"] == "page-1"
+        assert client.calls == [("create", 100), ("query", "db-1"), ("append", 50)]
+        assert len(client.pages) == 1
+
+def test_batch_completes_once_when_last_job_finishes():
+    """同一期的任务全部完成后才触发一次批次处理，包括之后由 drain 续传完成的任务"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeClient(fail_on_call=1)
+        outbox = PublishOutbox(os.path.join(tmp, "outbox.db"), client=client, retry_base_delay=0)
+        completed = []
+
+        def on_done(job):
+            if outbox.claim_batch(job["batch_id"]):
+                completed.append(outbox.batch_context(job["batch_id"]))
+
+        outbox.add_done_callback(on_done)
+        outbox.add_done_callback(on_done)
+        batch_id = outbox.create_batch({"week_number": 24, "articles": [{"title": "文章"}]})
+        first = outbox.enqueue("db-1", "超级个体周刊 第24期", make_blocks(10), 24, batch_id=batch_id)
+        second = outbox.enqueue("db-2", "超级个体周刊 第24期", make_blocks(10), 24, batch_id=batch_id)
+
+        assert outbox.process_job(first)["success"]
+        assert outbox.process_job(second)["retrying"]
+        assert completed == [] and outbox.completed_batches() == []
+
+        outbox.drain()
+        assert completed == [{"week_number": 24, "articles": [{"title": "文章"}]}]
+        assert [job["id"] for job in outbox.completed_jobs()] == [first, second]
+        assert outbox.claim_job(second) and not outbox.claim_job(second)
+        assert [job["id"] for job in outbox.completed_jobs()] == [first]
+        assert outbox.completed_batches() == []
+        assert not outbox.claim_batch(batch_id)
+
+def test_fanout_publishes_each_target_once():
+    """并发发布到每个目标各一次；dry_run 只返回模拟结果，不写入发件箱"""
+    targets = [{"name": name, "database_id": f"db-{name}", "title_property": "标题"} for name in ("a", "b")]
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeClient()
+        outbox = PublishOutbox(os.path.join(tmp, "outbox.db"), client=client, validate=False)
+
+        results = outbox.publish_fanout(targets, "超级个体周刊 第21期", make_blocks(3), 21, dry_run=True)
+        assert sorted(results) == ["a", "b"] and all(result["success"] for result in results.values())
+        assert client.calls == [] and outbox.get_job(1) is None
+
+        results = outbox.publish_fanout(targets, "超级个体周刊 第21期", make_blocks(3), 21)
+        assert [results[name]["database_id"] for name in ("a", "b")] == ["db-a", "db-b"]
+        assert client.calls == [("create", 3), ("create", 3)]
+
+if __name__ == "__main__":
+    test_resume_after_transient_failure()
+    test_permanent_failure_is_not_retried()
+    test_retry_reuses_page_created_before_crash()
+    test_batch_completes_once_when_last_job_finishes()
+    test_fanout_publishes_each_target_once()
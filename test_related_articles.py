@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+测试往期相关文章推荐
+"""
+
+import os
+import tempfile
+from related_articles import RelatedArticles
+from weekly_generator import WeeklyGenerator
+
+PAST_ISSUE = [
+    {"title": "Claude 大模型推理能力评测", "summary": "对比多个大模型在推理任务上的表现",
+     "url": "https://example.com/claude-eval"},
+    {"title": "用户增长飞轮", "summary": "留存、转化与内容营销的增长策略", "url": "https://example.com/growth"},
+    {"title": "设计系统搭建指南", "summary": "Figma 组件库与设计规范", "url": "https://example.com/design"},
+]
+
+def test_batched_related_lookup():
+    """整期一起查询，每篇返回往期最相似的一篇，不相关的文章不推荐"""
+    print("🧪 测试往期相关推荐")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        related = RelatedArticles(os.path.join(tmp, "related_articles.json"))
+        assert related.related_for([{"title": "任何文章"}]) == [[]]
+
+        assert related.add_issue(PAST_ISSUE, 20, 2025) == 3
+        # 重复发布同一期不会重复添加
+        assert related.add_issue(PAST_ISSUE, 20, 2025) == 0
+
+        current = [
+            {"title": "大模型推理能力的新评测", "summary": "Claude 与 GPT 的推理表现", "url": "https://example.com/new-eval"},
+            {"title": "量子计算入门", "summary": "量子比特与叠加态", "url": "https://example.com/quantum"},
+            # 往期已收录的同一篇文章不推荐自己
+            dict(PAST_ISSUE[1]),
+        ]
+        results = related.related_for(current)
+        print(results)
+        assert results[0][0]["url"] == "https://example.com/claude-eval"
+        assert results[0][0]["issue"] == "第20期"
+        assert results[1] == []
+        assert all(match["url"] != PAST_ISSUE[1]["url"] for match in results[2])
+
+def test_generator_appends_related_link():
+    """渲染时在原文链接后附上往期相关文章"""
+    with tempfile.TemporaryDirectory() as tmp:
+        related = RelatedArticles(os.path.join(tmp, "related_articles.json"))
+        related.add_issue(PAST_ISSUE, 20, 2025)
+
+        generator = WeeklyGenerator(related=related)
+        article = {"title": "大模型推理能力的新评测", "summary": "Claude 的推理表现", "url": "https://example.com/new",
+                   "category": "AI大模型", "importance": "中"}
+        content = generator.generate_weekly_content_from_articles([article], 21)
+        assert "- **往期相关**: [Claude 大模型推理能力评测](https://example.com/claude-eval)（第20期）" in content
+
+if __name__ == "__main__":
+    test_batched_related_lookup()
+    test_generator_appends_related_link()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+测试往期静态站点
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from static_site import StaticSite, article_link, markdown_to_html, parse_issue
+from weekly_generator import WeeklyGenerator
+
+ISSUE = "超级个体周刊_第21期_20250523.md"
+
+def test_markdown_and_parse():
+    """Markdown 子集转 HTML；解析出期号、日期和按分类的文章"""
+    print("🧪 测试往期站点")
+    print("=" * 40)
+
+    assert markdown_to_html("- **原文链接**: [a<b](https://x.com/?a=1&b=2)\n\n普通 *强调*") == \
+        '<ul>\n<li><strong>原文链接</strong>: <a href="https://x.com/?a=1&amp;b=2">a&lt;b</a></li>\n</ul>\n' \
+        '<p>普通 <em>强调</em></p>'
+
+    with open(ISSUE, encoding='utf-8') as f:
+        meta = parse_issue(ISSUE, f.read())
+    assert meta["number"] == 21 and meta["date"] == "2025-05-23"
+    assert meta["slug"] == "21-20250523"
+    assert meta["categories"]["AI前沿动态"][0]["url"] == "https://example.com/claude-3-5-review"
+    assert "本周导读" not in meta["categories"]
+
+    # 不安全的链接只保留文字
+    assert markdown_to_html("[点我](javascript:alert%281%29)") == "<p>点我</p>"
+    assert article_link({"title": "点我", "url": "javascript:void0"}) == "点我"
+
+def test_incremental_build():
+    """新增一期只写入这一期、首页、订阅和相关分类页；没有变化时不写任何文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "issues")
+        os.makedirs(source)
+        shutil.copy(ISSUE, source)
+        shutil.copy("周刊01.md", source)
+
+        site = StaticSite(os.path.join(tmp, "site"), site_url="https://weekly.example.com/")
+        result = site.build(source)
+        assert result["issues"] == 2 and result["changed"] == 2
+        assert "issues/21-20250523.html" in result["written"] and "feed.xml" in result["written"]
+        with gzip.open(os.path.join(tmp, "site", "index.html.gz"), "rt", encoding='utf-8') as f:
+            index = f.read()
+        with open(os.path.join(tmp, "site", "index.html"), encoding='utf-8') as f:
+            assert f.read() == index
+        assert 'href="issues/21-20250523.html"' in index
+
+        assert site.build(source)["written"] == []
+
+        time.sleep(0.01)
+        with open(os.path.join(source, "超级个体周刊_第22期_20250530.md"), 'w', encoding='utf-8') as f:
+            f.write("# 超级个体周刊 第22期\n> 标语\n\n## 🚀 产品力提升\n\n"
+                    "- **原文链接**: [设计系统](https://example.com/design-system)\n")
+        result = site.build(source)
+        print(result)
+        assert result["changed"] == 1
+        assert set(result["written"]) == {"issues/22-20250530.html", "index.html", "feed.xml",
+                                          "categories/产品力提升.html"}
+        with open(os.path.join(tmp, "site", "feed.xml"), encoding='utf-8') as f:
+            feed = f.read()
+        assert "https://weekly.example.com/issues/22-20250530.html" in feed
+        assert feed.index("第22期") < feed.index("第21期")
+
+        os.remove(os.path.join(source, "超级个体周刊_第22期_20250530.md"))
+        result = site.build(source)
+        assert result["removed"] == 1
+        assert not os.path.exists(os.path.join(tmp, "site", "issues", "22-20250530.html.gz"))
+        assert not os.path.exists(os.path.join(tmp, "site", "categories", "产品力提升.html"))
+
+def test_generator_links_archive():
+    """配置往期站点后，结尾的往期周刊链接到站点"""
+    generator = WeeklyGenerator(archive_url="https://weekly.example.com/")
+    content = generator.generate_weekly_content_from_articles([], 21, 2025)
+    assert "🔗 往期周刊: [查看往期内容](https://weekly.example.com/)" in content
+
+if __name__ == "__main__":
+    test_markdown_and_parse()
+    test_incremental_build()
+    test_generator_links_archive()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+测试分类趋势统计
+"""
+
+import os
+import tempfile
+from trend_stats import TrendStats
+from weekly_generator import WeeklyGenerator
+
+def make_articles(count, archived_date, domain="example.com", importance="中"):
+    return [{"title": f"文章 {index}", "summary": "", "url": f"https://www.{domain}/{index}",
+             "importance": importance, "archived_date": archived_date} for index in range(count)]
+
+def test_weeks_are_updated_incrementally():
+    """每期只替换涉及的周，重复生成不重复计数，趋势按近四周对比之前四周"""
+    print("🧪 测试分类趋势统计")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trends = TrendStats(os.path.join(tmp, "trend_stats.json"))
+
+        # 2025 年第 14~17 周：每周 AI 5 篇；第 18~21 周：每周 AI 7 篇、运营 1 篇
+        for week_number in range(14, 18):
+            monday = f"2025-{['03-31', '04-07', '04-14', '04-21'][week_number - 14]}"
+            trends.update({"AI前沿动态": make_articles(5, monday)}, 2025, week_number)
+        for week_number in range(18, 22):
+            monday = f"2025-{['04-28', '05-05', '05-12', '05-19'][week_number - 18]}"
+            categorized = {"AI前沿动态": make_articles(7, monday, "openai.com", "高"),
+                           "运营&增长": make_articles(1, monday)}
+            trends.update(categorized, 2025, week_number)
+
+        # 同一期重新生成只会覆盖这一周
+        assert trends.update({"AI前沿动态": make_articles(7, "2025-05-19", "openai.com", "高"),
+                              "运营&增长": make_articles(1, "2025-05-20")}, 2025, 21) == ["2025-W21"]
+        assert trends.load()["2025-W21"]["total"] == 8
+
+        rows = trends.trends(2025, 21)
+        ai = next(row for row in rows if row["category"] == "AI前沿动态")
+        assert (ai["current"], ai["previous"]) == (28, 20)
+        assert round(ai["change"], 2) == 0.4
+
+        section = trends.trend_section(2025, 21)
+        print(section)
+        assert "**AI前沿动态** 近四周 28 篇，比之前四周增加 40%" in section
+        # 运营&增长之前没有文章，不写进周刊
+        assert "运营&增长" not in section
+
+        report = trends.report(8, 2025, 21)
+        assert "| 2025-W21 | 8 | 7 | 1 |" in report
+        assert "- openai.com: 28 篇" in report
+        assert "- 运营&增长: 0 → 4 篇（新出现）" in report
+
+def test_rendering_does_not_write_stats():
+    """渲染（预览、草稿）时本期按内存中的汇总计入趋势，但不写入统计文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        stats_file = os.path.join(tmp, "trend_stats.json")
+        trends = TrendStats(stats_file)
+        for week_number, monday in zip(range(14, 21), ["03-31", "04-07", "04-14", "04-21", "04-28", "05-05", "05-12"]):
+            count = 5 if week_number < 18 else 7
+            trends.update({"AI前沿动态": make_articles(count, f"2025-{monday}")}, 2025, week_number)
+        with open(stats_file, encoding='utf-8') as f:
+            saved = f.read()
+
+        articles = make_articles(7, "2025-05-19")
+        for article in articles:
+            article["newsletter_category"] = "AI前沿动态"
+        content = WeeklyGenerator(trends=trends).generate_weekly_content_from_articles(articles, 21, 2025)
+        assert "**AI前沿动态** 近四周 28 篇，比之前四周增加 40%" in content
+        with open(stats_file, encoding='utf-8') as f:
+            assert f.read() == saved
+        assert "2025-W21" not in trends.load()
+
+if __name__ == "__main__":
+    test_weeks_are_updated_incrementally()
+    test_rendering_does_not_write_stats()
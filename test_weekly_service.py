@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+测试周刊常驻服务的 HTTP 接口
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from notion_helper import read_config, write_config
+from publish_outbox import PublishOutbox
+from test_publish_outbox import FakeClient
+from weekly_service import IssueService, create_server
+
+def request(base_url, method, path):
+    req = urllib.request.Request(base_url + path, method=method)
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, response.headers.get("Content-Type"), response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("Content-Type"), e.read().decode('utf-8')
+
+def test_preview_and_generate():
+    """预览不落盘，生成后预览直接返回内存中的结果"""
+    print("🧪 测试周刊服务")
+    print("=" * 40)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy("notion_config.example.json", os.path.join(tmp, "notion_config.json"))
+        os.chdir(tmp)
+        server = create_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            # 已有空草稿时预览也不能定稿（同步并写入）草稿
+            drafts = server.service.scheduler().drafts
+            empty_draft = {"year": 2025, "week_number": 21, "watermark": None, "articles": {}}
+            os.makedirs(drafts.draft_path(2025, 21).parent, exist_ok=True)
+            write_config(drafts.draft_path(2025, 21), empty_draft)
+
+            status, content_type, body = request(base_url, "GET", "/issues/21/preview?year=2025")
+            assert status == 200 and content_type.startswith("text/markdown")
+            assert body.startswith("# 超级个体周刊 第21期")
+            assert not [name for name in os.listdir(".") if name.endswith(".md")]
+            with open(drafts.draft_path(2025, 21), encoding='utf-8') as f:
+                assert json.load(f) == empty_draft
+
+            status, _, body = request(base_url, "POST", "/issues/21/generate?year=2025")
+            issue = json.loads(body)
+            print(f"生成: {issue['filename']} ({issue['article_count']} 篇)")
+            assert status == 200 and os.path.exists(issue["filename"])
+
+            status, _, body = request(base_url, "GET", "/issues/21/preview?year=2025&format=json")
+            assert json.loads(body)["generated_time"] == issue["generated_time"]
+
+            # 未配置 Token 时不能发布；期号和周刊名无效时返回错误
+            assert request(base_url, "POST", "/issues/21/publish?year=2025")[0] == 503
+            assert request(base_url, "POST", "/issues/60/generate")[0] == 400
+            assert request(base_url, "GET", "/issues/21/preview?newsletter=missing")[0] == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.chdir(cwd)
+
+def test_publish_is_idempotent():
+    """同一期重复发布只返回原任务的状态，force=True 时才重新发布"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy("notion_config.example.json", os.path.join(tmp, "notion_config.json"))
+        os.chdir(tmp)
+        try:
+            service = IssueService()
+            service.generate(21, 2025)
+
+            scheduler = service.scheduler()
+            scheduler.newsletter.api_token = "secret_test_token"
+            client = FakeClient()
+            scheduler.generator.publisher._outbox = PublishOutbox("publish_outbox.db", client=client, validate=False)
+            target_count = len(scheduler.generator.publisher.targets)
+
+            first = service.publish(21, 2025)
+            assert first["success"] and len(first["targets"]) == target_count
+            creates = [call for call in client.calls if call[0] == "create"]
+            assert len(creates) == target_count
+            # 往期相关推荐按这一期的年份记录，而不是发布时的年份
+            related = read_config(scheduler.related.store_file)["articles"]
+            assert related and {(doc["year"], doc["week_number"]) for doc in related} == {(2025, 21)}
+
+            again = service.publish(21, 2025)
+            assert again["targets"] == first["targets"]
+            assert len([call for call in client.calls if call[0] == "create"]) == target_count
+
+            forced = service.publish(21, 2025, force=True)
+            assert forced["success"]
+            assert len([call for call in client.calls if call[0] == "create"]) == target_count * 2
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    test_preview_and_generate()
+    test_publish_is_idempotent()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+分类趋势统计
+每保存一期周刊，就把本期文章按添加日期所在的周汇总（各栏目篇数、重要度分布、来源域名），
+只更新涉及的那几周，历史数据从不重新扫描。汇总结果用于:
+
+    - 周刊中的「本周趋势」小节，如 "AI前沿动态 近四周 12 篇，比之前四周增加 40%"
+    - 独立的趋势报告: python weekly_cli.py trends [--weeks 12] [--output report.md]
+
+汇总保存在 trend_stats.json（多份周刊时在各自的工作目录中）
+"""
+
+import copy
+import logging
+from datetime import date, datetime
+from pathlib import Path
+from urllib.parse import urlparse
+from notion_helper import config_file_lock, read_config, write_config
+from pipeline_metrics import timed_stage
+
+TREND_STATS_FILE = "trend_stats.json"
+# 趋势比较的窗口：近四周对比之前四周（约一个月）
+TREND_WINDOW_WEEKS = 4
+# 变化小于这个比例，或两个窗口合计篇数太少时不写进周刊
+MIN_TREND_CHANGE = 0.2
+MIN_TREND_ARTICLES = 3
+
+def week_key(year, week_number):
+    return f"{year}-W{week_number:02d}"
+
+def parse_week_key(key):
+    year, week_number = key.split("-W")
+    return int(year), int(week_number)
+
+def shift_week(year, week_number, weeks):
+    """向前（负数）或向后移动若干周"""
+    monday = date.fromisocalendar(year, week_number, 1).toordinal() + weeks * 7
+    return date.fromordinal(monday).isocalendar()[:2]
+
+def article_domain(url):
+    netloc = urlparse(url or "").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+class TrendStats:
+    def __init__(self, stats_file=TREND_STATS_FILE):
+        self.stats_file = Path(stats_file)
+
+    def load(self):
+        """读取全部周汇总: {"2025-W21": {...}}"""
+        return copy.deepcopy(read_config(self.stats_file).get("weeks", {}))
+
+    def summarize(self, categorized, year, week_number):
+        """
+        把 categorize_articles 的结果按周汇总（只计算，不写入）
+
+        文章按添加日期归入所在的周，没有日期时归入本期
+
+        Args:
+            categorized (dict): {栏目: [文章, ...]}
+            year (int): 本期的 ISO 年份
+            week_number (int): 本期的 ISO 周数
+
+        Returns:
+            dict: {"2025-W21": {...}}
+        """
+        weeks = {}
+        for category, articles in categorized.items():
+            for article in articles:
+                archived_date = article.get("archived_date")
+                if archived_date:
+                    key = week_key(*date.fromisoformat(archived_date[:10]).isocalendar()[:2])
+                else:
+                    key = week_key(year, week_number)
+                week = weeks.setdefault(key, {"total": 0, "categories": {}, "importance": {}, "domains": {}})
+                week["total"] += 1
+                week["categories"][category] = week["categories"].get(category, 0) + 1
+                importance = str(article.get("importance") or "未设置")
+                week["importance"][importance] = week["importance"].get(importance, 0) + 1
+                domain = article_domain(article.get("url"))
+                if domain:
+                    week["domains"][domain] = week["domains"].get(domain, 0) + 1
+        return weeks
+
+    @timed_stage(name="trend_stats", count=lambda weeks, *_, **__: len(weeks))
+    def update(self, categorized, year, week_number):
+        """
+        用本期文章更新周汇总（周刊保存时调用），涉及的每一周整体替换，
+        同一期重复生成不会重复计数
+
+        Returns:
+            list: 更新过的周
+        """
+        weeks = self.summarize(categorized, year, week_number)
+        if not weeks:
+            return []
+
+        now = datetime.now().isoformat()
+        with config_file_lock(self.stats_file):
+            stats = copy.deepcopy(read_config(self.stats_file)) or {"weeks": {}}
+            for key, week in weeks.items():
+                week["updated_time"] = now
+                stats["weeks"][key] = week
+            write_config(self.stats_file, stats)
+
+        logging.info(f"📈 已更新 {len(weeks)} 周的趋势统计: {', '.join(sorted(weeks))}")
+        return sorted(weeks)
+
+    def window(self, weeks, year, week_number, size=TREND_WINDOW_WEEKS):
+        """截至某周（含）的 size 周合计"""
+        total = {"total": 0, "categories": {}, "importance": {}, "domains": {}}
+        for offset in range(size):
+            week = weeks.get(week_key(*shift_week(year, week_number, -offset)))
+            if not week:
+                continue
+            total["total"] += week["total"]
+            for field in ("categories", "importance", "domains"):
+                for name, count in week[field].items():
+                    total[field][name] = total[field].get(name, 0) + count
+        return total
+
+    def trends(self, year, week_number, size=TREND_WINDOW_WEEKS, weeks=None):
+        """
+        各栏目近 size 周与之前 size 周的对比，按变化幅度排序
+
+        Returns:
+            list: [{category, current, previous, change}]，之前没有文章时 change 为 None
+        """
+        weeks = self.load() if weeks is None else weeks
+        current = self.window(weeks, year, week_number, size)["categories"]
+        previous = self.window(weeks, *shift_week(year, week_number, -size), size)["categories"]
+
+        rows = []
+        for category in set(current) | set(previous):
+            now, before = current.get(category, 0), previous.get(category, 0)
+            change = (now - before) / before if before else None
+            rows.append({"category": category, "current": now, "previous": before, "change": change})
+        rows.sort(key=lambda row: (row["change"] is None, -abs(row["change"] or 0), -row["current"]))
+        return rows
+
+    def trend_section(self, year, week_number, limit=3, categorized=None):
+        """
+        周刊中的「本周趋势」小节，历史不足或变化不明显时返回空字符串
+
+        只读取已保存的汇总，提供 categorized 时本期涉及的周用内存中的汇总替换，
+        预览和草稿不会改动统计文件
+        """
+        weeks = self.load()
+        if categorized:
+            weeks.update(self.summarize(categorized, year, week_number))
+
+        lines = []
+        for row in self.trends(year, week_number, weeks=weeks):
+            if row["change"] is None or abs(row["change"]) < MIN_TREND_CHANGE:
+                continue
+            if row["current"] + row["previous"] < MIN_TREND_ARTICLES:
+                continue
+            direction = "增加" if row["change"] > 0 else "减少"
+            lines.append(f"- **{row['category']}** 近四周 {row['current']} 篇，"
+                         f"比之前四周{direction} {abs(row['change']):.0%}")
+            if len(lines) >= limit:
+                break
+
+        if not lines:
+            return ""
+        return "\n## 📊 本周趋势\n\n" + "\n".join(lines) + "\n\n"
+
+    def report(self, weeks_count=12, year=None, week_number=None, top_domains=10):
+        """
+        独立的趋势报告（Markdown）：最近若干周的栏目篇数、重要度分布和主要来源
+
+        Args:
+            weeks_count (int): 报告覆盖的周数
+            year (int): 截止周的 ISO 年份，默认本周
+            week_number (int): 截止周，默认本周
+        """
+        if year is None or week_number is None:
+            year, week_number = datetime.now().isocalendar()[:2]
+        weeks = self.load()
+        keys = [week_key(*shift_week(year, week_number, -offset)) for offset in reversed(range(weeks_count))]
+        categories = sorted({name for key in keys for name in weeks.get(key, {}).get("categories", {})})
+        total = self.window(weeks, year, week_number, weeks_count)
+
+        lines = [f"# 分类趋势报告（截至 {week_key(year, week_number)}，共 {weeks_count} 周）", ""]
+        if not total["total"]:
+            lines.append("这段时间没有统计数据，生成周刊后会自动累计。")
+            return "\n".join(lines) + "\n"
+
+        lines += ["## 每周篇数", ""]
+        lines.append("| 周 | 合计 | " + " | ".join(categories) + " |")
+        lines.append("|---" * (len(categories) + 2) + "|")
+        for key in keys:
+            week = weeks.get(key, {"total": 0, "categories": {}})
+            counts = " | ".join(str(week["categories"].get(name, 0)) for name in categories)
+            lines.append(f"| {key} | {week['total']} | {counts} |")
+
+        lines += ["", f"## 栏目变化（近 {TREND_WINDOW_WEEKS} 周对比之前 {TREND_WINDOW_WEEKS} 周）", ""]
+        for row in self.trends(year, week_number, weeks=weeks):
+            change = "新出现" if row["change"] is None else f"{row['change']:+.0%}"
+            lines.append(f"- {row['category']}: {row['previous']} → {row['current']} 篇（{change}）")
+
+        lines += ["", "## 重要度分布", ""]
+        for name, count in sorted(total["importance"].items(), key=lambda item: -item[1]):
+            lines.append(f"- {name}: {count} 篇（{count / total['total']:.0%}）")
+
+        lines += ["", f"## 主要来源（前 {top_domains} 个域名）", ""]
+        for name, count in sorted(total["domains"].items(), key=lambda item: -item[1])[:top_domains]:
+            lines.append(f"- {name}: {count} 篇")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+超级个体周刊命令行工具
+非交互式子命令，适合 cron 和容器中运行；各子命令只在需要时导入对应模块
+
+用法:
+    python weekly_cli.py generate [--year 2025 --week 21] [--newsletter 名称]
+    python weekly_cli.py publish [周刊文件.md] [--week 21] [--enqueue-only | --drain]
+    python weekly_cli.py sync [--year 2025 --week 21] [--output articles.json]
+    python weekly_cli.py draft [--year 2025 --week 21] [--full]
+    python weekly_cli.py backfill --from-week 10 --to-week 20 [--year 2025] [--publish]
+    python weekly_cli.py serve [--workers 4]
+    python weekly_cli.py service [--host 127.0.0.1 --port 8080]
+    python weekly_cli.py archive export | stats [--category AI --importance 高 --by month]
+    python weekly_cli.py trends [--weeks 12] [--output report.md]
+    python weekly_cli.py search "大模型 Agent" [--limit 10]
+    python weekly_cli.py featured rebuild
+    python weekly_cli.py cover [周刊文件.md ...] [--workers 4]
+    python weekly_cli.py site [--full]
+    python weekly_cli.py export [周刊文件.md] [--output issue.html]
+    python weekly_cli.py --profile generate          # 剖析各阶段，结果写入 profiles/
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+def find_newsletter(name):
+    """按名称查找 notion.newsletters 中的周刊，未指定时为默认周刊"""
+    if name is None:
+        return None
+    from newsletters import load_newsletters
+
+    for newsletter in load_newsletters():
+        if newsletter.name == name:
+            return newsletter
+    raise SystemExit(f"❌ 没有名为 {name} 的周刊")
+
+def cmd_generate(args):
+    """生成周刊（不发布）"""
+    from weekly_scheduler import WeeklyScheduler
+
+    scheduler = WeeklyScheduler(find_newsletter(args.newsletter))
+    success = scheduler.generate_weekly_newsletter(args.year, args.week, publish=False)
+    return 0 if success else 1
+
+def cmd_publish(args):
+    """发布周刊文件到所有目标数据库，或只处理发件箱"""
+    from weekly_publisher import WeeklyPublisher
+
+    publisher = WeeklyPublisher()
+
+    if args.drain:
+        results = publisher.outbox.drain()
+        failed = [result for result in results if not result["success"]]
+        print(f"📮 处理了 {len(results)} 个发件箱任务，失败 {len(failed)} 个")
+        return 1 if failed else 0
+
+    filename = args.file
+    if filename is None:
+        import glob
+        weekly_files = glob.glob("超级个体周刊_第*期_*.md")
+        if not weekly_files:
+            print("❌ 没有找到周刊文件", file=sys.stderr)
+            return 1
+        filename = max(weekly_files)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    if args.enqueue_only:
+        job_ids = publisher.enqueue_weekly(content, args.week)
+        print(f"📮 已写入发件箱: {', '.join(f'#{job_id}' for job_id in job_ids)}")
+        return 0
+
+    result = publisher.publish_to_targets(content, args.week)
+    for name, target_result in result["targets"].items():
+        if target_result["success"]:
+            print(f"✅ [{name}] {target_result['url']}")
+        else:
+            print(f"❌ [{name}] {target_result['error']}", file=sys.stderr)
+    return 0 if result["success"] else 1
+
+def cmd_sync(args):
+    """拉取指定周的已归档文章"""
+    import json
+    from datetime import datetime
+    from notion_query_helper import NotionQueryHelper
+
+    query_helper = NotionQueryHelper()
+    if args.week is None:
+        articles = query_helper.get_this_week_archived_articles()
+    else:
+        articles = query_helper.get_archived_articles_for_week(
+            args.year or datetime.now().isocalendar()[0], args.week
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump([dict(article) for article in articles], f, indent=2, ensure_ascii=False)
+        print(f"✅ 已同步 {len(articles)} 篇文章到 {args.output}")
+    else:
+        for article in articles:
+            print(f"{article.get('archived_date', '')}\t{article.get('importance', '')}\t{article['title']}")
+    return 0
+
+def cmd_draft(args):
+    """增量同步本周草稿"""
+    from weekly_scheduler import WeeklyScheduler
+
+    drafts = WeeklyScheduler(find_newsletter(args.newsletter)).drafts
+    result = drafts.sync(args.year, args.week, full=args.full)
+    print(f"📝 第 {result['week_number']} 周草稿: 新增 {result['added']} 篇，"
+          f"更新 {result['updated']} 篇，共 {result['total']} 篇 ({result['elapsed']}s)")
+    return 0
+
+def cmd_backfill(args):
+    """为过去的若干周补生成周刊"""
+    from datetime import datetime
+    from weekly_scheduler import WeeklyScheduler
+
+    year = args.year or datetime.now().isocalendar()[0]
+    scheduler = WeeklyScheduler(find_newsletter(args.newsletter))
+    failures = 0
+
+    for week_number in range(args.from_week, args.to_week + 1):
+        success = scheduler.generate_weekly_newsletter(year, week_number, publish=args.publish)
+        print(f"{'✅' if success else '⚠️ '} {year} 年第 {week_number} 周")
+        failures += 0 if success else 1
+
+    return 1 if failures else 0
+
+def cmd_serve(args):
+    """启动定时调度"""
+    from weekly_scheduler import run_scheduler
+
+    # 常驻运行时同时写入 weekly_scheduler.log
+    handler = logging.FileHandler('weekly_scheduler.log', encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logging.getLogger().addHandler(handler)
+
+    run_scheduler(max_workers=args.workers)
+    return 0
+
+def cmd_service(args):
+    """启动常驻 HTTP 服务"""
+    from weekly_service import main as service_main
+
+    service_main(["--host", args.host, "--port", str(args.port)])
+    return 0
+
+def cmd_archive(args):
+    """导出列式归档，或在归档上做统计"""
+    from article_archive import ARCHIVE_DIR, ArticleArchive, export_archive, np
+
+    newsletter = find_newsletter(args.newsletter)
+    archive_dir = newsletter.path(ARCHIVE_DIR) if newsletter else ARCHIVE_DIR
+
+    if np is None:
+        print("❌ 列式归档需要 numpy，请先运行: pip install numpy", file=sys.stderr)
+        return 1
+
+    if args.action == "export":
+        query_helper = None
+        if newsletter:
+            from notion_query_helper import NotionQueryHelper
+            query_helper = NotionQueryHelper(newsletter.client, newsletter.source_database_id)
+        result = export_archive(query_helper, archive_dir)
+        print(f"🗄️  已导出 {result['count']} 篇文章、{result['categories']} 个分类到 {archive_dir} ({result['elapsed']}s)")
+        return 0
+
+    import time
+    started = time.perf_counter()
+    try:
+        archive = ArticleArchive(archive_dir)
+    except FileNotFoundError:
+        print(f"❌ 没有找到归档 {archive_dir}，请先运行 archive export", file=sys.stderr)
+        return 1
+    mask = archive.mask(category=args.category, importance=args.importance, start=args.start, end=args.end)
+    counts = archive.count_by(args.by, mask)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    for key, count in counts.items():
+        print(f"{key}\t{count}")
+    print(f"📊 共 {sum(counts.values())} / {len(archive)} 篇 ({elapsed:.1f} ms)")
+    return 0
+
+def cmd_trends(args):
+    """输出分类趋势报告（只读取已累计的周汇总）"""
+    from trend_stats import TREND_STATS_FILE, TrendStats
+
+    newsletter = find_newsletter(args.newsletter)
+    stats_file = newsletter.path(TREND_STATS_FILE) if newsletter else TREND_STATS_FILE
+    report = TrendStats(stats_file).report(args.weeks, args.year, args.week)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"✅ 趋势报告已写入 {args.output}")
+    else:
+        print(report)
+    return 0
+
+def cmd_search(args):
+    """搜索往期周刊（先增量索引新出现的周刊文件）"""
+    import time
+    from issue_index import INDEX_DB, IssueIndex
+
+    newsletter = find_newsletter(args.newsletter)
+    index = IssueIndex(newsletter.path(INDEX_DB) if newsletter else INDEX_DB)
+    index.update(newsletter.workdir if newsletter else ".")
+
+    started = time.perf_counter()
+    results = index.search(args.query, args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    for result in results:
+        print(f"📰 {result['title']} ({result['path']}，命中 {result['matches']} 次)")
+        print(f"   {result['snippet']}")
+    print(f"🔎 {len(results)} 期 / 共 {len(index)} 期 ({elapsed:.1f} ms)")
+    return 0 if results else 1
+
+def cmd_featured(args):
+    """从发布历史重建已收录文章索引"""
+    from featured_index import FEATURED_DB, FeaturedIndex
+    from publish_history import PublishHistory
+
+    newsletter = find_newsletter(args.newsletter)
+    index = FeaturedIndex(newsletter.path(FEATURED_DB) if newsletter else FEATURED_DB)
+    history = PublishHistory(newsletter.path("publish_history.db") if newsletter else "publish_history.db")
+    result = index.rebuild(history)
+    print(f"✅ 已从 {result['records']} 条发布记录重建，共 {result['keys']} 个键")
+    return 0
+
+def cmd_cover(args):
+    """批量渲染往期周刊的封面（需要 Pillow）"""
+    from cover_renderer import COVERS_DIR, Image, find_font, issue_cover_spec, render_covers
+    from issue_index import issue_files
+
+    if Image is None:
+        print("❌ 封面渲染需要 Pillow，请先运行: pip install -r requirements-optional.txt")
+        return 1
+    if find_font() is None:
+        print("❌ 没有找到中文字体，请设置 WEEKLY_COVER_FONT 或把 NotoSansSC-Bold.otf 放入 fonts/ 目录")
+        return 1
+
+    newsletter = find_newsletter(args.newsletter)
+    files = args.files or issue_files(newsletter.workdir if newsletter else ".")
+    specs = [spec for spec in map(issue_cover_spec, files) if spec]
+    if not specs:
+        print("❌ 没有找到周刊文件")
+        return 1
+
+    output_dir = args.output or (newsletter.path(COVERS_DIR) if newsletter else COVERS_DIR)
+    result = render_covers(specs, output_dir, args.workers)
+    for cover in result["covers"]:
+        print(f"🖼️  第{cover['issue']:02d}期: {cover['main']}  {cover['square']}")
+    print(f"✅ 新渲染 {result['rendered']} 张，复用缓存 {result['cached']} 张")
+    return 0
+
+def cmd_site(args):
+    """增量构建往期静态站点"""
+    from newsletters import Newsletter
+    from notion_helper import NotionHelper
+    from static_site import SITE_DIR, StaticSite
+
+    newsletter = find_newsletter(args.newsletter) or Newsletter("default", site_url=NotionHelper().get_site_url())
+    output_dir = args.output or newsletter.path(SITE_DIR)
+    site = StaticSite(output_dir, newsletter.title, newsletter.site_url)
+    result = site.build(newsletter.workdir, full=args.full)
+    print(f"✅ 共 {result['issues']} 期，{result['changed']} 期有变化，写入 {len(result['written'])} 个文件 → {output_dir}")
+    return 0
+
+def cmd_export(args):
+    """把周刊导出为邮件 HTML"""
+    from issue_exporters import EXPORTS_DIR, export_email_html
+    from issue_index import issue_files
+
+    filename = args.file
+    if filename is None:
+        import glob
+        weekly_files = glob.glob("超级个体周刊_第*期_*.md") or issue_files()
+        if not weekly_files:
+            print("❌ 没有找到周刊文件", file=sys.stderr)
+            return 1
+        filename = max(weekly_files)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        content = f.read()
+    output = args.output or os.path.join(EXPORTS_DIR, f"{os.path.splitext(os.path.basename(filename))[0]}.html")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(export_email_html(content))
+    print(f"✅ 邮件 HTML 已写入 {output}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="weekly_cli", description="超级个体周刊命令行工具")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出调试日志")
+    parser.add_argument("--profile", action="store_true",
+                        help="用 cProfile 和 tracemalloc 剖析各阶段，等同于 WEEKLY_PROFILE=all")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="生成周刊（不发布）")
+    generate.add_argument("--year", type=int, help="ISO 年份，默认今年")
+    generate.add_argument("--week", type=int, help="ISO 周数，默认本周")
+    generate.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    generate.set_defaults(func=cmd_generate)
+
+    publish = subparsers.add_parser("publish", help="发布周刊到所有目标数据库")
+    publish.add_argument("file", nargs="?", help="周刊文件，默认最新的周刊文件")
+    publish.add_argument("--week", type=int, help="期号，默认本周")
+    mode = publish.add_mutually_exclusive_group()
+    mode.add_argument("--enqueue-only", action="store_true", help="只写入发件箱，由后台任务上传")
+    mode.add_argument("--drain", action="store_true", help="只处理发件箱中未完成的任务")
+    publish.set_defaults(func=cmd_publish)
+
+    sync = subparsers.add_parser("sync", help="拉取已归档文章")
+    sync.add_argument("--year", type=int, help="ISO 年份，默认今年")
+    sync.add_argument("--week", type=int, help="ISO 周数，默认本周")
+    sync.add_argument("--output", help="保存为 JSON 文件")
+    sync.set_defaults(func=cmd_sync)
+
+    draft = subparsers.add_parser("draft", help="增量同步草稿（周日只需定稿发布）")
+    draft.add_argument("--year", type=int, help="ISO 年份，默认今年")
+    draft.add_argument("--week", type=int, help="ISO 周数，默认本周")
+    draft.add_argument("--full", action="store_true", help="忽略同步水位，重新拉取整周")
+    draft.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    draft.set_defaults(func=cmd_draft)
+
+    backfill = subparsers.add_parser("backfill", help="为过去的若干周补生成周刊")
+    backfill.add_argument("--year", type=int, help="ISO 年份，默认今年")
+    backfill.add_argument("--from-week", type=int, required=True)
+    backfill.add_argument("--to-week", type=int, required=True)
+    backfill.add_argument("--publish", action="store_true", help="同时写入发件箱并发布")
+    backfill.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    backfill.set_defaults(func=cmd_backfill)
+
+    serve = subparsers.add_parser("serve", help="启动定时调度")
+    serve.add_argument("--workers", type=int, default=4, help="多份周刊共用的最大并发数")
+    serve.set_defaults(func=cmd_serve)
+
+    service = subparsers.add_parser("service", help="启动常驻 HTTP 服务（生成、发布、预览）")
+    service.add_argument("--host", default="127.0.0.1", help="默认只监听本机")
+    service.add_argument("--port", type=int, default=8080)
+    service.set_defaults(func=cmd_service)
+
+    archive = subparsers.add_parser("archive", help="导出列式归档并做全量统计（需要 numpy）")
+    archive.add_argument("action", choices=["export", "stats"])
+    archive.add_argument("--category", help="分类名中包含的文字，如 AI")
+    archive.add_argument("--importance", help="重要度，如 高")
+    archive.add_argument("--start", help="起始日期 YYYY-MM-DD")
+    archive.add_argument("--end", help="结束日期 YYYY-MM-DD")
+    archive.add_argument("--by", choices=["month", "week", "category", "importance"], default="month",
+                         help="分组方式，默认按月")
+    archive.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    archive.set_defaults(func=cmd_archive)
+
+    trends = subparsers.add_parser("trends", help="输出分类趋势报告")
+    trends.add_argument("--weeks", type=int, default=12, help="报告覆盖的周数，默认 12")
+    trends.add_argument("--year", type=int, help="截止周的 ISO 年份，默认今年")
+    trends.add_argument("--week", type=int, help="截止周，默认本周")
+    trends.add_argument("--output", help="保存为 Markdown 文件")
+    trends.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    trends.set_defaults(func=cmd_trends)
+
+    search = subparsers.add_parser("search", help="搜索往期周刊")
+    search.add_argument("query", help="空格分隔的关键词，每个都必须出现")
+    search.add_argument("--limit", type=int, default=10)
+    search.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    search.set_defaults(func=cmd_search)
+
+    featured = subparsers.add_parser("featured", help="维护往期已收录文章索引")
+    featured.add_argument("action", choices=["rebuild"])
+    featured.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    featured.set_defaults(func=cmd_featured)
+
+    cover = subparsers.add_parser("cover", help="渲染周刊封面（需要 Pillow）")
+    cover.add_argument("files", nargs="*", help="周刊文件，默认目录中的全部往期周刊")
+    cover.add_argument("--output", help="封面目录，默认 covers/")
+    cover.add_argument("--workers", type=int, help="并行进程数，默认 CPU 核数")
+    cover.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    cover.set_defaults(func=cmd_cover)
+
+    site = subparsers.add_parser("site", help="增量构建往期静态站点")
+    site.add_argument("--full", action="store_true", help="忽略构建清单，全部重建")
+    site.add_argument("--output", help="站点目录，默认 site/")
+    site.add_argument("--newsletter", help="notion.newsletters 中的周刊名，默认超级个体周刊")
+    site.set_defaults(func=cmd_site)
+
+    export = subparsers.add_parser("export", help="把周刊导出为邮件 HTML（样式内联）")
+    export.add_argument("file", nargs="?", help="周刊文件，默认最新的周刊文件")
+    export.add_argument("--output", help="输出文件，默认 exports/<周刊文件名>.html")
+    export.set_defaults(func=cmd_export)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    if args.profile:
+        os.environ["WEEKLY_PROFILE"] = "all"
+
+    # generate / backfill 在调度器内部记录运行，这里只为其余一次性命令记录
+    if args.command in ("sync", "publish", "draft"):
+        from pipeline_metrics import pipeline_run
+
+        with pipeline_run(args.command) as run:
+            code = args.func(args)
+            run.success = code == 0
+        return code
+
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,21 +7,25 @@
 import json
 from datetime import datetime, timedelta
 from notion_helper import NotionHelper
+from pipeline_metrics import timed_stage
 import re
 
-# 添加发布器导入
-try:
-    from weekly_publisher import WeeklyPublisher
-except ImportError:
-    WeeklyPublisher = None
-
 class WeeklyGenerator:
-    def __init__(self):
+    def __init__(self, title="超级个体周刊", tagline="让每个人都成为独当一面的超级个体", publisher=None, trends=None,
+                 related=None, archive_url=None):
         self.helper = NotionHelper()
+        self.title = title
+        self.tagline = tagline
+        # 设置后（TrendStats）每期更新分类趋势统计，并在周刊中加入趋势小节
+        self.trends = trends
+        # 设置后（RelatedArticles）每篇文章附上往期最相似的一篇
+        self.related = related
+        # 往期站点首页（static_site），设置后结尾的「往期周刊」链接到这里
+        self.archive_url = archive_url
         self.db_id = self.helper.get_database_id()
         
-        # 初始化发布器
-        self.publisher = WeeklyPublisher() if WeeklyPublisher else None
+        # 发布器在首次使用时才导入和初始化
+        self._publisher = publisher
         
         # 内容分类关键词映射
         self.category_keywords = {
@@ -51,6 +55,17 @@ class WeeklyGenerator:
             ]
         }
     
+    @property
+    def publisher(self):
+        """周刊发布器，weekly_publisher 不可用时为 None"""
+        if self._publisher is None:
+            try:
+                from weekly_publisher import WeeklyPublisher
+            except ImportError:
+                return None
+            self._publisher = WeeklyPublisher()
+        return self._publisher
+    
     def classify_article(self, title, summary):
         """基于标题和摘要对文章进行分类"""
         content = f"{title} {summary}".lower()
@@ -105,17 +120,27 @@ class WeeklyGenerator:
             }
         ]
     
-    def generate_weekly_content_from_articles(self, articles, week_number=None):
+    @timed_stage(count=lambda content, self, articles, *_, **__: len(articles),
+                 size=lambda content, *_, **__: len(content.encode('utf-8')))
+    def generate_weekly_content_from_articles(self, articles, week_number=None, year=None):
         """基于真实文章数据生成周刊内容"""
         if week_number is None:
             week_number = datetime.now().isocalendar()[1]
+        if year is None:
+            year = datetime.now().isocalendar()[0]
         
         # 分类文章
         categorized_articles = self.categorize_articles(articles)
         
+        # 整期文章一起查询往期相关文章
+        related = {}
+        if self.related is not None:
+            matches = self.related.related_for(articles)
+            related = {id(article): match[0] for article, match in zip(articles, matches) if match}
+        
         # 生成周刊内容
-        content = f"""# 超级个体周刊 第{week_number:02d}期
-> 让每个人都成为独当一面的超级个体
+        content = f"""# {self.title} 第{week_number:02d}期
+> {self.tagline}
 
 ## 🎯 本周导读
 
@@ -132,7 +157,7 @@ class WeeklyGenerator:
         
         for category in priority_order:
             if categorized_articles[category]:
-                content += self.generate_section_natural(category, categorized_articles[category])
+                content += self.generate_section_natural(category, categorized_articles[category], related)
         
         # 添加推荐部分
         high_importance_articles = [a for a in articles if a.get("importance") == "高"]
@@ -141,6 +166,10 @@ class WeeklyGenerator:
             content += f"**如果你只能看一篇**，我推荐《{high_importance_articles[0]['title']}》。\n\n"
             content += f"为什么？{high_importance_articles[0]['summary'][:50]}... 这种数据驱动的分析方法，真的可以直接用到实际工作中。\n\n"
         
+        # 加入趋势小节（只读：统计在周刊保存时才更新）
+        if self.trends is not None:
+            content += self.trends.trend_section(year, week_number, categorized=categorized_articles)
+        
         # 添加结尾
         content += f"""## 🎉 写在最后
 
@@ -154,16 +183,39 @@ class WeeklyGenerator:
 
 ---
 💌 觉得有用的话，转发给朋友吧  
-💬 想交流的话，加我微信：[待补充]  
+{self.archive_line()}💬 想交流的话，加我微信：[待补充]  
 
 **感谢你花时间看完这期内容！**
 
 ---
-*超级个体周刊 - 每周日更新*  
+*{self.title} - 每周日更新*  
 *第{week_number:02d}期 | {datetime.now().strftime('%Y年%m月%d日')}*"""
         
         return content
     
+    def archive_line(self):
+        """结尾的往期链接，未配置往期站点时为空"""
+        if not self.archive_url:
+            return ""
+        return f"🔗 往期周刊: [查看往期内容]({self.archive_url})  \n"
+    
+    def categorize_article(self, article):
+        """返回单篇文章所属的周刊分类"""
+        # 映射到标准分类
+        category = article.get("category", "")
+        if "AI" in category or "大模型" in category:
+            if "工具" in article["title"] or "工具" in article["summary"]:
+                return "本周AI工具"
+            return "AI前沿动态"
+        elif "增长" in category or "运营" in category:
+            return "运营&增长"
+        elif "设计" in category:
+            return "优秀设计赏析"
+        elif "产品" in category:
+            return "产品力提升"
+        return "超级个体洞察"
+    
+    @timed_stage(count=lambda categorized, *_: sum(len(group) for group in categorized.values()))
     def categorize_articles(self, articles):
         """将文章按照超级个体周刊的分类进行归类"""
         categorized = {
@@ -176,28 +228,19 @@ class WeeklyGenerator:
         }
         
         for article in articles:
-            # 使用AI分类算法
-            category = self.classify_article(article["title"], article["summary"])
-            
-            # 映射到标准分类
-            if "AI" in article.get("category", "") or "大模型" in article.get("category", ""):
-                if "工具" in article["title"] or "工具" in article["summary"]:
-                    categorized["本周AI工具"].append(article)
-                else:
-                    categorized["AI前沿动态"].append(article)
-            elif "增长" in article.get("category", "") or "运营" in article.get("category", ""):
-                categorized["运营&增长"].append(article)
-            elif "设计" in article.get("category", ""):
-                categorized["优秀设计赏析"].append(article)
-            elif "产品" in article.get("category", ""):
-                categorized["产品力提升"].append(article)
-            else:
-                categorized["超级个体洞察"].append(article)
+            # 草稿中已分好类的文章直接沿用
+            category = article.get("newsletter_category") or self.categorize_article(article)
+            categorized[category].append(article)
         
         return categorized
     
-    def generate_section_natural(self, category, articles):
-        """生成单个分类的自然化内容"""
+    def generate_section_natural(self, category, articles, related=None):
+        """
+        生成单个分类的自然化内容
+        
+        Args:
+            related (dict): {id(文章): 往期相关文章}，有时在原文链接后附上
+        """
         if not articles:
             return ""
         
@@ -236,7 +279,11 @@ class WeeklyGenerator:
             if category == "本周AI工具":
                 section += f"- **推荐指数**: {'⭐' * (5 if article.get('importance') == '高' else 4 if article.get('importance') == '中' else 3)}\n"
             
-            section += f"- **原文链接**: [{article['title']}]({article['url']})\n\n"
+            section += f"- **原文链接**: [{article['title']}]({article['url']})\n"
+            match = related.get(id(article)) if related else None
+            if match:
+                section += f"- **往期相关**: [{match['title']}]({match['url']})（{match['issue']}）\n"
+            section += "\n"
         
         return section
     
@@ -277,6 +324,12 @@ class WeeklyGenerator:
         # 分类文章
         categorized_articles = self.categorize_articles(articles)
         
+        # 整期文章一起查询往期相关文章
+        related = {}
+        if self.related is not None:
+            matches = self.related.related_for(articles)
+            related = {id(article): match[0] for article, match in zip(articles, matches) if match}
+        
         # 生成周刊内容
         content = f"""# 超级个体周刊 第{week_number}期
 > 让每个人都成为独当一面的超级个体
@@ -302,11 +355,11 @@ class WeeklyGenerator:
             content += f"- **核心观点**: {high_importance_articles[0]['summary'][:100]}...\n"
             content += f"- **推荐理由**: 高价值内容，值得深度阅读和实践\n\n"
         
-        # 添加结尾
-        content += """---
+        # 添加结尾（未配置往期站点时保留占位链接）
+        archive_line = self.archive_line() or "🔗 往期周刊: [查看往期内容]  \n"
+        content += f"""---
 💌 如果这期内容对你有帮助，欢迎转发给更多朋友  
-🔗 往期周刊: [查看往期内容]  
-💬 交流群: [加入超级个体成长群]  
+{archive_line}💬 交流群: [加入超级个体成长群]  
 
 **下期预告**: 我们将深入探讨AI Agent的实际应用案例，以及如何构建个人知识管理系统。
 
@@ -8,11 +8,15 @@ import json
 import logging
 from datetime import datetime
 from notion_helper import NotionHelper
+from publish_outbox import PublishOutbox
+from pipeline_metrics import timed_stage
 
 class WeeklyPublisher:
-    def __init__(self, target_database_id=None):
+    def __init__(self, target_database_id=None, outbox=None, targets=None):
         self.helper = NotionHelper()
-        self.target_db_id = target_database_id or "1fc64cadd821806db447fe4e7d4365b7"
+        self._outbox = outbox
+        self.configured_targets = targets
+        self.set_target(target_database_id)
         
         # 配置日志
         logging.basicConfig(
@@ -20,6 +24,94 @@ class WeeklyPublisher:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
     
+    def set_target(self, database_id=None):
+        """
+        设置发布目标，未指定时使用配置中的全部发布目标
+        
+        Args:
+            database_id (str): 只发布到这个数据库
+        """
+        configured = self.configured_targets or self.helper.get_publish_targets()
+        
+        if database_id:
+            matched = [t for t in configured if t["database_id"] == database_id]
+            self.targets = matched[:1] or [{
+                "name": database_id,
+                "database_id": database_id,
+                "title_property": "标题"
+            }]
+        else:
+            self.targets = configured
+        
+        self.target_db_id = self.targets[0]["database_id"] if self.targets else None
+        self.title_property = self.targets[0]["title_property"] if self.targets else "标题"
+    
+    @property
+    def outbox(self):
+        """发布发件箱，首次使用时创建"""
+        if self._outbox is None:
+            self._outbox = PublishOutbox()
+        return self._outbox
+    
+    def enqueue_weekly(self, weekly_content, week_number=None, title_prefix="超级个体周刊", context=None):
+        """
+        把周刊写入发件箱（每个发布目标一个任务），由后台任务负责上传
+        
+        Args:
+            weekly_content (str): 周刊的 Markdown 内容
+            week_number (int): 周数
+            title_prefix (str): 标题前缀
+            context (dict): 全部目标发布完成后需要的上下文，提供时这些任务属于同一个发布批次
+            
+        Returns:
+            list: 发件箱任务ID列表
+        """
+        if week_number is None:
+            week_number = datetime.now().isocalendar()[1]
+        
+        page_title = f"{title_prefix} 第{week_number:02d}期"
+        blocks = self.markdown_to_notion_blocks(weekly_content)
+        batch_id = self.outbox.create_batch(context) if context is not None else None
+        
+        return [
+            self.outbox.enqueue(target["database_id"], page_title, blocks, week_number,
+                                title_property=target["title_property"], batch_id=batch_id)
+            for target in self.targets
+        ]
+    
+    def publish_to_targets(self, weekly_content, week_number=None, title_prefix="超级个体周刊"):
+        """
+        把周刊并发发布到所有配置的目标数据库，块内容只转换一次
+        
+        Args:
+            weekly_content (str): 周刊的 Markdown 内容
+            week_number (int): 周数
+            title_prefix (str): 标题前缀
+            
+        Returns:
+            dict: 汇总结果，targets 中为每个目标的发布结果
+        """
+        if week_number is None:
+            week_number = datetime.now().isocalendar()[1]
+        
+        page_title = f"{title_prefix} 第{week_number:02d}期"
+        
+        if not self.targets:
+            return {"success": False, "title": page_title, "targets": {}, "error": "未配置发布目标"}
+        
+        blocks = self.markdown_to_notion_blocks(weekly_content)
+        logging.info(f"准备发布周刊到 {len(self.targets)} 个数据库: {page_title}")
+        
+        # 未配置 API Token 时只返回模拟结果
+        results = self.outbox.publish_fanout(self.targets, page_title, blocks, week_number,
+                                             dry_run=not self.helper.has_api_token())
+        
+        return {
+            "success": all(result["success"] for result in results.values()),
+            "title": page_title,
+            "targets": results
+        }
+    
     def publish_weekly_to_notion(self, weekly_content, week_number=None, title_prefix="超级个体周刊"):
         """
         将周刊内容发布到 Notion 数据库
@@ -42,13 +134,16 @@ class WeeklyPublisher:
             # 将 Markdown 内容转换为 Notion 块
             blocks = self.markdown_to_notion_blocks(weekly_content)
             
+            if not self.target_db_id:
+                raise ValueError("未配置发布目标，请在 notion_config.json 中设置 publish_targets")
+            
             # 创建页面数据
             page_data = {
                 "parent": {
                     "database_id": self.target_db_id
                 },
                 "properties": {
-                    "标题": {
+                    self.title_property: {
                         "title": [
                             {
                                 "text": {
@@ -64,6 +159,14 @@ class WeeklyPublisher:
             logging.info(f"准备发布周刊到数据库: {self.target_db_id}")
             logging.info(f"页面标题: {page_title}")
             
+            # 配置了 API Token 时先写入发件箱再上传，失败的分块可以之后续传
+            if self.helper.has_api_token():
+                job_id = self.outbox.enqueue(
+                    self.target_db_id, page_title, blocks, week_number,
+                    properties=page_data["properties"]
+                )
+                return self.outbox.process_job(job_id)
+            
             # 这里需要调用 MCP Notion API 来创建页面
             # 由于我们使用的是 MCP，我们需要通过 MCP 接口来创建
             
@@ -90,6 +193,8 @@ class WeeklyPublisher:
                 "error": str(e)
             }
     
+    @timed_stage(count=lambda blocks, *_: len(blocks),
+                 size=lambda blocks, self, markdown_content: len(markdown_content.encode('utf-8')))
     def markdown_to_notion_blocks(self, markdown_content):
         """
         将 Markdown 内容转换为 Notion 块格式
@@ -216,28 +321,24 @@ class WeeklyPublisher:
             database_name (str): 数据库名称
         """
         try:
-            # 读取现有配置
-            with open('notion_config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # 添加新数据库配置
-            config['notion']['databases']['weekly_publish'] = {
-                "id": database_id,
-                "name": database_name,
-                "description": "用于发布超级个体周刊的数据库",
-                "properties": {
-                    "标题": "title",
-                    "发布日期": "date",
-                    "状态": "select",
-                    "周数": "number"
-                },
-                "created_date": datetime.now().strftime('%Y-%m-%d'),
-                "last_updated": datetime.now().strftime('%Y-%m-%d')
-            }
+            def add_weekly_database(config):
+                # 添加新数据库配置
+                config['notion']['databases']['weekly_publish'] = {
+                    "id": database_id,
+                    "name": database_name,
+                    "description": "用于发布超级个体周刊的数据库",
+                    "properties": {
+                        "标题": "title",
+                        "发布日期": "date",
+                        "状态": "select",
+                        "周数": "number"
+                    },
+                    "created_date": datetime.now().strftime('%Y-%m-%d'),
+                    "last_updated": datetime.now().strftime('%Y-%m-%d')
+                }
             
-            # 保存配置
-            with open('notion_config.json', 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            # 在文件锁内读取最新配置并原子写回
+            self.helper.update_config(add_weekly_database)
             
             logging.info(f"✅ 已更新配置文件，添加新数据库: {database_name}")
             
@@ -337,7 +438,7 @@ def main():
                 db_name = "周刊发布数据库"
             
             publisher.update_config_with_new_database(db_id, db_name)
-            publisher.target_db_id = db_id
+            publisher.set_target(db_id)
             print(f"✅ 已更新目标数据库为: {db_id}")
         
         elif choice == "5":
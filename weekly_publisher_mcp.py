@@ -7,10 +7,20 @@
 import json
 import logging
 from datetime import datetime
+from notion_helper import NotionHelper
 
 class WeeklyPublisherMCP:
-    def __init__(self, target_database_id="1fc64cadd821806db447fe4e7d4365b7"):
-        self.target_db_id = target_database_id
+    def __init__(self, target_database_id=None):
+        targets = NotionHelper().get_publish_targets()
+        if target_database_id:
+            targets = [t for t in targets if t["database_id"] == target_database_id] or [{
+                "name": target_database_id,
+                "database_id": target_database_id,
+                "title_property": "标题"
+            }]
+        
+        self.target_db_id = targets[0]["database_id"] if targets else None
+        self.title_property = targets[0]["title_property"] if targets else "标题"
         
         # 配置日志
         logging.basicConfig(
@@ -31,6 +41,9 @@ class WeeklyPublisherMCP:
             dict: 发布结果
         """
         try:
+            if not self.target_db_id:
+                raise ValueError("未配置发布目标，请在 notion_config.json 中设置 publish_targets")
+            
             if week_number is None:
                 week_number = datetime.now().isocalendar()[1]
             
@@ -75,7 +88,7 @@ class WeeklyPublisherMCP:
                     "database_id": self.target_db_id
                 },
                 "properties": {
-                    "标题": {
+                    self.title_property: {
                         "title": [
                             {
                                 "text": {
@@ -4,31 +4,59 @@
 每周日自动生成周刊
 """
 
-import schedule
-import time
 import json
 import logging
+import os
 from datetime import datetime, timedelta
-from weekly_generator import WeeklyGenerator
 from notion_helper import NotionHelper
 from notion_query_helper import NotionQueryHelper
+from draft_pipeline import DRAFTS_DIR, DraftPipeline
+from featured_index import FEATURED_DB, FeaturedIndex
+from newsletters import Newsletter, load_newsletters
+from pipeline_metrics import instrumented_run
+from related_articles import RELATED_FILE, RelatedArticles
+from trend_stats import TREND_STATS_FILE, TrendStats
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('weekly_scheduler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+def setup_logging():
+    """配置日志（同时写入 weekly_scheduler.log），只在运行调度器时调用"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('weekly_scheduler.log', encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
 
 class WeeklyScheduler:
-    def __init__(self):
-        self.generator = WeeklyGenerator()
+    def __init__(self, newsletter=None):
+        """
+        Args:
+            newsletter (Newsletter): 要生成的周刊，默认是配置中的超级个体周刊
+        """
+        from weekly_generator import WeeklyGenerator
+        
+        self.newsletter = newsletter or Newsletter("default", site_url=NotionHelper().get_site_url())
+        client = self.newsletter.client
+        
+        publisher = None
+        if newsletter is not None:
+            # 每份周刊有自己的发件箱和发布目标，互不影响
+            from weekly_publisher import WeeklyPublisher
+            from publish_outbox import PublishOutbox
+            outbox = PublishOutbox(self.newsletter.path("publish_outbox.db"), client=client)
+            publisher = WeeklyPublisher(outbox=outbox, targets=self.newsletter.publish_targets)
+        
+        self.trends = TrendStats(self.newsletter.path(TREND_STATS_FILE))
+        self.related = RelatedArticles(self.newsletter.path(RELATED_FILE))
+        self.generator = WeeklyGenerator(self.newsletter.title, self.newsletter.tagline, publisher,
+                                         self.trends, self.related, self.newsletter.site_url)
         self.helper = NotionHelper()
-        self.query_helper = NotionQueryHelper()
-        self.db_id = self.helper.get_database_id()
+        self.query_helper = NotionQueryHelper(client, self.newsletter.source_database_id)
+        self.db_id = self.query_helper.db_id
+        self.featured = FeaturedIndex(self.newsletter.path(FEATURED_DB))
+        self.drafts = DraftPipeline(self.newsletter.path(DRAFTS_DIR), query_helper=self.query_helper,
+                                    generator=self.generator, featured=self.featured)
         
     def get_archived_articles_this_week(self):
         """获取本周已归档的文章"""
@@ -55,31 +83,199 @@ class WeeklyScheduler:
             logging.error(f"获取文章时出错: {str(e)}")
             return []
     
-    def generate_weekly_newsletter(self):
-        """生成周刊的主要函数"""
-        try:
-            logging.info("开始生成周刊...")
+    def build_issue(self, year=None, week_number=None):
+        """
+        获取文章并渲染周刊（不保存、不发布）
+        
+        Args:
+            year (int): ISO 年份，与 week_number 一起指定时生成该周
+            week_number (int): ISO 周数，默认本周
             
+        Returns:
+            tuple: (周刊内容, 文章列表, 期号)，没有文章时内容为 None
+        """
+        draft_year, draft_week = datetime.now().isocalendar()[:2]
+        if week_number is not None:
+            draft_year, draft_week = year or draft_year, week_number
+        
+        # 一周内已预热草稿时只需定稿：增量同步最后一批文章，沿用已有分类
+        if self.drafts.exists(draft_year, draft_week):
+            content, articles = self.drafts.finalize(draft_year, draft_week)
+            if content:
+                return content, articles, draft_week
+        
+        if week_number is None:
             # 获取本周已归档文章
             articles = self.get_archived_articles_this_week()
+            week_number = draft_week
+        else:
+            articles = self.query_helper.get_archived_articles_for_week(draft_year, week_number)
+        
+        articles = self.drop_featured(articles, draft_year, week_number)
+        if not articles:
+            return None, [], week_number
+        
+        # 生成周刊内容
+        content = self.generator.generate_weekly_content_from_articles(articles, week_number, draft_year)
+        return content, articles, week_number
+    
+    def save_issue(self, content, week_number, articles=None, year=None):
+        """
+        保存周刊文件，返回文件名
+        
+        Args:
+            articles (list): 本期文章，提供时同时更新趋势统计
+            year (int): 本期的 ISO 年份，默认今年
+        """
+        filename = self.newsletter.path(
+            f"{self.newsletter.title}_第{week_number:02d}期_{datetime.now().strftime('%Y%m%d')}.md"
+        )
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(content)
+        
+        logging.info(f"✅ 周刊生成成功: {filename}")
+        if articles:
+            self.update_trends(articles, year or datetime.now().isocalendar()[0], week_number)
+        self.index_issue(filename)
+        self.render_cover(filename)
+        self.build_site()
+        self.export_email(filename, content)
+        return filename
+    
+    def update_trends(self, articles, year, week_number):
+        """把本期文章计入趋势统计，统计失败不影响生成"""
+        try:
+            self.trends.update(self.generator.categorize_articles(articles), year, week_number)
+        except Exception as e:
+            logging.error(f"更新趋势统计时出错: {str(e)}")
+    
+    def index_issue(self, filename):
+        """把新的周刊文件加入往期索引，索引失败不影响生成"""
+        try:
+            from issue_index import INDEX_DB, IssueIndex
+            IssueIndex(self.newsletter.path(INDEX_DB)).add_document(filename)
+        except Exception as e:
+            logging.error(f"更新往期索引时出错: {str(e)}")
+    
+    def export_email(self, filename, content):
+        """把本期导出为邮件 HTML（exports/ 中与周刊文件同名），导出失败不影响生成"""
+        try:
+            from issue_exporters import EXPORTS_DIR, export_email_html
+            export_dir = self.newsletter.path(EXPORTS_DIR)
+            os.makedirs(export_dir, exist_ok=True)
+            export_path = os.path.join(export_dir, f"{os.path.splitext(os.path.basename(filename))[0]}.html")
+            with open(export_path, 'w', encoding='utf-8') as f:
+                f.write(export_email_html(content))
+        except Exception as e:
+            logging.error(f"导出邮件 HTML 时出错: {str(e)}")
+    
+    def build_site(self):
+        """增量更新往期站点（只渲染新的一期和首页、订阅、相关分类页），失败不影响生成"""
+        try:
+            from static_site import SITE_DIR, StaticSite
+            site = StaticSite(self.newsletter.path(SITE_DIR), self.newsletter.title, self.newsletter.site_url)
+            site.build(self.newsletter.workdir)
+        except Exception as e:
+            logging.error(f"更新往期站点时出错: {str(e)}")
+    
+    def render_cover(self, filename):
+        """渲染本期封面（未安装 Pillow 或没有中文字体时跳过），渲染失败不影响生成"""
+        try:
+            from cover_renderer import COVERS_DIR, Image, find_font, issue_cover_spec, render_covers
+            if Image is None:
+                logging.debug("未安装 Pillow，跳过封面渲染")
+                return
+            if find_font() is None:
+                logging.warning("没有找到中文字体，跳过封面渲染；可设置 WEEKLY_COVER_FONT 或放入 fonts/ 目录")
+                return
+            spec = issue_cover_spec(filename)
+            if spec:
+                render_covers([spec], self.newsletter.path(COVERS_DIR), workers=1)
+        except Exception as e:
+            logging.error(f"渲染封面时出错: {str(e)}")
+    
+    def drop_featured(self, articles, year, week_number):
+        """去掉往期已收录的文章；索引为空时先从发布历史重建"""
+        try:
+            if not len(self.featured):
+                from publish_history import PublishHistory
+                self.featured.rebuild(PublishHistory(self.newsletter.path("publish_history.db")))
+            return self.featured.filter_new(articles, year, week_number)[0]
+        except Exception as e:
+            logging.error(f"检查往期已收录文章时出错: {str(e)}")
+            return articles
+    
+    def publish_issue(self, content, week_number, articles, year=None):
+        """
+        写入发件箱再上传；发布失败时由后台任务续传，无需重新生成
+        
+        每个目标发布完成后写入发布历史，全部目标发布完成后更新文章状态、
+        往期相关推荐和已收录文章（无论是这里同步上传还是之后由后台任务续传），见 on_job_done
+        
+        Args:
+            year (int): 本期的 ISO 年份，默认今年
+        
+        Returns:
+            list: 发件箱任务，未配置 Token 时为空列表
+        """
+        job_ids = self.enqueue_publish(content, week_number, articles, year)
+        if not job_ids:
+            return []
+        
+        self.drain_outbox()
+        outbox = self.generator.publisher.outbox
+        return [outbox.get_job(job_id) for job_id in job_ids]
+    
+    def find_published(self, week_number, year=None):
+        """
+        查找这一期已经写入发件箱的发布任务，用于重试时不重复发布
+        
+        失败的任务重新入队，和未完成的任务一起续传；已完成的目标不会再创建页面
+        
+        Returns:
+            list: 发件箱任务，这一期还没有发布过（或未配置 Token）时为 None
+        """
+        outbox = self.outbox
+        if outbox is None:
+            return None
+        batch_id = outbox.find_batch(newsletter=self.newsletter.name,
+                                     year=year or datetime.now().isocalendar()[0], week_number=week_number)
+        if batch_id is None:
+            return None
+        
+        jobs = outbox.batch_jobs(batch_id)
+        if any(job["status"] != "done" for job in jobs):
+            for job in jobs:
+                if job["status"] == "failed":
+                    outbox.requeue(job["id"])
+            self.drain_outbox()
+            jobs = outbox.batch_jobs(batch_id)
+        return jobs
+    
+    @instrumented_run("weekly_newsletter", labels=lambda self, *_, **__: {"newsletter": self.newsletter.name},
+                      profile_dir=lambda self, *_, **__: self.newsletter.path("profiles"))
+    def generate_weekly_newsletter(self, year=None, week_number=None, publish=True):
+        """
+        生成周刊的主要函数
+        
+        Args:
+            year (int): ISO 年份，与 week_number 一起指定时生成该周（用于补发）
+            week_number (int): ISO 周数，默认本周
+            publish (bool): 是否写入发件箱并发布
+        """
+        try:
+            logging.info("开始生成周刊...")
             
-            if not articles:
+            content, articles, week_number = self.build_issue(year, week_number)
+            if not content:
                 logging.warning("没有找到已归档的文章，跳过周刊生成")
                 return False
             
-            # 计算周数
-            week_number = datetime.now().isocalendar()[1]
-            
-            # 生成周刊内容
-            content = self.generator.generate_weekly_content_from_articles(articles, week_number)
-            
-            # 保存周刊文件
-            filename = f"超级个体周刊_第{week_number:02d}期_{datetime.now().strftime('%Y%m%d')}.md"
+            filename = self.save_issue(content, week_number, articles, year)
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            logging.info(f"✅ 周刊生成成功: {filename}")
+            if publish:
+                self.publish_issue(content, week_number, articles, year)
             
             # 发送通知（可选）
             self.send_notification(filename, len(articles))
@@ -90,12 +286,124 @@ class WeeklyScheduler:
             logging.error(f"生成周刊时出错: {str(e)}")
             return False
     
+    @property
+    def outbox(self):
+        """发布发件箱（已注册发布完成后的处理），未配置 Token 时为 None"""
+        publisher = self.generator.publisher
+        if not publisher or not self.newsletter.has_api_token():
+            return None
+        publisher.outbox.add_done_callback(self.on_job_done)
+        return publisher.outbox
+    
+    def enqueue_publish(self, content, week_number, articles=None, year=None):
+        """把生成好的周刊写入发布发件箱，同时保存发布完成后需要的期号和文章"""
+        outbox = self.outbox
+        if outbox is None:
+            logging.info("未配置 Notion API Token，跳过自动发布")
+            return None
+        
+        context = {
+            "newsletter": self.newsletter.name,
+            "week_number": week_number,
+            "year": year or datetime.now().isocalendar()[0],
+            "articles": [{key: article.get(key) for key in ("page_id", "title", "summary", "url")}
+                         for article in articles or []]
+        }
+        try:
+            return self.generator.publisher.enqueue_weekly(content, week_number, title_prefix=self.newsletter.title,
+                                                           context=context)
+        except Exception as e:
+            logging.error(f"写入发件箱时出错: {str(e)}")
+            return None
+    
+    def drain_outbox(self):
+        """上传发件箱中所有到期的发布任务，包括上次中断的任务"""
+        outbox = self.outbox
+        if outbox is None:
+            return []
+        results = outbox.drain()
+        self.complete_finished_issues()
+        return results
+    
+    def on_job_done(self, job):
+        """发件箱任务完成时调用：写入发布历史；同一期的全部目标都完成后，这一期只处理一次"""
+        batch_id = job["batch_id"]
+        outbox = self.generator.publisher.outbox
+        if outbox.claim_job(job["id"]):
+            context = outbox.batch_context(batch_id) if batch_id else None
+            self.record_history(job, context)
+        if batch_id and outbox.claim_batch(batch_id):
+            self.complete_issue(outbox.batch_context(batch_id))
+    
+    def complete_finished_issues(self):
+        """处理已发布完成、但还没处理的任务和期（如由其他进程或 CLI 上传完成的任务）"""
+        outbox = self.outbox
+        if outbox is None:
+            return 0
+        for job in outbox.completed_jobs():
+            if outbox.claim_job(job["id"]):
+                self.record_history(job, outbox.batch_context(job["batch_id"]) if job["batch_id"] else None)
+        completed = 0
+        for batch_id in outbox.completed_batches():
+            if outbox.claim_batch(batch_id):
+                self.complete_issue(outbox.batch_context(batch_id))
+                completed += 1
+        return completed
+    
+    def complete_issue(self, context):
+        """一期发布完成后：文章状态改为已发布，加入往期相关推荐和已收录文章"""
+        articles, week_number = context["articles"], context["week_number"]
+        self.mark_articles_published(articles)
+        self.update_related(articles, week_number, context["year"])
+        try:
+            self.featured.add(articles, context["year"], week_number)
+        except Exception as e:
+            logging.error(f"记录已收录文章时出错: {str(e)}")
+    
+    def record_history(self, job, context=None):
+        """
+        把已完成的发件箱任务写入发布历史
+        
+        Args:
+            job (dict): 发件箱任务
+            context (dict): 任务所属批次的上下文（本期年份和文章），CLI 直接发布的任务没有
+        """
+        try:
+            from publish_history import PublishHistory
+            history = PublishHistory(self.newsletter.path("publish_history.db"))
+            history.import_from_config(self.helper)
+            result = self.generator.publisher.outbox.job_result(job)
+            articles, year = (context["articles"], context["year"]) if context else ([], None)
+            history.append(job["database_id"], result, job["week_number"], articles, year)
+        except Exception as e:
+            logging.error(f"记录发布历史时出错: {str(e)}")
+    
+    def update_related(self, articles, week_number, year=None):
+        """发布成功后把本期文章加入往期相关推荐；首次启用时再导入发布历史（只有标题和链接）"""
+        try:
+            first_time = not len(self.related)
+            self.related.add_issue(articles, week_number, year)
+            if first_time:
+                from publish_history import PublishHistory
+                self.related.import_history(PublishHistory(self.newsletter.path("publish_history.db")))
+        except Exception as e:
+            logging.error(f"更新往期相关推荐时出错: {str(e)}")
+    
+    def mark_articles_published(self, articles):
+        """把本期收录的文章状态改为已发布"""
+        try:
+            from article_status_updater import ArticleStatusUpdater
+            return ArticleStatusUpdater(client=self.newsletter.client).mark_published(articles)
+        except Exception as e:
+            logging.error(f"更新文章状态时出错: {str(e)}")
+            return None
+    
     def send_notification(self, filename, article_count):
         """发送生成完成通知"""
         try:
             # 这里可以集成邮件通知、微信通知等
             message = f"""
-📰 超级个体周刊自动生成完成！
+📰 {self.newsletter.title}自动生成完成！
 
 📄 文件名: {filename}
 📊 文章数量: {article_count}篇
@@ -143,19 +451,105 @@ class WeeklyScheduler:
         except Exception as e:
             print(f"❌ 预览文章时出错: {str(e)}")
 
-def job():
-    """定时任务执行的函数"""
-    logging.info("🚀 定时任务开始执行...")
-    scheduler = WeeklyScheduler()
-    success = scheduler.generate_weekly_newsletter()
+def job(due=None, newsletter=None):
+    """
+    定时任务执行的函数
+    
+    Args:
+        due (datetime): 本次对应的调度时间；补跑错过的任务时生成那一周的周刊
+        newsletter (Newsletter): 要生成的周刊，默认是超级个体周刊
+    """
+    scheduler = WeeklyScheduler(newsletter)
+    title = scheduler.newsletter.title
+    logging.info(f"🚀 [{title}] 定时任务开始执行...")
+    
+    now = datetime.now()
+    if due is None or due.isocalendar()[:2] == now.isocalendar()[:2]:
+        success = scheduler.generate_weekly_newsletter()
+    else:
+        year, week_number = due.isocalendar()[:2]
+        success = scheduler.generate_weekly_newsletter(year, week_number)
+    scheduler.drain_outbox()
     
     if success:
-        logging.info("✅ 定时任务执行成功")
+        logging.info(f"✅ [{title}] 定时任务执行成功")
     else:
-        logging.error("❌ 定时任务执行失败")
+        logging.error(f"❌ [{title}] 定时任务执行失败")
+    return success
+
+def draft_job(due=None, newsletter=None):
+    """草稿预热任务：增量同步本周新归档的文章并更新草稿"""
+    try:
+        WeeklyScheduler(newsletter).drafts.sync()
+        return True
+    except Exception as e:
+        logging.error(f"同步草稿时出错: {str(e)}")
+        return False
+
+def build_event_scheduler(newsletters=None, max_workers=4):
+    """
+    创建事件驱动调度器，为每份周刊注册每周任务和（可选的）草稿预热任务
+    
+    配置了多份周刊时，任务在最多 max_workers 个线程的共享线程池中运行；
+    每份周刊使用自己的工作目录、发件箱和客户端，一份出错不影响其他周刊，
+    使用同一个 Token 的周刊共享同一个限速器
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from functools import partial
+    from event_scheduler import EventScheduler, Interval, WeeklyAt
+    
+    if newsletters is None:
+        newsletters = load_newsletters()
+    
+    executor = None
+    if len(newsletters) > 1:
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="newsletter")
+    event_scheduler = EventScheduler(executor=executor)
+    
+    for newsletter in newsletters:
+        # 默认每周日 09:00，可在 notion.newsletters 中用 weekday / at 修改
+        event_scheduler.add_job(newsletter.job_name(), WeeklyAt(newsletter.weekday, newsletter.at),
+                                partial(job, newsletter=newsletter))
+        
+        # 配置了 draft_sync_minutes 时，一周内定时预热草稿（如 60 为每小时、1440 为每天）
+        if newsletter.draft_sync_minutes:
+            event_scheduler.add_job(newsletter.job_name("draft_sync"), Interval(newsletter.draft_sync_minutes),
+                                    partial(draft_job, newsletter=newsletter))
+    return event_scheduler
+
+def run_scheduler(scheduler_instance=None, max_workers=4):
+    """启动定时调度，直到 Ctrl+C；启动时补跑错过的任务"""
+    newsletters = load_newsletters()
+    event_scheduler = build_event_scheduler(newsletters, max_workers)
+    
+    print("\n⏰ 启动定时调度...")
+    for status in event_scheduler.status():
+        print(f"📅 {status['name']}: {status['trigger']}")
+    print("📝 日志文件: weekly_scheduler.log")
+    print("⚠️  按 Ctrl+C 停止调度")
+    
+    # 启动各周刊发件箱的后台任务，继续上传上次中断的发布
+    for newsletter in newsletters:
+        if scheduler_instance is not None and newsletter.name == "default":
+            instance = scheduler_instance
+        else:
+            instance = WeeklyScheduler(newsletter)
+        outbox = instance.outbox
+        if outbox is not None:
+            instance.complete_finished_issues()
+            outbox.start_drainer()
+    
+    try:
+        # 睡到下一次到期时间，不再每分钟轮询
+        event_scheduler.run_forever()
+    except KeyboardInterrupt:
+        event_scheduler.stop()
+        print("\n⏹️  定时调度已停止")
 
 def main():
     """主函数"""
+    setup_logging()
+    
     print("🤖 超级个体周刊定时调度器")
     print("=" * 50)
     
@@ -166,7 +560,7 @@ def main():
         print("\n选择操作：")
         print("1. 立即测试生成周刊")
         print("2. 预览本周文章")
-        print("3. 启动定时调度 (每周日 09:00)")
+        print("3. 启动定时调度 (默认每周日 09:00)")
         print("4. 查看调度状态")
         print("5. 停止并退出")
         
@@ -184,34 +578,17 @@ def main():
             scheduler_instance.preview_articles()
         
         elif choice == "3":
-            print("\n⏰ 启动定时调度...")
-            print("📅 调度时间: 每周日 09:00")
-            print("📝 日志文件: weekly_scheduler.log")
-            print("⚠️  按 Ctrl+C 停止调度")
-            
-            # 设置定时任务 - 每周日上午9点执行
-            schedule.every().sunday.at("09:00").do(job)
-            
-            # 也可以设置其他时间，比如：
-            # schedule.every().sunday.at("21:00").do(job)  # 每周日晚上9点
-            # schedule.every().monday.at("08:00").do(job)  # 每周一早上8点
-            
-            try:
-                while True:
-                    schedule.run_pending()
-                    time.sleep(60)  # 每分钟检查一次
-            except KeyboardInterrupt:
-                print("\n⏹️  定时调度已停止")
-                break
+            run_scheduler(scheduler_instance)
+            break
         
         elif choice == "4":
             print("\n📊 调度状态:")
-            jobs = schedule.get_jobs()
-            if jobs:
-                for job in jobs:
-                    print(f"  - {job}")
-            else:
-                print("  当前没有活跃的调度任务")
+            for status in build_event_scheduler().status():
+                last = status["last"]
+                print(f"  - {status['name']}: {status['trigger']}")
+                if last.get("last_finished"):
+                    print(f"    上次运行: {last['last_finished']} ({'成功' if last.get('success') else '失败'})")
+                print(f"    下次运行: {status['next_due']}")
         
         elif choice == "5":
             print("👋 再见！")
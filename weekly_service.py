@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+周刊常驻服务
+进程常驻时配置、分类器、Notion 连接池和草稿都留在内存中，通过本地 HTTP 接口生成、发布和预览周刊:
+
+    POST /issues/{week}/generate   生成并保存周刊
+    POST /issues/{week}/publish    发布周刊（未生成时先生成；已发布过时返回原任务状态，?force=1 重新发布）
+    GET  /issues/{week}/preview    预览周刊（?format=json 返回 JSON）
+
+所有接口都支持 ?year=2025&newsletter=名称，默认今年和第一份周刊
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from newsletters import load_newsletters
+
+class ServiceError(Exception):
+    """返回给调用方的错误"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class IssueService:
+    def __init__(self, newsletters=None):
+        newsletters = newsletters or load_newsletters()
+        self.newsletters = {newsletter.name: newsletter for newsletter in newsletters}
+        self.default_newsletter = newsletters[0].name
+        self._schedulers = {}
+        self._issues = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """启动时创建所有周刊的调度器（解析配置、导入模块、建立客户端）"""
+        for name in self.newsletters:
+            self.scheduler(name)
+
+    def scheduler(self, name=None):
+        """每份周刊的调度器只创建一次，之后的请求复用"""
+        name = name or self.default_newsletter
+        if name not in self.newsletters:
+            raise ServiceError(404, f"没有名为 {name} 的周刊")
+
+        with self._lock:
+            if name not in self._schedulers:
+                from weekly_scheduler import WeeklyScheduler
+                self._schedulers[name] = WeeklyScheduler(self.newsletters[name])
+            return self._schedulers[name]
+
+    def issue_lock(self, key):
+        """同一期的生成和发布串行执行，不同期互不阻塞"""
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def issue_key(self, week_number, year=None, newsletter=None):
+        return (newsletter or self.default_newsletter, year or datetime.now().isocalendar()[0], week_number)
+
+    def generate(self, week_number, year=None, newsletter=None):
+        """生成并保存周刊，结果留在内存中供预览和发布"""
+        key = self.issue_key(week_number, year, newsletter)
+        scheduler = self.scheduler(newsletter)
+
+        with self.issue_lock(key):
+            content, articles, _ = scheduler.build_issue(key[1], week_number)
+            if not content:
+                raise ServiceError(404, f"{key[1]} 年第 {week_number} 周没有已归档的文章")
+            filename = scheduler.save_issue(content, week_number, articles, key[1])
+            issue = {
+                "newsletter": key[0],
+                "year": key[1],
+                "week_number": week_number,
+                "filename": filename,
+                "article_count": len(articles),
+                "content": content,
+                "articles": articles,
+                "generated_time": datetime.now().isoformat()
+            }
+            self._issues[key] = issue
+        return issue
+
+    def publish(self, week_number, year=None, newsletter=None, force=False):
+        """
+        发布周刊，返回各发件箱任务的状态
+
+        这一期已经写入过发件箱时不再重复发布，只续传未完成的任务并返回原任务的状态，
+        因此调用方可以放心重试；force=True 时重新发布一次
+        """
+        key = self.issue_key(week_number, year, newsletter)
+        scheduler = self.scheduler(newsletter)
+        if not scheduler.newsletter.has_api_token():
+            raise ServiceError(503, "未配置 Notion API Token，无法发布")
+
+        jobs = None
+        if not force:
+            with self.issue_lock(key):
+                jobs = scheduler.find_published(week_number, key[1])
+        if jobs is None:
+            issue = self._issues.get(key) or self.generate(week_number, year, newsletter)
+            with self.issue_lock(key):
+                # 生成期间可能有并发的请求已经发布
+                jobs = None if force else scheduler.find_published(week_number, key[1])
+                if jobs is None:
+                    jobs = scheduler.publish_issue(issue["content"], week_number, issue["articles"], key[1])
+
+        outbox = scheduler.generator.publisher.outbox
+        return {
+            "newsletter": key[0],
+            "year": key[1],
+            "week_number": week_number,
+            "success": bool(jobs) and all(job["status"] == "done" for job in jobs),
+            "targets": [outbox.job_result(job) for job in jobs]
+        }
+
+    def preview(self, week_number, year=None, newsletter=None):
+        """预览周刊：优先使用内存中已生成的结果，其次是草稿，都没有时现场生成（不保存）"""
+        key = self.issue_key(week_number, year, newsletter)
+        if key in self._issues:
+            return self._issues[key]
+
+        scheduler = self.scheduler(newsletter)
+        draft = scheduler.drafts.load(key[1], week_number)
+        articles = list(draft["articles"].values())
+        if not articles:
+            # 不走 build_issue：它会定稿（同步并写入）草稿，预览不能有副作用
+            articles = scheduler.query_helper.get_archived_articles_for_week(key[1], week_number)
+            articles = scheduler.drop_featured(articles, key[1], week_number)
+            if not articles:
+                raise ServiceError(404, f"{key[1]} 年第 {week_number} 周没有已归档的文章")
+        content = scheduler.generator.generate_weekly_content_from_articles(articles, week_number, key[1])
+
+        return {
+            "newsletter": key[0],
+            "year": key[1],
+            "week_number": week_number,
+            "article_count": len(articles),
+            "content": content,
+            "articles": articles
+        }
+
+class IssueServiceHandler(BaseHTTPRequestHandler):
+    server_version = "WeeklyService/1.0"
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("POST", re.compile(r"^/issues/(\d{1,2})/generate$"), "generate"),
+        ("POST", re.compile(r"^/issues/(\d{1,2})/publish$"), "publish"),
+        ("GET", re.compile(r"^/issues/(\d{1,2})/preview$"), "preview"),
+        ("GET", re.compile(r"^/health$"), "health"),
+    ]
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s" % (self.address_string(), format % args))
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _send(self, status, body, content_type="application/json; charset=utf-8"):
+        if isinstance(body, str):
+            data = body.encode('utf-8')
+        else:
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        for route_method, pattern, action in self.ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send(404, {"error": f"未知接口: {method} {url.path}"})
+
+        if action == "health":
+            return self._send(200, {"status": "ok", "newsletters": list(self.server.service.newsletters)})
+
+        started = time.perf_counter()
+        try:
+            week_number = int(match.group(1))
+            year = int(query["year"]) if "year" in query else None
+            if not 1 <= week_number <= 53:
+                raise ServiceError(400, f"无效的期号: {week_number}")
+            options = {"force": query.get("force") in ("1", "true")} if action == "publish" else {}
+            result = getattr(self.server.service, action)(week_number, year, query.get("newsletter"), **options)
+        except ServiceError as e:
+            return self._send(e.status, {"error": e.message})
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        except Exception as e:
+            logging.exception(f"处理 {method} {url.path} 时出错")
+            return self._send(500, {"error": str(e)})
+
+        logging.info(f"{method} {url.path} 完成，用时 {(time.perf_counter() - started) * 1000:.0f} ms")
+        if action == "preview" and query.get("format") != "json":
+            return self._send(200, result["content"], "text/markdown; charset=utf-8")
+        if action in ("generate", "preview"):
+            result = {name: value for name, value in result.items() if name != "articles"}
+        self._send(200, result)
+
+def create_server(host="127.0.0.1", port=8080, service=None):
+    """创建服务器（不启动），测试中可在线程里运行 serve_forever"""
+    server = ThreadingHTTPServer((host, port), IssueServiceHandler)
+    server.daemon_threads = True
+    server.service = service or IssueService()
+    return server
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="周刊常驻服务")
+    parser.add_argument("--host", default="127.0.0.1", help="默认只监听本机")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    server = create_server(args.host, args.port)
+    server.service.warm_up()
+
+    print(f"📰 周刊服务已启动: http://{args.host}:{args.port}")
+    print(f"📚 周刊: {', '.join(server.service.newsletters)}")
+    print("⚠️  按 Ctrl+C 停止")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  服务已停止")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()